@@ -171,6 +171,28 @@ class TUI:
         self.console.print()
         self.console.print(panel)
 
+    def tool_call_progress(
+        self,
+        call_id: str,
+        progress: float,
+        total: float | None,
+        message: str | None,
+    ) -> None:
+        if total:
+            status = f"{progress:g}/{total:g} ({progress / total:.0%})"
+        else:
+            status = f"{progress:g}"
+        if message:
+            status = f"{status} {message}"
+
+        self.console.print(
+            Text.assemble(
+                ("  ↳ ", "muted"),
+                (f"#{call_id[:8]} ", "muted"),
+                (status, "muted"),
+            )
+        )
+
     def _extract_read_file_code(self, text: str) -> tuple[int, str] | None:
         body = text
         header_match = re.match(r"^Showing lines (\d+)-(\d+) of (\d+)\n\n", text)
@@ -601,14 +623,18 @@ class TUI:
 - `/config` - Show current configuration
 - `/model <name>` - Change the model
 - `/approval <mode>` - Change approval mode
-- `/stats` - Show session statistics
+- `/stats` - Show session statistics and per-turn latency percentiles
+- `/stats csv [path]` - Export per-turn latency records as CSV
+- `/profile start|stop` - Sample the agent loop and write collapsed stacks
 - `/tools` - List available tools
 - `/mcp` - Show MCP server status
 - `/save` - Save current session
 - `/checkpoint [name]` - Create a checkpoint
+- `/checkpoint export <id> [path]` - Export a self-contained checkpoint
+- `/checkpoint delete <id>` / `/checkpoint gc` - Delete checkpoints, free unused blocks
 - `/checkpoints` - List available checkpoints
-- `/restore <checkpoint_id>` - Restore a checkpoint
-- `/sessions` - List saved sessions
+- `/restore <checkpoint_id|file>` - Restore a checkpoint
+- `/sessions [text] [--here] [--page N]` - List or search saved sessions
 - `/resume <session_id>` - Resume a saved session
 
 ## Tips
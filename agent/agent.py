@@ -1,10 +1,14 @@
 from __future__ import annotations
+import asyncio
+import time
 from typing import AsyncGenerator, Awaitable, Callable
 from agent.events import AgentEvent, AgentEventType
 from agent.session import Session
+from agent.turn_stats import ToolTiming
 from client.response import StreamEventType, TokenUsage, ToolCall, ToolResultMessage
-from config.config import Config
+from config.config import Config, ProfileScope
 from prompts.system import create_loop_breaker_prompt
+from telemetry import span, traced
 from tools.base import ToolConfirmation
 
 
@@ -13,68 +17,142 @@ class Agent:
         self,
         config: Config,
         confirmation_callback: Callable[[ToolConfirmation], bool] | None = None,
+        subagent: bool = False,
     ):
         self.config = config
-        self.session: Session | None = Session(self.config)
+        self.session: Session | None = Session(self.config, subagent=subagent)
         self.session.approval_manager.confirmation_callback = confirmation_callback
 
     async def run(self, message: str):
-        await self.session.hook_system.trigger_before_agent(message)
-        yield AgentEvent.agent_start(message)
-        self.session.context_manager.add_user_message(message)
-
-        final_response: str | None = None
-
-        async for event in self._agentic_loop():
-            yield event
-
-            if event.type == AgentEventType.TEXT_COMPLETE:
-                final_response = event.data.get("content")
-
-        await self.session.hook_system.trigger_after_agent(message, final_response)
-        yield AgentEvent.agent_end(final_response)
+        profiling = self.config.profiling
+        profile_turn = (
+            profiling.enabled
+            and profiling.scope == ProfileScope.TURN
+            and self.session.start_profiler(
+                f"{self.session.session_id}_turn{self.session.turn_count + 1}"
+            )
+        )
+
+        hook_system = self.session.hook_system
+        try:
+            hook_time_before = hook_system.total_time
+            await hook_system.trigger_before_agent(message)
+            self.session.turn_stats.add_hook_before_turn(
+                (hook_system.total_time - hook_time_before) * 1000
+            )
+            yield AgentEvent.agent_start(message)
+            if self.session.first_message is None:
+                self.session.first_message = message[:500]
+            self.session.context_manager.add_user_message(message)
+
+            final_response: str | None = None
+
+            async for event in self._agentic_loop():
+                yield event
+
+                if event.type == AgentEventType.TEXT_COMPLETE:
+                    final_response = event.data.get("content")
+
+            self.session.turn_stats.finish_turn()
+            if self.config.persistence.autosave:
+                await self.session.save()
+            hook_time_before = hook_system.total_time
+            await hook_system.trigger_after_agent(message, final_response)
+            self.session.turn_stats.add_hook_after_turn(
+                (hook_system.total_time - hook_time_before) * 1000
+            )
+            yield AgentEvent.agent_end(final_response)
+        finally:
+            if profile_turn:
+                self.session.stop_profiler()
 
+    @traced("agent.agentic_loop")
     async def _agentic_loop(self) -> AsyncGenerator[AgentEvent, None]:
         max_turns = self.config.max_turns
+        breaking_loop = False
 
         for turn_num in range(max_turns):
-            self.session.increment_turn()
+            turn_record = self.session.turn_stats.start_turn(
+                self.session.increment_turn()
+            )
             response_text = ""
 
+            tool_schemas = self.session.tool_registry.get_schemas()
+            self.session.context_manager.set_tool_schemas(tool_schemas)
+
+            compactor = self.session.chat_compactor
+            background_usage = compactor.apply_background(self.session.context_manager)
+            if background_usage:
+                self.session.context_manager.add_usage(background_usage)
+                turn_record.add_usage(background_usage)
+
             # check for context overflow
             if self.session.context_manager.needs_compression():
-                summary, usage = await self.session.chat_compactor.compress(
-                    self.session.context_manager
-                )
+                compaction_started = time.perf_counter()
+                with span("agent.compaction", turn=turn_num + 1):
+                    usage = await self.session.chat_compactor.compact(
+                        self.session.context_manager
+                    )
 
-                if summary:
-                    self.session.context_manager.replace_with_summary(summary)
-                    self.session.context_manager.set_latest_usage(usage)
-                    self.session.context_manager.add_usage(usage)
+                    if usage:
+                        self.session.context_manager.add_usage(usage)
+                        turn_record.add_usage(usage)
 
-            tool_schemas = self.session.tool_registry.get_schemas()
+                turn_record.compaction_ms = (
+                    time.perf_counter() - compaction_started
+                ) * 1000
+
+            # Summarize aged turns concurrently with this turn's generation
+            # and tool calls; the result is swapped in at a later boundary.
+            compactor.start_background(self.session.context_manager)
 
             tool_calls: list[ToolCall] = []
             usage: TokenUsage | None = None
 
-            async for event in self.session.client.chat_completion(
-                self.session.context_manager.get_messages(),
-                tools=tool_schemas if tool_schemas else None,
-            ):
-                if event.type == StreamEventType.TEXT_DELTA:
-                    if event.text_delta:
-                        content = event.text_delta.content
-                        response_text += content
-                        yield AgentEvent.text_delta(content)
-                elif event.type == StreamEventType.TOOL_CALL_COMPLETE:
-                    if event.tool_call:
-                        tool_calls.append(event.tool_call)
-                elif event.type == StreamEventType.ERROR:
-                    yield AgentEvent.agent_error(
-                        event.error or "Unknown error occurred.",
-                    )
-                elif event.type == StreamEventType.MESSAGE_COMPLETE:
-                    usage = event.usage
+            # The turn after a detected loop may go to a different model.
+            client = (
+                self.session.loop_breaker_client
+                if breaking_loop
+                else self.session.client
+            )
+            breaking_loop = False
+
+            self.session.context_manager.begin_request()
+            messages = await self.session.context_manager.get_messages_async()
+            generation_started = time.perf_counter()
+            with span("agent.generation", turn=turn_num + 1):
+                async for event in client.chat_completion(
+                    messages,
+                    tools=tool_schemas if tool_schemas else None,
+                ):
+                    if turn_record.ttft_ms is None and event.type in {
+                        StreamEventType.TEXT_DELTA,
+                        StreamEventType.TOOL_CALL_START,
+                    }:
+                        turn_record.ttft_ms = (
+                            time.perf_counter() - generation_started
+                        ) * 1000
+
+                    if event.type == StreamEventType.TEXT_DELTA:
+                        if event.text_delta:
+                            content = event.text_delta.content
+                            response_text += content
+                            yield AgentEvent.text_delta(content)
+                    elif event.type == StreamEventType.TOOL_CALL_COMPLETE:
+                        if event.tool_call:
+                            tool_calls.append(event.tool_call)
+                    elif event.type == StreamEventType.ERROR:
+                        yield AgentEvent.agent_error(
+                            event.error or "Unknown error occurred.",
+                        )
+                    elif event.type == StreamEventType.MESSAGE_COMPLETE:
+                        usage = event.usage
+
+            turn_record.generation_ms = (
+                time.perf_counter() - generation_started
+            ) * 1000
+            if usage:
+                turn_record.add_usage(usage)
 
             self.session.context_manager.add_assistant_message(
                 response_text or None,
@@ -125,12 +203,77 @@ class Agent:
                     args=tool_call.arguments,
                 )
 
-                result = await self.session.tool_registry.invoke(
-                    tool_call.name,
-                    tool_call.arguments,
-                    self.config.cwd,
-                    self.session.hook_system,
-                    self.session.approval_manager,
+                tool_started = time.perf_counter()
+                hook_time_before = self.session.hook_system.total_time
+                wait_time_before = self.session.approval_manager.total_wait_time
+
+                # Progress notifications are yielded while the tool runs.
+                progress_events: asyncio.Queue[AgentEvent] = asyncio.Queue()
+
+                def on_progress(
+                    progress: float,
+                    total: float | None,
+                    message: str | None,
+                    call_id: str = tool_call.call_id,
+                    name: str = tool_call.name,
+                ) -> None:
+                    progress_events.put_nowait(
+                        AgentEvent.tool_call_progress(
+                            call_id, name, progress, total, message
+                        )
+                    )
+
+                invoke_task = asyncio.create_task(
+                    self.session.tool_registry.invoke(
+                        tool_call.name,
+                        tool_call.arguments,
+                        self.config.cwd,
+                        self.session.hook_system,
+                        self.session.approval_manager,
+                        progress=on_progress,
+                    )
+                )
+                next_event = None
+                try:
+                    while not invoke_task.done():
+                        next_event = asyncio.ensure_future(progress_events.get())
+                        await asyncio.wait(
+                            {invoke_task, next_event},
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                        if next_event.done():
+                            yield next_event.result()
+                        else:
+                            next_event.cancel()
+                finally:
+                    if next_event is not None and not next_event.done():
+                        next_event.cancel()
+                    if not invoke_task.done():
+                        invoke_task.cancel()
+                        # Let the tool clean up (kill subprocesses, close
+                        # streams) before the cancellation propagates.
+                        await asyncio.gather(invoke_task, return_exceptions=True)
+
+                while not progress_events.empty():
+                    yield progress_events.get_nowait()
+                result = invoke_task.result()
+
+                hook_ms = (
+                    self.session.hook_system.total_time - hook_time_before
+                ) * 1000
+                wait_ms = (
+                    self.session.approval_manager.total_wait_time - wait_time_before
+                ) * 1000
+                elapsed_ms = (time.perf_counter() - tool_started) * 1000
+                turn_record.hook_ms += hook_ms
+                turn_record.tools.append(
+                    ToolTiming(
+                        name=tool_call.name,
+                        execution_ms=max(0.0, elapsed_ms - hook_ms - wait_ms),
+                        approval_wait_ms=wait_ms,
+                        hook_ms=hook_ms,
+                        success=result.success,
+                    )
                 )
 
                 raw_tool_results.append((tool_call.name, result))
@@ -149,10 +292,25 @@ class Agent:
                     )
                 )
 
-            for tool_result in tool_call_results:
+            for tool_result, (tool_name, result) in zip(
+                tool_call_results, raw_tool_results
+            ):
+                path, supersede = None, False
+                metadata = result.metadata
+                if tool_name == "read_file" and result.success and metadata:
+                    path = metadata.get("path")
+                    supersede = (
+                        not result.truncated
+                        and metadata.get("shown_start") == 1
+                        and metadata.get("shown_end") == metadata.get("total_lines")
+                    )
+
                 self.session.context_manager.add_tool_result(
                     tool_result.tool_call_id,
                     tool_result.content,
+                    tool_name=tool_name,
+                    path=path,
+                    supersede=supersede,
                 )
 
             invalid_param_errors = []
@@ -180,6 +338,7 @@ class Agent:
             if loop_detection_error:
                 loop_prompt = create_loop_breaker_prompt(loop_detection_error)
                 self.session.context_manager.add_user_message(loop_prompt)
+                breaking_loop = True
 
             if usage:
                 self.session.context_manager.set_latest_usage(usage)
@@ -199,6 +358,5 @@ class Agent:
         exc_tb,
     ) -> None:
         if self.session and self.session.client and self.session.mcp_manager:
-            await self.session.client.close()
-            await self.session.mcp_manager.shutdown()
+            await self.session.close()
             self.session = None
@@ -0,0 +1,241 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    turn_count INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    cwd TEXT,
+    first_message TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at DESC);
+CREATE INDEX IF NOT EXISTS sessions_cwd ON sessions (cwd, updated_at DESC);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5 (
+    session_id UNINDEXED,
+    first_message,
+    cwd
+);
+"""
+
+
+@dataclass
+class SessionEntry:
+    session_id: str
+    created_at: str
+    updated_at: str
+    turn_count: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cwd: str | None = None
+    first_message: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "turn_count": self.turn_count,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cwd": self.cwd,
+            "first_message": self.first_message,
+        }
+
+
+_COLUMNS = tuple(SessionEntry.__dataclass_fields__)
+
+
+class SessionCatalog:
+    # Session metadata for listing and search; session files are only read on
+    # load. Search uses FTS5 when SQLite has it and LIKE otherwise.
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=10, isolation_level=None
+        )
+        os.chmod(path, 0o600)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.has_fts = self._create_schema()
+
+    def _create_schema(self) -> bool:
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+            try:
+                self._conn.executescript(_FTS_SCHEMA)
+            except sqlite3.OperationalError:
+                logger.debug("SQLite FTS5 unavailable, searching with LIKE")
+                return False
+
+        return True
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def upsert(self, entry: SessionEntry) -> None:
+        self.upsert_many([entry])
+
+    def upsert_many(self, entries: list[SessionEntry]) -> None:
+        with self._transaction() as conn:
+            for entry in entries:
+                self._upsert(conn, entry)
+
+    def _upsert(self, conn: sqlite3.Connection, entry: SessionEntry) -> None:
+        conn.execute(
+            f"""
+            INSERT INTO sessions ({", ".join(_COLUMNS)})
+            VALUES ({", ".join("?" for _ in _COLUMNS)})
+            ON CONFLICT (session_id) DO UPDATE SET
+                updated_at = excluded.updated_at,
+                turn_count = excluded.turn_count,
+                prompt_tokens = excluded.prompt_tokens,
+                completion_tokens = excluded.completion_tokens,
+                total_tokens = excluded.total_tokens,
+                cwd = COALESCE(excluded.cwd, sessions.cwd),
+                first_message = COALESCE(sessions.first_message, excluded.first_message)
+            """,
+            tuple(getattr(entry, column) for column in _COLUMNS),
+        )
+
+        if self.has_fts:
+            row = conn.execute(
+                "SELECT first_message, cwd FROM sessions WHERE session_id = ?",
+                (entry.session_id,),
+            ).fetchone()
+            conn.execute(
+                "DELETE FROM sessions_fts WHERE session_id = ?", (entry.session_id,)
+            )
+            conn.execute(
+                "INSERT INTO sessions_fts (session_id, first_message, cwd) "
+                "VALUES (?, ?, ?)",
+                (entry.session_id, row["first_message"] or "", row["cwd"] or ""),
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            if self.has_fts:
+                conn.execute(
+                    "DELETE FROM sessions_fts WHERE session_id = ?", (session_id,)
+                )
+
+    def get(self, session_id: str) -> SessionEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+
+        return SessionEntry(**dict(row)) if row else None
+
+    def query(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        search: str | None = None,
+        cwd: str | None = None,
+        since: str | None = None,
+    ) -> tuple[list[SessionEntry], int]:
+        # Newest first, with the total number of matches.
+        where: list[str] = []
+        params: list[Any] = []
+
+        if cwd:
+            where.append("s.cwd = ?")
+            params.append(cwd)
+        if since:
+            where.append("s.updated_at >= ?")
+            params.append(since)
+        if search:
+            if self.has_fts:
+                where.append(
+                    "s.session_id IN (SELECT session_id FROM sessions_fts "
+                    "WHERE sessions_fts MATCH ?)"
+                )
+                params.append(self._fts_query(search))
+            else:
+                where.append(
+                    "(s.first_message LIKE ? OR s.cwd LIKE ? OR s.session_id LIKE ?)"
+                )
+                params.extend([f"%{search}%"] * 3)
+
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM sessions s {clause}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT s.* FROM sessions s {clause} "
+                "ORDER BY s.updated_at DESC LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+
+        return [SessionEntry(**dict(row)) for row in rows], total
+
+    @staticmethod
+    def _fts_query(search: str) -> str:
+        # Quote each term so user input is never parsed as FTS syntax; the
+        # last term is matched as a prefix.
+        terms = [t.replace('"', '""') for t in search.split()]
+        if not terms:
+            return '""'
+        quoted = [f'"{t}"' for t in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Any
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _record_hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+@dataclass
+class GCResult:
+    blocks_removed: int = 0
+    bytes_freed: int = 0
+
+
+class CheckpointStore:
+    # Records are cut into blocks at content-defined boundaries and stored once
+    # under their hash, so checkpoints of one session share unchanged blocks.
+    def __init__(
+        self,
+        root: Path,
+        codec: str = "auto",
+        level: int = 3,
+        boundary_bits: int = 5,
+        max_block_records: int = 128,
+    ) -> None:
+        self.root = root
+        self.codec = self._resolve_codec(codec)
+        self.level = level
+        self.boundary_mask = (1 << boundary_bits) - 1
+        self.max_block_records = max_block_records
+        self.root.mkdir(parents=True, exist_ok=True)
+        os.chmod(self.root, 0o700)
+
+    @staticmethod
+    def _resolve_codec(codec: str) -> str:
+        if codec == "auto":
+            return "zstd" if zstandard is not None else "zlib"
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, compressing with zlib")
+            return "zlib"
+        return codec
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        if self.codec == "zlib":
+            return zlib.compress(data, min(self.level, 9))
+        return data
+
+    @staticmethod
+    def _decompress(data: bytes) -> bytes:
+        if data.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise RuntimeError("Checkpoint block is zstd-compressed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        if data[:1] == b"x":
+            return zlib.decompress(data)
+        return data
+
+    def put_records(self, records: list[dict[str, Any]]) -> list[str]:
+        keys = []
+        block: list[bytes] = []
+        for record in records:
+            line = json.dumps(record, sort_keys=True).encode("utf-8")
+            block.append(line)
+            if (
+                _record_hash(line) & self.boundary_mask == 0
+                or len(block) >= self.max_block_records
+            ):
+                keys.append(self._put_block(block))
+                block = []
+
+        if block:
+            keys.append(self._put_block(block))
+
+        return keys
+
+    def _put_block(self, lines: list[bytes]) -> str:
+        data = b"\n".join(lines)
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if path.exists():
+            # Refresh the mtime so a concurrent gc treats it as fresh.
+            os.utime(path)
+            return key
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(self._compress(data))
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+        return key
+
+    def get_records(self, keys: list[str]) -> list[dict[str, Any]]:
+        records = []
+        for key in keys:
+            data = self._decompress(self._path(key).read_bytes())
+            records.extend(json.loads(line) for line in data.split(b"\n") if line)
+
+        return records
+
+    def gc(self, referenced: set[str], grace_sec: float = 3600) -> GCResult:
+        # Blocks are written before their manifest, so recent unreferenced
+        # blocks may belong to a checkpoint that is still being saved.
+        result = GCResult()
+        cutoff = time.time() - grace_sec
+        for path in self.root.glob("*/*"):
+            if path.name in referenced or path.name.endswith(".tmp"):
+                continue
+            try:
+                stat = path.stat()
+                if stat.st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except OSError:
+                continue
+            result.blocks_removed += 1
+            result.bytes_freed += stat.st_size
+
+        return result
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*/*") if p.is_file())
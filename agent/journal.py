@@ -0,0 +1,251 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JournalState:
+    session_id: str
+    created_at: datetime
+    updated_at: datetime
+    turn_count: int = 0
+    total_usage: dict[str, int] = field(default_factory=dict)
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    summaries: list[dict[str, Any]] = field(default_factory=list)
+    turn_stats: list[dict[str, Any]] = field(default_factory=list)
+    records: int = 0
+
+    def apply(self, record: dict[str, Any]) -> None:
+        op = record.get("op")
+        self.records += 1
+
+        if op == "message":
+            self.messages.append(record["item"])
+        elif op == "update":
+            index = record["index"]
+            if 0 <= index < len(self.messages):
+                self.messages[index] = record["item"]
+        elif op == "summarize":
+            del self.messages[: record["count"]]
+            self.summaries.append(record["summary"])
+        elif op == "merge":
+            del self.summaries[-record["count"] :]
+            self.summaries.append(record["summary"])
+        elif op == "clear":
+            self.messages = []
+            self.summaries = []
+        elif op == "usage":
+            self.total_usage = record["total_usage"]
+        elif op == "turn":
+            self.turn_count = record["turn_count"]
+            self.updated_at = datetime.fromisoformat(record["updated_at"])
+            self.turn_stats.extend(record.get("turn_stats", []))
+        elif op == "state":
+            self.turn_count = record["turn_count"]
+            self.updated_at = datetime.fromisoformat(record["updated_at"])
+            self.total_usage = record["total_usage"]
+            self.messages = list(record["messages"])
+            self.summaries = list(record["summaries"])
+            self.turn_stats = list(record["turn_stats"])
+
+    def to_state_record(self) -> dict[str, Any]:
+        return {
+            "op": "state",
+            "turn_count": self.turn_count,
+            "updated_at": self.updated_at.isoformat(),
+            "total_usage": self.total_usage,
+            "messages": self.messages,
+            "summaries": self.summaries,
+            "turn_stats": self.turn_stats,
+        }
+
+
+def _iter_records(path: Path, limit: int | None = None) -> Iterator[dict[str, Any]]:
+    with open(path, "rb") as fp:
+        while limit is None or fp.tell() < limit:
+            line = fp.readline()
+            if not line:
+                break
+            if not line.endswith(b"\n"):
+                # Torn write from a crash; everything before it is intact.
+                break
+            yield json.loads(line)
+
+
+def replay(path: Path, offset: int | None = None) -> JournalState | None:
+    records = _iter_records(path, offset)
+    header = next(records, None)
+    if header is None or header.get("op") != "header":
+        return None
+
+    created_at = datetime.fromisoformat(header["created_at"])
+    state = JournalState(
+        session_id=header["session_id"],
+        created_at=created_at,
+        updated_at=created_at,
+    )
+    for record in records:
+        state.apply(record)
+
+    return state
+
+
+def read_header(path: Path) -> dict[str, Any] | None:
+    try:
+        with open(path, "rb") as fp:
+            return json.loads(fp.readline())
+    except (OSError, ValueError):
+        return None
+
+
+class SessionJournal:
+    # One directory of numbered JSONL generations per session. Each starts from
+    # a full state record, so a checkpoint is just (generation, offset).
+    def __init__(
+        self,
+        root: Path,
+        session_id: str,
+        fsync_interval: float = 1.0,
+    ) -> None:
+        self.session_id = session_id
+        self.directory = root / session_id
+        self.fsync_interval = fsync_interval
+        self.generation = 0
+        self.records = 0
+        self.baseline_size = 0
+        self._buffer: list[bytes] = []
+        self._lock = threading.Lock()
+        self._fp = None
+        self._last_fsync = 0.0
+
+    @staticmethod
+    def generation_path(directory: Path, generation: int) -> Path:
+        return directory / f"{generation:06d}.jsonl"
+
+    @staticmethod
+    def latest_generation(directory: Path) -> int | None:
+        generations = [
+            int(p.stem) for p in directory.glob("*.jsonl") if p.stem.isdigit()
+        ]
+        return max(generations) if generations else None
+
+    @property
+    def path(self) -> Path:
+        return self.generation_path(self.directory, self.generation)
+
+    @property
+    def offset(self) -> int:
+        return self._fp.tell() if self._fp else 0
+
+    def open(self, state: JournalState) -> None:
+        # Always starts a fresh generation from the given state, so a journal
+        # never has to be reconciled with what the caller loaded.
+        self.directory.mkdir(parents=True, exist_ok=True)
+        os.chmod(self.directory, 0o700)
+        latest = self.latest_generation(self.directory)
+        self._start_generation(0 if latest is None else latest + 1, state)
+
+    def _start_generation(self, generation: int, state: JournalState) -> None:
+        path = self.generation_path(self.directory, generation)
+        header = {
+            "op": "header",
+            "session_id": self.session_id,
+            "created_at": state.created_at.isoformat(),
+            "generation": generation,
+        }
+
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as fp:
+            fp.write(self._encode(header))
+            fp.write(self._encode(state.to_state_record()))
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+
+        if self._fp:
+            self._fp.close()
+        self._fp = open(path, "ab")
+        self.generation = generation
+        self.records = 0
+        self.baseline_size = len(state.messages) + len(state.summaries)
+        self._last_fsync = time.monotonic()
+
+    @staticmethod
+    def _encode(record: dict[str, Any]) -> bytes:
+        return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
+    def append(self, op: str, **payload: Any) -> None:
+        line = self._encode({"op": op, **payload})
+        with self._lock:
+            self._buffer.append(line)
+            self.records += 1
+
+    def commit(self, force_sync: bool = False) -> int:
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+            if self._fp is None:
+                return 0
+
+            if buffer:
+                self._fp.write(b"".join(buffer))
+                self._fp.flush()
+
+            now = time.monotonic()
+            if force_sync or now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._fp.fileno())
+                self._last_fsync = now
+
+            return self._fp.tell()
+
+    def needs_compaction(self, min_records: int, ratio: float) -> bool:
+        return self.records >= min_records and self.records > ratio * max(
+            1, self.baseline_size
+        )
+
+    def compact(self) -> None:
+        # Replay the current generation and restart from its state.
+        self.commit(force_sync=True)
+        state = replay(self.path)
+        if state is None:
+            return
+
+        with self._lock:
+            self._start_generation(self.generation + 1, state)
+
+    def remove_generations(self, keep: set[int]) -> None:
+        for path in self.directory.glob("*.jsonl"):
+            if not path.stem.isdigit():
+                continue
+            generation = int(path.stem)
+            if generation == self.generation or generation in keep:
+                continue
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove old journal generation: {e}")
+
+    def close(self) -> None:
+        self.commit(force_sync=True)
+        with self._lock:
+            if self._fp:
+                self._fp.close()
+                self._fp = None
+
+    def discard(self) -> None:
+        # Drops the current generation, and the directory once it is empty.
+        self.close()
+        try:
+            self.path.unlink(missing_ok=True)
+            self.directory.rmdir()
+        except OSError:
+            pass
@@ -1,11 +1,27 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+import gzip
+from itertools import chain
 import json
+import logging
 import os
-from typing import Any
+from pathlib import Path
+import re
+from typing import Any, Iterator
+from agent.catalog import SessionCatalog, SessionEntry
+from agent.checkpoint_store import CheckpointStore, GCResult
+from agent.journal import JournalState, SessionJournal, replay
 from client.response import TokenUsage
+from config.config import PersistenceConfig
 from config.loader import get_data_dir
+from context.blob_store import BlobStore
+
+logger = logging.getLogger(__name__)
+
+# Spilled bodies are referenced by key and MCP attachments by a path ending in
+# the key, so anything shaped like a key marks a blob as in use.
+BLOB_KEY = re.compile(r"[0-9a-f]{64}")
 
 
 @dataclass
@@ -14,18 +30,60 @@ class SessionSnapshot:
     created_at: datetime
     updated_at: datetime
     turn_count: int
-    messages: list[dict[str, Any]]
     total_usage: TokenUsage
+    # Storage records (see MessageItem.to_record) with token counts and
+    # pruning state. Snapshots written before records existed only carry the
+    # rendered ``messages``.
+    records: list[dict[str, Any]] | None = None
+    summaries: list[dict[str, Any]] = field(default_factory=list)
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    turn_stats: list[dict[str, Any]] = field(default_factory=list)
+    cwd: str | None = None
+
+    def message_records(self) -> list[dict[str, Any]]:
+        if self.records is not None:
+            return self.records
+
+        return [
+            {
+                key: msg[key]
+                for key in ("role", "content", "tool_call_id", "tool_calls")
+                if msg.get(key) is not None
+            }
+            for msg in self.messages
+            if msg.get("role") != "system"
+        ]
+
+    def to_entry(self) -> SessionEntry:
+        return SessionEntry(
+            session_id=self.session_id,
+            created_at=self.created_at.isoformat(),
+            updated_at=self.updated_at.isoformat(),
+            turn_count=self.turn_count,
+            prompt_tokens=self.total_usage.prompt_tokens,
+            completion_tokens=self.total_usage.completion_tokens,
+            total_tokens=self.total_usage.total_tokens,
+            cwd=self.cwd,
+            first_message=_first_user_message(self.message_records()),
+        )
 
     def to_dict(self) -> dict[str, Any]:
-        return {
+        data = {
             "session_id": self.session_id,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
             "turn_count": self.turn_count,
-            "messages": self.messages,
             "total_usage": self.total_usage.__dict__,
+            "turn_stats": self.turn_stats,
+            "cwd": self.cwd,
         }
+        if self.records is not None:
+            data["records"] = self.records
+            data["summaries"] = self.summaries
+        else:
+            data["messages"] = self.messages
+
+        return data
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> SessionSnapshot:
@@ -34,20 +92,110 @@ class SessionSnapshot:
             created_at=datetime.fromisoformat(data["created_at"]),
             updated_at=datetime.fromisoformat(data["updated_at"]),
             turn_count=data["turn_count"],
-            messages=data["messages"],
             total_usage=TokenUsage(**data["total_usage"]),
+            records=data.get("records"),
+            summaries=data.get("summaries", []),
+            messages=data.get("messages", []),
+            turn_stats=data.get("turn_stats", []),
+            cwd=data.get("cwd"),
         )
 
+    @classmethod
+    def from_journal_state(cls, state: JournalState) -> SessionSnapshot:
+        return cls(
+            session_id=state.session_id,
+            created_at=state.created_at,
+            updated_at=state.updated_at,
+            turn_count=state.turn_count,
+            total_usage=TokenUsage(**state.total_usage),
+            records=state.messages,
+            summaries=state.summaries,
+            turn_stats=state.turn_stats,
+        )
+
+
+def _first_user_message(messages: list[dict[str, Any]]) -> str | None:
+    for message in messages:
+        content = message.get("content") or ""
+        if message.get("role") == "user" and not content.startswith(
+            "# Context Restoration"
+        ):
+            return content[:500]
+
+    return None
+
 
 class PersistenceManager:
-    def __init__(self):
+    def __init__(self, config: PersistenceConfig | None = None):
+        self.config = config or PersistenceConfig()
         self.data_dir = get_data_dir()
         self.sessions_dir = self.data_dir / "sessions"
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
         self.checkpoints_dir = self.data_dir / "checkpoints"
         self.checkpoints_dir.mkdir(parents=True, exist_ok=True)
+        self.journals_dir = self.data_dir / "journals"
         os.chmod(self.sessions_dir, 0o700)
         os.chmod(self.checkpoints_dir, 0o700)
+        self._catalog: SessionCatalog | None = None
+        self._checkpoint_store: CheckpointStore | None = None
+        self._blob_store: BlobStore | None = None
+
+    @property
+    def catalog(self) -> SessionCatalog:
+        if self._catalog is None:
+            self._catalog = SessionCatalog(self.data_dir / "sessions.db")
+            if self._catalog.get_meta("migrated_at") is None:
+                self._migrate(self._catalog)
+
+        return self._catalog
+
+    def _migrate(self, catalog: SessionCatalog) -> None:
+        # One-off import of sessions saved before the catalog existed.
+        entries: dict[str, SessionEntry] = {}
+        for file_path in self.sessions_dir.glob("*.json"):
+            try:
+                with open(file_path, "r", encoding="utf-8") as fp:
+                    entry = SessionSnapshot.from_dict(json.load(fp)).to_entry()
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping unreadable session file {file_path}: {e}")
+                continue
+            entries[entry.session_id] = entry
+
+        if self.journals_dir.is_dir():
+            for directory in self.journals_dir.iterdir():
+                snapshot = self._replay_journal(directory.name)
+                if snapshot is None:
+                    continue
+                entry = snapshot.to_entry()
+                existing = entries.get(entry.session_id)
+                if existing is None or existing.updated_at <= entry.updated_at:
+                    entries[entry.session_id] = entry
+
+        catalog.upsert_many(list(entries.values()))
+        catalog.set_meta("migrated_at", datetime.now().isoformat())
+        if entries:
+            logger.info(f"Imported {len(entries)} saved sessions into the catalog")
+
+    def _replay_journal(
+        self, session_id: str, generation: int | None = None, offset: int | None = None
+    ) -> SessionSnapshot | None:
+        directory = self.journals_dir / session_id
+        if generation is None:
+            if not directory.is_dir():
+                return None
+            generation = SessionJournal.latest_generation(directory)
+            if generation is None:
+                return None
+
+        path = SessionJournal.generation_path(directory, generation)
+        if not path.exists():
+            return None
+
+        state = replay(path, offset)
+        if state is None:
+            return None
+
+        return SessionSnapshot.from_journal_state(state)
 
     def save_session(self, snapshot: SessionSnapshot) -> None:
         file_path = self.sessions_dir / f"{snapshot.session_id}.json"
@@ -56,8 +204,13 @@ class PersistenceManager:
             json.dump(snapshot.to_dict(), fp, indent=2)
 
         os.chmod(file_path, 0o600)
+        self.catalog.upsert(snapshot.to_entry())
 
     def load_session(self, session_id: str) -> SessionSnapshot | None:
+        snapshot = self._replay_journal(session_id)
+        if snapshot is not None:
+            return snapshot
+
         file_path = self.sessions_dir / f"{session_id}.json"
 
         if not file_path.exists():
@@ -68,40 +221,262 @@ class PersistenceManager:
 
         return SessionSnapshot.from_dict(data)
 
-    def list_sessions(self) -> list[dict[str, Any]]:
-        sessions = []
-        for file_path in self.sessions_dir.glob("*.json"):
-            with open(file_path, "r", encoding="utf-8") as fp:
-                data = json.load(fp)
-            sessions.append(
-                {
-                    "session_id": data["session_id"],
-                    "created_at": data["created_at"],
-                    "updated_at": data["updated_at"],
-                    "turn_count": data["turn_count"],
-                }
+    def list_sessions(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        search: str | None = None,
+        cwd: str | None = None,
+    ) -> tuple[list[dict[str, Any]], int]:
+        entries, total = self.catalog.query(
+            limit=limit, offset=offset, search=search, cwd=cwd
+        )
+        return [entry.to_dict() for entry in entries], total
+
+    @property
+    def checkpoint_store(self) -> CheckpointStore:
+        if self._checkpoint_store is None:
+            self._checkpoint_store = CheckpointStore(
+                self.checkpoints_dir / "blocks",
+                codec=self.config.checkpoint_codec.value,
+                level=self.config.checkpoint_compression_level,
             )
 
-        sessions.sort(key=lambda x: x["updated_at"], reverse=True)
-        return sessions
+        return self._checkpoint_store
+
+    @property
+    def blob_store(self) -> BlobStore:
+        if self._blob_store is None:
+            self._blob_store = BlobStore(self.data_dir / "blobs")
+
+        return self._blob_store
+
+    def _checkpoint_path(self, checkpoint_id: str) -> Path:
+        return self.checkpoints_dir / f"{checkpoint_id}.json"
+
+    def _write_checkpoint(self, checkpoint_id: str, data: dict[str, Any]) -> None:
+        file_path = self._checkpoint_path(checkpoint_id)
+        tmp_path = file_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, indent=2)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, file_path)
+
+    def _read_checkpoint(self, checkpoint_id: str) -> dict[str, Any] | None:
+        file_path = self._checkpoint_path(checkpoint_id)
+        if not file_path.exists():
+            return None
+
+        with open(file_path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+
+    def _iter_checkpoints(
+        self, session_id: str | None = None
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        pattern = f"{session_id}_*.json" if session_id else "*.json"
+        for file_path in self.checkpoints_dir.glob(pattern):
+            try:
+                with open(file_path, "r", encoding="utf-8") as fp:
+                    data = json.load(fp)
+            except (OSError, ValueError):
+                continue
+            if session_id is None or data.get("session_id") == session_id:
+                yield file_path.stem, data
+
+    def _manifest(self, snapshot: SessionSnapshot) -> dict[str, Any]:
+        store = self.checkpoint_store
+        return {
+            "session_id": snapshot.session_id,
+            "created_at": datetime.now().isoformat(),
+            "snapshot": {
+                "created_at": snapshot.created_at.isoformat(),
+                "updated_at": snapshot.updated_at.isoformat(),
+                "turn_count": snapshot.turn_count,
+                "total_usage": snapshot.total_usage.__dict__,
+                "cwd": snapshot.cwd,
+            },
+            "blocks": {
+                "records": store.put_records(snapshot.message_records()),
+                "summaries": store.put_records(snapshot.summaries),
+                "turn_stats": store.put_records(snapshot.turn_stats),
+            },
+        }
+
+    def _from_manifest(self, data: dict[str, Any]) -> SessionSnapshot:
+        store = self.checkpoint_store
+        meta = data["snapshot"]
+        blocks = data["blocks"]
+        return SessionSnapshot(
+            session_id=data["session_id"],
+            created_at=datetime.fromisoformat(meta["created_at"]),
+            updated_at=datetime.fromisoformat(meta["updated_at"]),
+            turn_count=meta["turn_count"],
+            total_usage=TokenUsage(**meta["total_usage"]),
+            records=store.get_records(blocks["records"]),
+            summaries=store.get_records(blocks["summaries"]),
+            turn_stats=store.get_records(blocks["turn_stats"]),
+            cwd=meta.get("cwd"),
+        )
 
     def save_checkpoint(self, snapshot: SessionSnapshot) -> str:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         checkpoint_id = f"{snapshot.session_id}_{timestamp}"
-        file_path = self.checkpoints_dir / f"{checkpoint_id}.json"
+        self._write_checkpoint(checkpoint_id, self._manifest(snapshot))
+        return checkpoint_id
 
-        with open(file_path, "w", encoding="utf-8") as fp:
-            json.dump(snapshot.to_dict(), fp, indent=2)
-        os.chmod(file_path, 0o600)
+    def save_checkpoint_pointer(
+        self, session_id: str, generation: int, offset: int
+    ) -> str:
+        # A journaled checkpoint is only a position in the session's journal.
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        checkpoint_id = f"{session_id}_{timestamp}"
+        self._write_checkpoint(
+            checkpoint_id,
+            {
+                "session_id": session_id,
+                "journal": {"generation": generation, "offset": offset},
+                "created_at": datetime.now().isoformat(),
+            },
+        )
         return checkpoint_id
 
+    def checkpoint_generations(self, session_id: str) -> set[int]:
+        return {
+            data["journal"]["generation"]
+            for _, data in self._iter_checkpoints(session_id)
+            if "journal" in data
+        }
+
+    def materialize_checkpoints(self, session_id: str, keep_generation: int) -> int:
+        # Moves checkpoints out of journal generations that are about to be
+        # removed and into the block store, where unchanged blocks are shared.
+        count = 0
+        for checkpoint_id, data in self._iter_checkpoints(session_id):
+            journal = data.get("journal")
+            if not journal or journal["generation"] == keep_generation:
+                continue
+
+            snapshot = self._replay_journal(
+                session_id, journal["generation"], journal["offset"]
+            )
+            if snapshot is None:
+                continue
+            manifest = self._manifest(snapshot)
+            manifest["created_at"] = data.get("created_at", manifest["created_at"])
+            self._write_checkpoint(checkpoint_id, manifest)
+            count += 1
+
+        return count
+
     def load_checkpoint(self, checkpoint_id: str) -> SessionSnapshot | None:
-        file_path = self.checkpoints_dir / f"{checkpoint_id}.json"
+        data = self._read_checkpoint(checkpoint_id)
+        if data is None:
+            return None
 
+        if "journal" in data:
+            return self._replay_journal(
+                data["session_id"],
+                data["journal"]["generation"],
+                data["journal"]["offset"],
+            )
+        if "blocks" in data:
+            return self._from_manifest(data)
+
+        return SessionSnapshot.from_dict(data)
+
+    def delete_checkpoint(self, checkpoint_id: str) -> bool:
+        file_path = self._checkpoint_path(checkpoint_id)
         if not file_path.exists():
+            return False
+
+        file_path.unlink()
+        return True
+
+    def gc_checkpoints(self, grace_sec: float = 3600) -> GCResult:
+        referenced: set[str] = set()
+        for _, data in self._iter_checkpoints():
+            for keys in data.get("blocks", {}).values():
+                referenced.update(keys)
+
+        return self.checkpoint_store.gc(referenced, grace_sec=grace_sec)
+
+    def referenced_blobs(self, session_id: str | None = None) -> set[str]:
+        # All blobs on disk refer to, or only those of one session.
+        referenced: set[str] = set()
+        if session_id is None:
+            files = chain(
+                self.sessions_dir.glob("*.json"),
+                self.journals_dir.glob("*/*.jsonl"),
+                self.checkpoints_dir.glob("*.json"),
+            )
+        else:
+            files = chain(
+                self.sessions_dir.glob(f"{session_id}.json"),
+                self.journals_dir.glob(f"{session_id}/*.jsonl"),
+                self.checkpoints_dir.glob(f"{session_id}_*.json"),
+            )
+        for path in files:
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as fp:
+                    for line in fp:
+                        referenced.update(BLOB_KEY.findall(line))
+            except OSError:
+                continue
+
+        for checkpoint_id, data in self._iter_checkpoints(session_id):
+            if "blocks" not in data:
+                continue
+            try:
+                records = self.checkpoint_store.get_records(data["blocks"]["records"])
+            except Exception as e:
+                logger.warning(f"Skipping unreadable checkpoint {checkpoint_id}: {e}")
+                continue
+            for record in records:
+                referenced.update(BLOB_KEY.findall(json.dumps(record)))
+
+        return referenced
+
+    def gc_blobs(
+        self, live: set[str] | None = None, grace_sec: float = 3600
+    ) -> GCResult:
+        # Scans everything persisted; ``live`` are keys still held in memory.
+        referenced = self.referenced_blobs() | (live or set())
+        removed, freed = self.blob_store.gc(referenced, grace_sec)
+        return GCResult(blocks_removed=removed, bytes_freed=freed)
+
+    def release_blobs(self, session_id: str, released: dict[str, int]) -> GCResult:
+        # Only the closing session's own files are read, so this is cheap.
+        referenced = self.referenced_blobs(session_id)
+        removed, freed = self.blob_store.release(released, referenced)
+        return GCResult(blocks_removed=removed, bytes_freed=freed)
+
+    def export_checkpoint(self, checkpoint_id: str, path: Path) -> Path | None:
+        # Self-contained copy: no journal, block or blob references.
+        snapshot = self.load_checkpoint(checkpoint_id)
+        if snapshot is None:
             return None
 
-        with open(file_path, "r", encoding="utf-8") as fp:
-            data = json.load(fp)
+        blob_store = self.blob_store
+        records = []
+        for record in snapshot.message_records():
+            if "blob" in record:
+                record = dict(record)
+                record["content"] = blob_store.get(record.pop("blob"))
+            records.append(record)
+        snapshot.records = records
 
-        return SessionSnapshot.from_dict(data)
+        data = json.dumps(snapshot.to_dict()).encode("utf-8")
+        if path.suffix == ".gz":
+            data = gzip.compress(data)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        os.chmod(path, 0o600)
+        return path
+
+    def load_checkpoint_file(self, path: Path) -> SessionSnapshot:
+        data = path.read_bytes()
+        if path.suffix == ".gz":
+            data = gzip.decompress(data)
+
+        return SessionSnapshot.from_dict(json.loads(data))
@@ -1,24 +1,47 @@
+import asyncio
 from datetime import datetime
 import json
+from pathlib import Path
 from typing import Any
 import uuid
-from client.llm_client import LLMClient
-from config.config import Config
+from agent.catalog import SessionEntry
+from agent.journal import JournalState, SessionJournal
+from agent.persistence import PersistenceManager, SessionSnapshot
+from agent.turn_stats import TurnStatsRecorder
+from client.llm_client import LLMClient, create_routed_client
+from config.config import Config, ProfileScope, SubagentIsolation
 from config.loader import get_data_dir
 from context.compaction import ChatCompactor
 from context.loop_detector import LoopDetector
 from context.manager import ContextManager
 from hooks.hook_system import HookSystem
 from safety.approval import ApprovalManager
+from telemetry.profiler import SamplingProfiler
+from telemetry.runtime import start_telemetry, stop_telemetry
 from tools.discovery import ToolDiscoveryManager
 from tools.mcp.mcp_manager import MCPManager
 from tools.registry import create_default_registry
+from tools.subagent_worker import shutdown_worker_pool
+from utils.loop_lag import LoopLagMonitor
 
 
 class Session:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, subagent: bool = False):
         self.config = config
-        self.client = LLMClient(config=config)
+        self.subagent = subagent
+        models = config.models
+        fallback = (
+            LLMClient(config=config, route=models.fallback)
+            if models.fallback and models.fallback_to_main
+            else None
+        )
+        self.client = LLMClient(config=config, route=models.main, fallback=fallback)
+        self.compaction_client = create_routed_client(
+            config, models.compaction, self.client
+        )
+        self.loop_breaker_client = create_routed_client(
+            config, models.loop_breaker, self.client
+        )
         self.tool_registry = create_default_registry(config)
         self.context_manager: ContextManager | None = None
         self.discovery_manager = ToolDiscoveryManager(
@@ -26,13 +49,25 @@ class Session:
             self.tool_registry,
         )
         self.mcp_manager = MCPManager(self.config)
-        self.chat_compactor = ChatCompactor(self.client)
+        self.chat_compactor = ChatCompactor(self.compaction_client)
         self.approval_manager = ApprovalManager(
             self.config.approval,
             self.config.cwd,
         )
         self.loop_detector = LoopDetector()
+        self.turn_stats = TurnStatsRecorder()
         self.hook_system = HookSystem(config)
+        self.loop_lag_monitor: LoopLagMonitor | None = None
+        if self.config.tool_execution.monitor_loop_lag:
+            self.loop_lag_monitor = LoopLagMonitor(
+                interval=self.config.tool_execution.loop_lag_interval_sec,
+                warn_threshold_ms=self.config.tool_execution.loop_lag_warn_ms,
+            )
+        self.profiler: SamplingProfiler | None = None
+        self.journal: SessionJournal | None = None
+        self._journaled_turns = 0
+        self._persistence: PersistenceManager | None = None
+        self.first_message: str | None = None
         self.session_id = str(uuid.uuid4())
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
@@ -40,6 +75,16 @@ class Session:
         self.turn_count = 0
 
     async def initialize(self) -> None:
+        if self.config.telemetry.enabled:
+            await start_telemetry(self.config.telemetry)
+
+        if self.loop_lag_monitor:
+            self.loop_lag_monitor.start()
+
+        profiling = self.config.profiling
+        if profiling.enabled and profiling.scope == ProfileScope.SESSION:
+            self.start_profiler()
+
         await self.mcp_manager.initialize()
         self.mcp_manager.register_tools(self.tool_registry)
 
@@ -50,6 +95,8 @@ class Session:
             tools=self.tool_registry.get_tools(),
         )
 
+        self.start_journal()
+
     def _load_memory(self) -> str | None:
         data_dir = get_data_dir()
         data_dir.mkdir(parents=True, exist_ok=True)
@@ -79,13 +126,247 @@ class Session:
 
         return self.turn_count
 
+    @property
+    def profiling(self) -> bool:
+        return self.profiler is not None and self.profiler.running
+
+    def start_profiler(self, label: str | None = None) -> bool:
+        if self.profiling:
+            return False
+
+        self.profiler = SamplingProfiler(
+            output_dir=get_data_dir() / "profiles",
+            interval=self.config.profiling.interval_ms / 1000,
+            all_threads=self.config.profiling.all_threads,
+            label=label or self.session_id,
+        )
+        self.profiler.start()
+        return True
+
+    def stop_profiler(self) -> Path | None:
+        if self.profiler is None:
+            return None
+
+        return self.profiler.stop()
+
+    def start_journal(self) -> None:
+        persistence = self.config.persistence
+        if not persistence.journal or self.journal is not None or self.subagent:
+            return
+
+        messages, summaries = self.context_manager.to_records()
+        self.journal = SessionJournal(
+            get_data_dir() / "journals",
+            self.session_id,
+            fsync_interval=persistence.fsync_interval_sec,
+        )
+        self.journal.open(
+            JournalState(
+                session_id=self.session_id,
+                created_at=self.created_at,
+                updated_at=self.updated_at,
+                turn_count=self.turn_count,
+                total_usage=self.context_manager.total_usage.__dict__,
+                messages=messages,
+                summaries=summaries,
+                turn_stats=self.turn_stats.to_list(),
+            )
+        )
+        self._journaled_turns = self.turn_stats.finished_total
+        self.context_manager.add_listener(self._on_context_change)
+
+    @property
+    def persistence_manager(self) -> PersistenceManager:
+        if self._persistence is None:
+            self._persistence = PersistenceManager(self.config.persistence)
+        return self._persistence
+
+    @property
+    def catalogued(self) -> bool:
+        # Sub-agents and sessions that never finished a turn are not listed.
+        return not self.subagent and self.turn_count > 0
+
+    def catalog_entry(self) -> SessionEntry:
+        usage = self.context_manager.total_usage
+        return SessionEntry(
+            session_id=self.session_id,
+            created_at=self.created_at.isoformat(),
+            updated_at=self.updated_at.isoformat(),
+            turn_count=self.turn_count,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            total_tokens=usage.total_tokens,
+            cwd=str(self.config.cwd),
+            first_message=self.first_message,
+        )
+
+    def _on_context_change(self, op: str, payload: dict[str, Any]) -> None:
+        self.journal.append(op, **payload)
+
+    async def save(self, force_sync: bool = False) -> int:
+        if self.journal is None:
+            return 0
+
+        self.journal.append(
+            "turn",
+            turn_count=self.turn_count,
+            updated_at=self.updated_at.isoformat(),
+            turn_stats=self.turn_stats.since(self._journaled_turns),
+        )
+        self._journaled_turns = self.turn_stats.finished_total
+        offset = await asyncio.to_thread(
+            self._commit_journal,
+            force_sync,
+            self.catalog_entry() if self.catalogued else None,
+        )
+
+        persistence = self.config.persistence
+        if self.journal.needs_compaction(
+            persistence.compact_min_records, persistence.compact_ratio
+        ):
+            await asyncio.to_thread(self._compact_journal)
+            offset = self.journal.offset
+
+        return offset
+
+    def _commit_journal(self, force_sync: bool, entry: SessionEntry | None) -> int:
+        offset = self.journal.commit(force_sync)
+        if entry is not None:
+            self.persistence_manager.catalog.upsert(entry)
+        return offset
+
+    def _compact_journal(self) -> None:
+        self.journal.compact()
+        # Checkpoints into older generations move to the block store first;
+        # anything that could not be moved keeps its generation.
+        persistence_manager = self.persistence_manager
+        persistence_manager.materialize_checkpoints(
+            self.session_id, self.journal.generation
+        )
+        self.journal.remove_generations(
+            persistence_manager.checkpoint_generations(self.session_id)
+        )
+
+    async def checkpoint(self) -> str | None:
+        if self.journal is None:
+            return None
+
+        offset = await self.save(force_sync=True)
+        return self.persistence_manager.save_checkpoint_pointer(
+            self.session_id, self.journal.generation, offset
+        )
+
+    def snapshot(self) -> SessionSnapshot:
+        records, summaries = self.context_manager.to_records()
+        return SessionSnapshot(
+            session_id=self.session_id,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            turn_count=self.turn_count,
+            total_usage=self.context_manager.total_usage,
+            records=records,
+            summaries=summaries,
+            turn_stats=self.turn_stats.to_list(),
+            cwd=str(self.config.cwd),
+        )
+
+    async def restore(self, snapshot: SessionSnapshot) -> None:
+        # Swaps the conversation state in place; the LLM client, MCP
+        # connections and tool registry stay as they are.
+        await self.chat_compactor.cancel_background()
+        await self._close_journal()
+
+        self.session_id = snapshot.session_id
+        self.created_at = snapshot.created_at
+        self.updated_at = snapshot.updated_at
+        self.turn_count = snapshot.turn_count
+        self.first_message = None
+        self.turn_stats.load(snapshot.turn_stats)
+        self.loop_detector.clear()
+        self.context_manager.restore(
+            snapshot.message_records(),
+            snapshot.summaries,
+            total_usage=snapshot.total_usage,
+        )
+
+        self.start_journal()
+
+    async def _close_journal(self) -> None:
+        if self.journal is None:
+            return
+
+        await self.save(force_sync=True)
+        self.context_manager.remove_listener(self._on_context_change)
+        if self.catalogued:
+            self.journal.close()
+        else:
+            await asyncio.to_thread(self._discard_journal, self.journal)
+        self.journal = None
+
+    def _discard_journal(self, journal: SessionJournal) -> None:
+        # Nothing to resume, unless a checkpoint points into this generation.
+        generations = self.persistence_manager.checkpoint_generations(self.session_id)
+        if journal.generation in generations:
+            journal.close()
+        else:
+            journal.discard()
+
+    async def _release_blobs(self) -> None:
+        # Bodies this session spilled go unless its own journal, snapshot or
+        # checkpoints still refer to them; stale blobs of other sessions are
+        # left to /checkpoint gc.
+        if self.context_manager is None:
+            return
+
+        written = self.context_manager.written_blobs
+        if written:
+            await asyncio.to_thread(
+                self.persistence_manager.release_blobs, self.session_id, written
+            )
+
+    async def close(self) -> None:
+        self.stop_profiler()
+        await self.chat_compactor.cancel_background()
+
+        await self._close_journal()
+        await self._release_blobs()
+
+        if self.loop_lag_monitor:
+            await self.loop_lag_monitor.stop()
+
+        for client in (
+            self.client,
+            self.client.fallback,
+            self.compaction_client,
+            self.loop_breaker_client,
+        ):
+            if client is not None:
+                await client.close()
+        await self.mcp_manager.shutdown()
+        await self.hook_system.close()
+        self.tool_registry.executor.shutdown()
+        if self.config.subagents.isolation == SubagentIsolation.PROCESS:
+            # Children run inline inside workers, so only the parent gets here.
+            await shutdown_worker_pool()
+
+        if self.config.telemetry.enabled:
+            await stop_telemetry()
+
     def get_stats(self) -> dict[str, Any]:
-        return {
+        stats = {
             "session_id": self.session_id,
             "created_at": self.created_at.isoformat(),
             "turn_count": self.turn_count,
             "message_count": self.context_manager.message_count,
             "token_usage": self.context_manager.total_usage,
+            "context_tokens": self.context_manager.ledger.to_dict(),
+            "dedup_saved_tokens": self.context_manager.dedup_saved_tokens,
             "tools_count": len(self.tool_registry.get_tools()),
             "mcp_servers": len(self.tool_registry.connected_mcp_servers),
+            "latency": self.turn_stats.summary(),
         }
+
+        if self.loop_lag_monitor:
+            stats["loop_lag"] = self.loop_lag_monitor.get_stats()
+
+        return stats
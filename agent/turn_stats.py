@@ -0,0 +1,264 @@
+from __future__ import annotations
+import csv
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+import time
+from typing import Any
+
+from client.response import TokenUsage
+
+CSV_COLUMNS = [
+    "turn",
+    "started_at",
+    "total_ms",
+    "ttft_ms",
+    "generation_ms",
+    "tool_ms",
+    "approval_wait_ms",
+    "hook_ms",
+    "compaction_ms",
+    "tool_calls",
+    "tools",
+    "prompt_tokens",
+    "completion_tokens",
+    "cached_tokens",
+    "output_tokens_per_sec",
+]
+
+
+@dataclass
+class ToolTiming:
+    name: str
+    execution_ms: float
+    approval_wait_ms: float = 0.0
+    hook_ms: float = 0.0
+    success: bool = True
+
+
+@dataclass
+class TurnRecord:
+    turn: int
+    started_at: datetime = field(default_factory=datetime.now)
+    total_ms: float = 0.0
+    ttft_ms: float | None = None
+    generation_ms: float = 0.0
+    compaction_ms: float = 0.0
+    hook_ms: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    tools: list[ToolTiming] = field(default_factory=list)
+
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def tool_ms(self) -> float:
+        return sum(t.execution_ms for t in self.tools)
+
+    @property
+    def approval_wait_ms(self) -> float:
+        return sum(t.approval_wait_ms for t in self.tools)
+
+    @property
+    def output_tokens_per_sec(self) -> float | None:
+        if not self.completion_tokens or self.generation_ms <= 0:
+            return None
+
+        return self.completion_tokens / (self.generation_ms / 1000)
+
+    def add_usage(self, usage: TokenUsage) -> None:
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        self.cached_tokens += usage.cached_tokens
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "turn": self.turn,
+            "started_at": self.started_at.isoformat(),
+            "total_ms": self.total_ms,
+            "ttft_ms": self.ttft_ms,
+            "generation_ms": self.generation_ms,
+            "compaction_ms": self.compaction_ms,
+            "hook_ms": self.hook_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "tools": [asdict(t) for t in self.tools],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TurnRecord:
+        return cls(
+            turn=data["turn"],
+            started_at=datetime.fromisoformat(data["started_at"]),
+            total_ms=data.get("total_ms", 0.0),
+            ttft_ms=data.get("ttft_ms"),
+            generation_ms=data.get("generation_ms", 0.0),
+            compaction_ms=data.get("compaction_ms", 0.0),
+            hook_ms=data.get("hook_ms", 0.0),
+            prompt_tokens=data.get("prompt_tokens", 0),
+            completion_tokens=data.get("completion_tokens", 0),
+            cached_tokens=data.get("cached_tokens", 0),
+            tools=[ToolTiming(**t) for t in data.get("tools", [])],
+        )
+
+    def to_csv_row(self) -> dict[str, Any]:
+        throughput = self.output_tokens_per_sec
+        return {
+            "turn": self.turn,
+            "started_at": self.started_at.isoformat(),
+            "total_ms": round(self.total_ms, 3),
+            "ttft_ms": round(self.ttft_ms, 3) if self.ttft_ms is not None else "",
+            "generation_ms": round(self.generation_ms, 3),
+            "tool_ms": round(self.tool_ms, 3),
+            "approval_wait_ms": round(self.approval_wait_ms, 3),
+            "hook_ms": round(self.hook_ms, 3),
+            "compaction_ms": round(self.compaction_ms, 3),
+            "tool_calls": len(self.tools),
+            "tools": ";".join(t.name for t in self.tools),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "output_tokens_per_sec": (
+                round(throughput, 2) if throughput is not None else ""
+            ),
+        }
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _distribution(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+
+    return {
+        "p50": round(_percentile(values, 50), 2),
+        "p90": round(_percentile(values, 90), 2),
+        "p99": round(_percentile(values, 99), 2),
+        "max": round(max(values), 2),
+    }
+
+
+class TurnStatsRecorder:
+    def __init__(self, max_records: int = 5000) -> None:
+        self.max_records = max_records
+        self.records: list[TurnRecord] = []
+        self.finished_total = 0
+        self._current: TurnRecord | None = None
+        self._pending_hook_ms = 0.0
+
+    @property
+    def current(self) -> TurnRecord | None:
+        return self._current
+
+    def start_turn(self, turn: int) -> TurnRecord:
+        self.finish_turn()
+        self._current = TurnRecord(turn=turn)
+        if self._pending_hook_ms:
+            self._current.hook_ms += self._pending_hook_ms
+            self._current._started -= self._pending_hook_ms / 1000
+            self._pending_hook_ms = 0.0
+        return self._current
+
+    def add_hook_before_turn(self, hook_ms: float) -> None:
+        # before_agent hooks run before the first turn starts; it is charged
+        # with them.
+        self._pending_hook_ms += hook_ms
+
+    def add_hook_after_turn(self, hook_ms: float) -> None:
+        # after_agent hooks run once the last turn has finished.
+        record = self._current or (self.records[-1] if self.records else None)
+        if record is None:
+            return
+
+        record.hook_ms += hook_ms
+        if record is not self._current:
+            record.total_ms += hook_ms
+
+    def finish_turn(self) -> None:
+        record = self._current
+        if record is None:
+            return
+
+        record.total_ms = (time.perf_counter() - record._started) * 1000
+        self.records.append(record)
+        self.finished_total += 1
+        if len(self.records) > self.max_records:
+            del self.records[: len(self.records) - self.max_records]
+
+        self._current = None
+
+    def summary(self) -> dict[str, Any]:
+        records = self.records
+        if not records:
+            return {"turns": 0}
+
+        tool_calls = [t for r in records for t in r.tools]
+        per_tool: dict[str, list[float]] = {}
+        for timing in tool_calls:
+            per_tool.setdefault(timing.name, []).append(timing.execution_ms)
+
+        summary: dict[str, Any] = {
+            "turns": len(records),
+            "turn_ms": _distribution([r.total_ms for r in records]),
+            "ttft_ms": _distribution(
+                [r.ttft_ms for r in records if r.ttft_ms is not None]
+            ),
+            "generation_ms": _distribution([r.generation_ms for r in records]),
+            "tool_ms": _distribution([t.execution_ms for t in tool_calls]),
+            "approval_wait_ms": _distribution(
+                [t.approval_wait_ms for t in tool_calls if t.approval_wait_ms]
+            ),
+            "hook_ms": _distribution([r.hook_ms for r in records if r.hook_ms]),
+            "compaction_ms": _distribution(
+                [r.compaction_ms for r in records if r.compaction_ms]
+            ),
+            "output_tokens_per_sec": _distribution(
+                [
+                    r.output_tokens_per_sec
+                    for r in records
+                    if r.output_tokens_per_sec is not None
+                ]
+            ),
+            "tokens": {
+                "prompt": sum(r.prompt_tokens for r in records),
+                "completion": sum(r.completion_tokens for r in records),
+                "cached": sum(r.cached_tokens for r in records),
+            },
+            "tools": {
+                name: {"calls": len(values), **_distribution(values)}
+                for name, values in sorted(per_tool.items())
+            },
+        }
+
+        return {k: v for k, v in summary.items() if v is not None}
+
+    def to_list(self) -> list[dict[str, Any]]:
+        return [r.to_dict() for r in self.records]
+
+    def since(self, finished_total: int) -> list[dict[str, Any]]:
+        count = min(self.finished_total - finished_total, len(self.records))
+        if count <= 0:
+            return []
+
+        return [r.to_dict() for r in self.records[-count:]]
+
+    def load(self, data: list[dict[str, Any]]) -> None:
+        self.records = [TurnRecord.from_dict(item) for item in data]
+        self.finished_total = len(self.records)
+        self._current = None
+
+    def export_csv(self, path: Path) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            for record in self.records:
+                writer.writerow(record.to_csv_row())
+
+        return len(self.records)
@@ -0,0 +1,90 @@
+"""Per-tool-call cost of before_tool / after_tool hooks.
+
+Usage:
+    python benchmarks/hook_overhead.py [--calls 200] [--hooks 2]
+
+Configures ``--hooks`` before_tool and as many after_tool hooks, each a
+small script that appends the tool name to a log file, and fires both
+triggers ``--calls`` times two ways:
+
+- oneshot: a new shell per hook per trigger (the default mode)
+- persistent: one long-running worker per hook, fed JSON lines on stdin
+
+and reports the mean time per tool call and the number of events logged.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.config import Config, HookConfig, HookMode, HookTrigger  # noqa: E402
+from hooks.hook_system import HookSystem  # noqa: E402
+from tools.base import ToolResult  # noqa: E402
+
+ONESHOT_SCRIPT = 'echo "$AI_AGENT_TOOL_NAME" >> "{log}"\n'
+
+PERSISTENT_SCRIPT = """while IFS= read -r event; do
+  echo "$event" >> "{log}"
+  echo ok
+done
+"""
+
+
+def make_config(cwd: Path, log: Path, mode: HookMode, hooks: int) -> Config:
+    script = ONESHOT_SCRIPT if mode == HookMode.ONESHOT else PERSISTENT_SCRIPT
+    return Config(
+        cwd=cwd,
+        hooks_enabled=True,
+        hooks=[
+            HookConfig(
+                name=f"{trigger.value}-{i}",
+                trigger=trigger,
+                script=script.format(log=log),
+                mode=mode,
+            )
+            for trigger in (HookTrigger.BEFORE_TOOL, HookTrigger.AFTER_TOOL)
+            for i in range(hooks)
+        ],
+    )
+
+
+async def run(mode: HookMode, calls: int, hooks: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        log = cwd / "events.log"
+        hook_system = HookSystem(make_config(cwd, log, mode, hooks))
+        params = {"path": "a.py"}
+        result = ToolResult.success_result("1|def foo():")
+
+        started = time.perf_counter()
+        for _ in range(calls):
+            await hook_system.trigger_before_tool("read_file", params)
+            await hook_system.trigger_after_tool("read_file", params, result)
+        elapsed = time.perf_counter() - started
+        await hook_system.close()
+
+        events = len(log.read_text().splitlines()) if log.exists() else 0
+        print(
+            f"{mode.value:10} {calls} calls x {2 * hooks} hooks: "
+            f"{elapsed / calls * 1000:7.2f} ms/call, {events} events logged"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--hooks", type=int, default=2)
+    args = parser.parse_args()
+
+    for mode in (HookMode.ONESHOT, HookMode.PERSISTENT):
+        asyncio.run(run(mode, args.calls, args.hooks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Concurrent sessions against one streamable-HTTP MCP server.
+
+Usage:
+    python benchmarks/mcp_http_sessions.py [--sessions 20] [--calls 10]
+    python benchmarks/mcp_http_sessions.py --serve 8765
+
+Starts a local stand-in MCP server that answers with JSON responses
+(``--serve`` runs only the server, e.g. to point a config at) and opens ``--sessions`` MCP sessions against it, each making ``--calls`` tool
+calls, two ways:
+
+- pooled: MCPClient with ``transport = "http"``; sessions share one httpx
+  client and its keep-alive connections
+- unpooled: one fastmcp StreamableHttpTransport (and httpx client) per session
+
+and reports wall time and the number of TCP connections the server accepted.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+from pathlib import Path
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.config import MCPServerConfig, MCPTransportKind  # noqa: E402
+from fastmcp import Client, FastMCP  # noqa: E402
+from fastmcp.client.transports import StreamableHttpTransport  # noqa: E402
+from tools.mcp.client import MCPClient  # noqa: E402
+import uvicorn  # noqa: E402
+
+
+def serve(port: int) -> None:
+    peers: set[tuple[str, int]] = set()
+    mcp = FastMCP("stand-in")
+
+    @mcp.tool()
+    async def echo(text: str, delay_ms: int = 5) -> str:
+        """Echo the text back after a short delay."""
+        await asyncio.sleep(delay_ms / 1000)
+        return text
+
+    @mcp.tool()
+    def connections() -> int:
+        """Number of distinct TCP connections accepted so far."""
+        return len(peers)
+
+    class CountConnections:
+        def __init__(self, app) -> None:
+            self.app = app
+
+        async def __call__(self, scope, receive, send) -> None:
+            if scope["type"] == "http" and scope.get("client"):
+                peers.add(tuple(scope["client"]))
+            await self.app(scope, receive, send)
+
+    app = CountConnections(mcp.http_app(path="/mcp", json_response=True))
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(url: str, timeout: float = 15) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with Client(StreamableHttpTransport(url)) as client:
+                await client.ping()
+                return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def connection_count(url: str) -> int:
+    async with Client(StreamableHttpTransport(url)) as client:
+        result = await client.call_tool("connections", {})
+        return int(result.content[0].text)
+
+
+async def run_pooled(url: str, sessions: int, calls: int) -> None:
+    config = MCPServerConfig(
+        url=url, transport=MCPTransportKind.HTTP, heartbeat_interval_sec=None
+    )
+
+    async def session(index: int) -> None:
+        client = MCPClient(f"s{index}", config, Path.cwd())
+        await client.connect()
+        for call in range(calls):
+            await client.call_tool("echo", {"text": f"{index}:{call}"})
+        await client.disconnect()
+
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+
+
+async def run_unpooled(url: str, sessions: int, calls: int) -> None:
+    async def session(index: int) -> None:
+        async with Client(StreamableHttpTransport(url)) as client:
+            for call in range(calls):
+                await client.call_tool("echo", {"text": f"{index}:{call}"})
+
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+
+
+async def bench(args: argparse.Namespace) -> None:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/mcp"
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_for_server(url)
+        for label, run in (("unpooled", run_unpooled), ("pooled", run_pooled)):
+            before = await connection_count(url)
+            started = time.perf_counter()
+            await run(url, args.sessions, args.calls)
+            elapsed = time.perf_counter() - started
+            # The count includes the probe's own connection.
+            opened = await connection_count(url) - before - 1
+            print(
+                f"{label:9} {args.sessions} sessions x {args.calls} calls: "
+                f"{elapsed:6.2f}s, {opened} connections"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--serve", type=int, metavar="PORT")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+    else:
+        asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Memory footprint of the context message store for long sessions.
+
+Usage:
+    python benchmarks/message_store_memory.py [--messages 10000] [--large-every 25]
+
+Builds a synthetic session (user / assistant tool call / tool result rounds,
+with a large tool output every ``--large-every`` rounds) three ways and
+reports the traced heap size:
+
+- legacy: the previous plain-dataclass MessageItem
+- slotted: the current MessageItem with blob spilling disabled
+- spilled: the current MessageItem with large outputs in the blob store
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime
+import gc
+from pathlib import Path
+import sys
+import tempfile
+import tracemalloc
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from context.blob_store import BlobStore  # noqa: E402
+from context.manager import MessageItem  # noqa: E402
+
+SMALL_OUTPUT = "\n".join(
+    f"{i:6}|    value_{i} = compute(value_{i - 1})" for i in range(60)
+)
+LARGE_OUTPUT_LINES = 2000
+SPILL_THRESHOLD = 32_768
+
+
+@dataclass
+class LegacyMessageItem:
+    role: str
+    content: str
+    tool_call_id: str | None = None
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    token_count: int | None = None
+    pruned_at: datetime | None = None
+
+
+def _large_output(n: int) -> str:
+    return "\n".join(
+        f"{i:6}|    line {i} of generated file {n}" for i in range(LARGE_OUTPUT_LINES)
+    )
+
+
+def _session(messages: int, large_every: int):
+    rounds = messages // 3
+    for n in range(rounds):
+        call_id = f"call_{n}"
+        # Roles come from JSON / API responses in practice, i.e. fresh strings.
+        yield "".join(["u", "ser"]), f"step {n}: keep going", None, None
+        yield "".join(["assis", "tant"]), "", None, [
+            {
+                "id": call_id,
+                "type": "function",
+                "function": {
+                    "name": "read_file",
+                    "arguments": f"{{'path': 'f{n}.py'}}",
+                },
+            }
+        ]
+        output = _large_output(n) if n % large_every == 0 else SMALL_OUTPUT + str(n)
+        yield "".join(["to", "ol"]), output, call_id, None
+
+
+def _measure(build: Callable[[], list]) -> tuple[int, list]:
+    gc.collect()
+    tracemalloc.start()
+    items = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--large-every", type=int, default=25)
+    args = parser.parse_args()
+
+    def legacy() -> list:
+        return [
+            LegacyMessageItem(
+                role=role,
+                content=content,
+                tool_call_id=call_id,
+                tool_calls=tool_calls or [],
+                token_count=len(content) // 4,
+            )
+            for role, content, call_id, tool_calls in _session(
+                args.messages, args.large_every
+            )
+        ]
+
+    def slotted(store: BlobStore | None = None) -> list:
+        items = []
+        for role, content, call_id, tool_calls in _session(
+            args.messages, args.large_every
+        ):
+            item = MessageItem(
+                role=role,
+                content=content,
+                tool_call_id=call_id,
+                tool_calls=tool_calls,
+                token_count=len(content) // 4,
+            )
+            if store is not None and len(content) >= SPILL_THRESHOLD:
+                item.spill(store)
+            items.append(item)
+        return items
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BlobStore(Path(tmp), cache_size=8)
+        results = [
+            ("legacy", *_measure(legacy)),
+            ("slotted", *_measure(slotted)),
+            ("spilled", *_measure(lambda: slotted(store))),
+        ]
+
+        baseline = results[0][1]
+        print(f"{args.messages} messages, large output every {args.large_every} rounds")
+        for name, size, items in results:
+            print(
+                f"  {name:<8} {size / 1024 / 1024:8.2f} MiB "
+                f"{size / len(items):9.0f} B/msg  {size / baseline:6.1%} of legacy"
+            )
+
+        # Rendering reads spilled bodies back through the LRU cache.
+        spilled_items = results[2][2]
+        assert [m.content for m in spilled_items] == [m.content for m in results[0][2]]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+from __future__ import annotations
 import asyncio
+import contextlib
+import logging
+import os
+import time
 from typing import Any, AsyncGenerator
 from openai import APIConnectionError, APIError, AsyncOpenAI, RateLimitError
 
@@ -11,20 +16,48 @@ from client.response import (
     ToolCallDelta,
     parse_tool_call_arguments,
 )
-from config.config import Config
+from config.config import Config, ModelRoute
+from telemetry import current_span, get_metrics, traced
+
+logger = logging.getLogger(__name__)
 
 
 class LLMClient:
-    def __init__(self, config: Config) -> None:
+    def __init__(
+        self,
+        config: Config,
+        route: ModelRoute | None = None,
+        fallback: LLMClient | None = None,
+    ) -> None:
         self._client: AsyncOpenAI | None = None
-        self._max_retries: int = 3
         self.config = config
+        self.route = route or ModelRoute()
+        # Used when a call on this route fails before anything was streamed.
+        self.fallback = fallback
+        self._max_retries: int = (
+            3 if self.route.max_retries is None else self.route.max_retries
+        )
+
+    @property
+    def model_name(self) -> str:
+        # Unrouted clients follow the main model, which /model can change.
+        return self.route.name or self.config.model_name
 
     def get_client(self) -> AsyncOpenAI:
         if self._client is None:
+            api_key = (
+                os.environ.get(self.route.api_key_env)
+                if self.route.api_key_env
+                else self.config.api_key
+            )
+            base_url = self.route.base_url or self.config.base_url
+            kwargs: dict[str, Any] = {}
+            if self.route.timeout_sec is not None:
+                kwargs["timeout"] = self.route.timeout_sec
             self._client = AsyncOpenAI(
-                api_key=self.config.api_key,  # "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"
-                base_url=self.config.base_url,  # "https://openrouter.ai/api/v1"
+                api_key=api_key,  # "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"
+                base_url=base_url,  # "https://openrouter.ai/api/v1"
+                **kwargs,
             )
         return self._client
 
@@ -57,20 +90,59 @@ class LLMClient:
         messages: list[dict[str, Any]],
         tools: list[dict[str, Any]] | None = None,
         stream: bool = True,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        failure: StreamEvent | None = None
+        started = False
+        async with contextlib.aclosing(
+            self._chat_completion(messages, tools, stream)
+        ) as events:
+            async for event in events:
+                if (
+                    event.type == StreamEventType.ERROR
+                    and not started
+                    and self.fallback is not None
+                ):
+                    failure = event
+                    break
+                started = True
+                yield event
+
+        if failure is None:
+            return
+
+        logger.warning(
+            f"{self.model_name} failed ({failure.error}), "
+            f"falling back to {self.fallback.model_name}"
+        )
+        get_metrics().increment("llm_fallbacks_total", model=self.model_name)
+        async for event in self.fallback.chat_completion(messages, tools, stream):
+            yield event
+
+    @traced("llm.chat_completion")
+    async def _chat_completion(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        stream: bool = True,
     ) -> AsyncGenerator[StreamEvent, None]:
         client = self.get_client()
+        current_span().set_attribute("model", self.model_name)
+        current_span().set_attribute("stream", stream)
 
         kwargs = {
-            "model": self.config.model_name,
+            "model": self.model_name,
             "messages": messages,
             "stream": stream,
         }
+        if self.route.max_tokens is not None:
+            kwargs["max_tokens"] = self.route.max_tokens
 
         if tools:
             kwargs["tools"] = self._build_tools(tools)
             kwargs["tool_choice"] = "auto"
 
         for attempt in range(self._max_retries + 1):
+            current_span().set_attribute("attempt", attempt)
             try:
                 if stream:
                     async for event in self._stream_response(client, kwargs):
@@ -111,13 +183,25 @@ class LLMClient:
         client: AsyncOpenAI,
         kwargs: dict[str, Any],
     ) -> AsyncGenerator[StreamEvent, None]:
+        started = time.perf_counter()
         response = await client.chat.completions.create(**kwargs)
 
         finish_reason: str | None = None
         usage: TokenUsage | None = None
         tool_calls: dict[int, dict[str, Any]] = {}
+        first_token_seen = False
 
         async for chunk in response:
+            if not first_token_seen and chunk.choices:
+                first_token_seen = True
+                ttft = time.perf_counter() - started
+                current_span().set_attribute("ttft_ms", round(ttft * 1000, 3))
+                get_metrics().observe(
+                    "llm_time_to_first_token_seconds",
+                    ttft,
+                    model=self.model_name,
+                )
+
             if hasattr(chunk, "usage") and chunk.usage:
                 usage = TokenUsage(
                     prompt_tokens=chunk.usage.prompt_tokens,
@@ -187,6 +271,10 @@ class LLMClient:
                 ),
             )
 
+        if usage:
+            current_span().set_attribute("prompt_tokens", usage.prompt_tokens)
+            current_span().set_attribute("completion_tokens", usage.completion_tokens)
+
         yield StreamEvent(
             type=StreamEventType.MESSAGE_COMPLETE,
             finish_reason=finish_reason,
@@ -232,3 +320,16 @@ class LLMClient:
             finish_reason=choice.finish_reason,
             usage=usage,
         )
+
+
+def create_routed_client(
+    config: Config, route: ModelRoute | None, main: LLMClient
+) -> LLMClient:
+    # Auxiliary roles without a route share the main client.
+    if route is None:
+        return main
+    return LLMClient(
+        config,
+        route=route,
+        fallback=main if config.models.fallback_to_main else None,
+    )
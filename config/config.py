@@ -12,6 +12,31 @@ class ModelConfig(BaseModel):
     context_window: int = 256_000
 
 
+class ModelRoute(BaseModel):
+    # Unset fields fall back to the main model and the BASE_URL / API_KEY
+    # environment.
+    name: str | None = None
+    base_url: str | None = None
+    api_key_env: str | None = None
+    max_tokens: int | None = Field(default=None, ge=1)
+    timeout_sec: float | None = Field(default=None, gt=0)
+    max_retries: int | None = Field(default=None, ge=0)
+
+
+class ModelRoutingConfig(BaseModel):
+    main: ModelRoute = Field(default_factory=ModelRoute)
+    # Sub-agents: `subagents` is per definition name, `subagent` the default.
+    subagent: ModelRoute | None = None
+    subagents: dict[str, ModelRoute] = Field(default_factory=dict)
+    compaction: ModelRoute | None = None
+    # The turn right after a loop was detected.
+    loop_breaker: ModelRoute | None = None
+    # A routed call that fails is retried on this; set for sub-agents to the
+    # parent's main route.
+    fallback: ModelRoute | None = None
+    fallback_to_main: bool = True
+
+
 class ShellEnvironmentPolicy(BaseModel):
     ignore_default_excludes: bool = False
     exclude_patterns: list[str] = Field(
@@ -20,9 +45,27 @@ class ShellEnvironmentPolicy(BaseModel):
     set_vars: dict[str, str] = Field(default_factory=dict)
 
 
+class MCPTransportKind(str, Enum):
+    SSE = "sse"
+    HTTP = "http"
+
+
 class MCPServerConfig(BaseModel):
     enabled: bool = True
     startup_timeout_sec: float = 10
+    # Register tools from the schema cache and connect on first use.
+    lazy: bool = True
+    warm_up: bool = False
+    # Concurrent requests multiplexed over the one connection.
+    max_concurrency: int = Field(default=4, ge=1)
+    request_timeout_sec: float | None = Field(default=None, gt=0)
+    heartbeat_interval_sec: float | None = Field(default=30, gt=0)
+    reconnect_max_attempts: int = Field(default=5, ge=0)
+    reconnect_base_delay_sec: float = Field(default=0.5, gt=0)
+    reconnect_max_delay_sec: float = Field(default=30, gt=0)
+    # Token budget for one tool result; binary content is stored on disk.
+    max_output_tokens: int | None = Field(default=20_000, ge=1)
+    tool_output_tokens: dict[str, int] = Field(default_factory=dict)
 
     # stdio transport
     command: str | None = None
@@ -32,6 +75,16 @@ class MCPServerConfig(BaseModel):
 
     # http/sse transport
     url: str | None = None
+    transport: MCPTransportKind = MCPTransportKind.SSE
+    headers: dict[str, str] = Field(default_factory=dict)
+    # Streamable HTTP servers share pooled, keep-alive httpx clients.
+    http_connect_timeout_sec: float = Field(default=10, gt=0)
+    http_read_timeout_sec: float = Field(default=300, gt=0)
+    http_retries: int = Field(default=2, ge=0)
+    http_max_connections: int = Field(default=20, ge=1)
+    http_keepalive_expiry_sec: float = Field(default=30, gt=0)
+    # Keep a stream open for server-initiated messages (one per session).
+    http_listen: bool = False
 
     @model_validator(mode="after")
     def validate_transport(self) -> MCPServerConfig:
@@ -68,6 +121,11 @@ class HookTrigger(str, Enum):
     ON_ERROR = "on_error"
 
 
+class HookMode(str, Enum):
+    ONESHOT = "oneshot"
+    PERSISTENT = "persistent"
+
+
 class HookConfig(BaseModel):
     name: str
     trigger: HookTrigger
@@ -75,6 +133,9 @@ class HookConfig(BaseModel):
     script: str | None = None  # *.sh
     timeout_sec: float = 30
     enabled: bool = True
+    # "persistent" keeps one process running and sends it each event as a
+    # JSON line on stdin; it answers every event with one line on stdout.
+    mode: HookMode = HookMode.ONESHOT
 
     @model_validator(mode="after")
     def validate_hook(self) -> HookConfig:
@@ -83,8 +144,111 @@ class HookConfig(BaseModel):
         return self
 
 
+class ExecutorKind(str, Enum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class ToolExecutionConfig(BaseModel):
+    thread_workers: int = Field(default=8, ge=1)
+    process_workers: int | None = Field(default=None, ge=1)
+    default_concurrency: int = Field(default=4, ge=1)
+    concurrency_limits: dict[str, int] = Field(default_factory=dict)
+    executors: dict[str, ExecutorKind] = Field(default_factory=dict)
+
+    monitor_loop_lag: bool = False
+    loop_lag_interval_sec: float = Field(default=0.5, gt=0)
+    loop_lag_warn_ms: float = Field(default=100, gt=0)
+
+
+class TelemetryConfig(BaseModel):
+    enabled: bool = False
+    export_traces: bool = True
+    export_metrics: bool = True
+    trace_file: Path | None = None
+    metrics_file: Path | None = None
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int | None = None
+    flush_interval_sec: float = Field(default=5, gt=0)
+
+    loop_lag_sampler: bool = True
+    loop_lag_interval_sec: float = Field(default=0.5, gt=0)
+    loop_lag_warn_ms: float = Field(default=100, gt=0)
+
+
+class CompactionConfig(BaseModel):
+    threshold: float = Field(default=0.8, gt=0, le=1)
+    background_threshold: float | None = Field(default=0.6, gt=0, le=1)
+    incremental: bool = True
+    keep_recent_turns: int = Field(default=4, ge=1)
+    merge_fan_in: int = Field(default=4, ge=2)
+
+
+class MessageStoreConfig(BaseModel):
+    # Tool outputs at least this large are kept on disk and loaded lazily.
+    spill_threshold_chars: int | None = Field(default=32_768, ge=1)
+    blob_cache_size: int = Field(default=32, ge=0)
+
+
+class CheckpointCodec(str, Enum):
+    AUTO = "auto"
+    ZSTD = "zstd"
+    ZLIB = "zlib"
+    NONE = "none"
+
+
+class PersistenceConfig(BaseModel):
+    # Sessions are journaled as append-only JSONL; snapshots become offsets.
+    journal: bool = True
+    autosave: bool = True
+    fsync_interval_sec: float = Field(default=1.0, ge=0)
+    compact_min_records: int = Field(default=2000, ge=1)
+    compact_ratio: float = Field(default=4.0, gt=0)
+    # zstd needs the optional ``zstandard`` package; auto falls back to zlib.
+    checkpoint_codec: CheckpointCodec = CheckpointCodec.AUTO
+    checkpoint_compression_level: int = Field(default=3, ge=1, le=19)
+
+
+class SubagentIsolation(str, Enum):
+    INLINE = "inline"
+    PROCESS = "process"
+
+
+class SubagentConfig(BaseModel):
+    # Limits for subagent_batch: children running at once, goals per call and
+    # total tokens the children of one call may spend.
+    max_parallel: int = Field(default=4, ge=1)
+    max_batch_goals: int = Field(default=16, ge=1)
+    batch_token_budget: int | None = Field(default=500_000, ge=1)
+    # "process" runs each child agent in a pooled, resource-limited worker.
+    isolation: SubagentIsolation = SubagentIsolation.INLINE
+    worker_pool_size: int = Field(default=4, ge=1)
+    worker_memory_mb: int | None = Field(default=2048, ge=64)
+    # CPU seconds one run may use; workers are reused, so this is per run.
+    worker_cpu_seconds: int | None = Field(default=None, ge=1)
+    worker_max_tasks: int | None = Field(default=50, ge=1)
+    # Results of read-only sub-agents, reused for the same goal while the
+    # workspace is unchanged.
+    cache_enabled: bool = True
+    cache_ttl_sec: float | None = Field(default=86_400, gt=0)
+
+
+class ProfileScope(str, Enum):
+    SESSION = "session"
+    TURN = "turn"
+
+
+class ProfilingConfig(BaseModel):
+    enabled: bool = False
+    scope: ProfileScope = ProfileScope.TURN
+    interval_ms: float = Field(default=5, gt=0)
+    all_threads: bool = False
+
+
 class Config(BaseModel):
     model: ModelConfig = Field(default_factory=ModelConfig)
+    models: ModelRoutingConfig = Field(default_factory=ModelRoutingConfig)
     cwd: Path = Field(default_factory=Path.cwd)
     shell_environment: ShellEnvironmentPolicy = Field(
         default_factory=ShellEnvironmentPolicy
@@ -94,6 +258,13 @@ class Config(BaseModel):
     approval: ApprovalPolicy = ApprovalPolicy.ON_REQUEST
     max_turns: int = 100
     mcp_servers: dict[str, MCPServerConfig] = Field(default_factory=dict)
+    compaction: CompactionConfig = Field(default_factory=CompactionConfig)
+    message_store: MessageStoreConfig = Field(default_factory=MessageStoreConfig)
+    persistence: PersistenceConfig = Field(default_factory=PersistenceConfig)
+    tool_execution: ToolExecutionConfig = Field(default_factory=ToolExecutionConfig)
+    telemetry: TelemetryConfig = Field(default_factory=TelemetryConfig)
+    profiling: ProfilingConfig = Field(default_factory=ProfilingConfig)
+    subagents: SubagentConfig = Field(default_factory=SubagentConfig)
 
     allowed_tools: list[str] | None = Field(
         None,
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from collections import OrderedDict
+import hashlib
+import os
+from pathlib import Path
+import threading
+import time
+
+
+class BlobStore:
+    # Blobs live under <root>/<key[:2]>/<key> and are read back through a small
+    # LRU. Blobs this store wrote are kept with their mtime so they can be released.
+    def __init__(self, root: Path, cache_size: int = 32) -> None:
+        self.root = root
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.written: dict[str, int] = {}
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def path(self, key: str) -> Path:
+        return self._path(key)
+
+    def put(self, content: str) -> str:
+        return self.put_bytes(content.encode("utf-8"))
+
+    def put_bytes(self, data: bytes) -> str:
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+
+        if path.exists():
+            # Touched so a blob that another store wrote first is neither
+            # released by that store nor swept as stale while still in use.
+            try:
+                os.utime(path)
+                if key in self.written:
+                    self.written[key] = path.stat().st_mtime_ns
+            except OSError:
+                pass
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self.written[key] = path.stat().st_mtime_ns
+
+        return key
+
+    def get(self, key: str) -> str:
+        with self._lock:
+            content = self._cache.get(key)
+            if content is not None:
+                self._cache.move_to_end(key)
+                return content
+
+        content = self._path(key).read_text(encoding="utf-8")
+
+        with self._lock:
+            self._cache[key] = content
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return content
+
+    def _remove(self, path: Path) -> int | None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return None
+        with self._lock:
+            self._cache.pop(path.name, None)
+        return size
+
+    def gc(self, referenced: set[str], grace_sec: float = 3600) -> tuple[int, int]:
+        # Unreferenced blobs younger than the grace period may belong to a
+        # live session that has not committed its journal yet.
+        removed = freed = 0
+        cutoff = time.time() - grace_sec
+        for path in self.root.glob("*/*"):
+            if path.name in referenced or path.name.endswith(".tmp"):
+                continue
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            size = self._remove(path)
+            if size is not None:
+                removed += 1
+                freed += size
+
+        return removed, freed
+
+    def release(
+        self, released: dict[str, int], referenced: set[str]
+    ) -> tuple[int, int]:
+        # Removes blobs this store wrote (key -> mtime when written), unless
+        # they are referenced or were written again since, possibly by
+        # another session.
+        removed = freed = 0
+        for key, mtime_ns in released.items():
+            if key in referenced:
+                continue
+            path = self._path(key)
+            try:
+                if path.stat().st_mtime_ns != mtime_ns:
+                    continue
+            except OSError:
+                continue
+            size = self._remove(path)
+            if size is not None:
+                removed += 1
+                freed += size
+
+        return removed, freed
+
+
+class BlobRef:
+    __slots__ = ("store", "key")
+
+    def __init__(self, store: BlobStore, key: str) -> None:
+        self.store = store
+        self.key = key
+
+    def load(self) -> str:
+        return self.store.get(self.key)
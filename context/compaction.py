@@ -1,13 +1,118 @@
+import asyncio
+from dataclasses import dataclass
+import logging
 from typing import Any
 from client.llm_client import LLMClient
 from client.response import StreamEventType, TokenUsage
 from context.manager import ContextManager
-from prompts.system import get_compression_prompt
+from prompts.system import (
+    get_chunk_summary_prompt,
+    get_compression_prompt,
+    get_summary_merge_prompt,
+)
+from telemetry import traced
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingCompaction:
+    task: asyncio.Task
+    revision: int
+    # "segment": summarize the first `count` messages.
+    # "merge": merge the last `count` summaries.
+    kind: str
+    count: int
 
 
 class ChatCompactor:
     def __init__(self, client: LLMClient):
         self.client = client
+        self._pending: _PendingCompaction | None = None
+
+    @property
+    def background_running(self) -> bool:
+        return self._pending is not None and not self._pending.task.done()
+
+    def start_background(self, context_manager: ContextManager) -> bool:
+        settings = context_manager.config.compaction
+        if self._pending is not None or not settings.incremental:
+            return False
+
+        run = context_manager.mergeable_summaries(settings.merge_fan_in)
+        if run:
+            kind, count = "merge", len(run)
+            coro = self._summarize(
+                get_summary_merge_prompt(),
+                "\n\n---\n\n".join(s.content for s in run),
+            )
+        elif context_manager.needs_background_compression():
+            count = context_manager.aged_message_count(settings.keep_recent_turns)
+            if not count:
+                return False
+            kind = "segment"
+            coro = self._summarize(
+                get_chunk_summary_prompt(),
+                self._format_history_for_compaction(
+                    context_manager.get_aged_messages(count)
+                ),
+            )
+        else:
+            return False
+
+        self._pending = _PendingCompaction(
+            task=asyncio.create_task(coro, name=f"compaction-{kind}"),
+            revision=context_manager.revision,
+            kind=kind,
+            count=count,
+        )
+        return True
+
+    def apply_background(self, context_manager: ContextManager) -> TokenUsage | None:
+        # Only called at turn boundaries; a result computed against an older
+        # revision of the context is discarded rather than patched in.
+        pending = self._pending
+        if pending is None or not pending.task.done():
+            return None
+
+        self._pending = None
+        if pending.task.cancelled():
+            return None
+
+        summary, usage = pending.task.result()
+        if not summary:
+            return None
+
+        if pending.revision != context_manager.revision:
+            logger.debug("Discarding stale background %s compaction", pending.kind)
+            return usage
+
+        if pending.kind == "merge":
+            context_manager.merge_summaries(pending.count, summary)
+        else:
+            context_manager.add_chunk_summary(summary, pending.count)
+
+        return usage
+
+    async def finish_background(
+        self, context_manager: ContextManager
+    ) -> TokenUsage | None:
+        if self._pending is None:
+            return None
+
+        await asyncio.wait([self._pending.task])
+        return self.apply_background(context_manager)
+
+    async def cancel_background(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+
+        pending.task.cancel()
+        try:
+            await pending.task
+        except asyncio.CancelledError:
+            pass
 
     def _format_history_for_compaction(self, messages: list[dict[str, Any]]) -> str:
         output = ["Here is the conversation that needs to be continue: \n"]
@@ -54,22 +159,86 @@ class ChatCompactor:
 
         return "\n\n---\n\n".join(output)
 
+    @traced("compaction.compact")
+    async def compact(self, context_manager: ContextManager) -> TokenUsage | None:
+        # A background compaction already in flight is usually closer to done
+        # than a fresh request would be, so wait for it first.
+        background_usage = await self.finish_background(context_manager)
+        if background_usage is not None and not context_manager.needs_compression():
+            return background_usage
+
+        usage = None
+        if context_manager.config.compaction.incremental:
+            usage = await self.compact_incremental(context_manager)
+
+        if usage is None:
+            summary, usage = await self.compress(context_manager)
+            if not summary:
+                return background_usage
+
+            context_manager.replace_with_summary(summary)
+
+        if background_usage is not None:
+            usage += background_usage
+
+        return usage
+
+    async def compact_incremental(
+        self, context_manager: ContextManager
+    ) -> TokenUsage | None:
+        settings = context_manager.config.compaction
+        count = context_manager.aged_message_count(settings.keep_recent_turns)
+        if not count:
+            return None
+
+        segment = context_manager.get_aged_messages(count)
+        summary, usage = await self._summarize(
+            get_chunk_summary_prompt(),
+            self._format_history_for_compaction(segment),
+        )
+        if not summary:
+            return None
+
+        context_manager.add_chunk_summary(summary, count)
+
+        while run := context_manager.mergeable_summaries(settings.merge_fan_in):
+            merged, merge_usage = await self._summarize(
+                get_summary_merge_prompt(),
+                "\n\n---\n\n".join(s.content for s in run),
+            )
+            if not merged:
+                break
+
+            context_manager.merge_summaries(len(run), merged)
+            usage += merge_usage
+
+        return usage
+
+    @traced("compaction.compress")
     async def compress(
         self, context_manager: ContextManager
     ) -> tuple[str | None, TokenUsage | None]:
-        messages = context_manager.get_messages()
+        messages = await context_manager.get_messages_async()
 
         if len(messages) < 3:
             return None, None
 
+        return await self._summarize(
+            get_compression_prompt(),
+            self._format_history_for_compaction(messages),
+        )
+
+    async def _summarize(
+        self, system_prompt: str, content: str
+    ) -> tuple[str | None, TokenUsage | None]:
         compression_messages = [
             {
                 "role": "system",
-                "content": get_compression_prompt(),
+                "content": system_prompt,
             },
             {
                 "role": "user",
-                "content": self._format_history_for_compaction(messages),
+                "content": content,
             },
         ]
 
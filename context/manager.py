@@ -1,24 +1,112 @@
+from __future__ import annotations
+import asyncio
 from datetime import datetime
-from typing import Any
+import hashlib
+import json
+import sys
+from typing import Any, Callable
 from client.response import TokenUsage
 from config.config import Config
+from config.loader import get_data_dir
+from context.blob_store import BlobRef, BlobStore
+from context.pruning import PruningPolicy
+from context.token_ledger import TokenLedger
 from prompts.system import get_system_prompt
 from dataclasses import dataclass, field
 
 from tools.base import Tool
 from utils.text import count_tokens
 
+_NO_TOOL_CALLS: tuple = ()
+
 
-@dataclass
 class MessageItem:
-    role: str
-    content: str
-    tool_call_id: str | None = None
-    tool_calls: list[dict[str, Any]] = field(default_factory=list)
-    token_count: int | None = None
-    pruned_at: datetime | None = None
+    # Long sessions hold many thousands of these, so they are slotted, share
+    # interned role/tool-name strings, and large bodies can live in a blob
+    # store and be loaded only when the message is rendered.
+    __slots__ = (
+        "role",
+        "_content",
+        "_blob",
+        "tool_call_id",
+        "tool_calls",
+        "token_count",
+        "pruned_at",
+        "tool_name",
+        "path",
+        "content_hash",
+        "duplicate_of",
+        "superseded_by",
+        "seq",
+    )
 
-    def to_dict(self) -> dict[str, Any]:
+    def __init__(
+        self,
+        role: str,
+        content: str,
+        tool_call_id: str | None = None,
+        tool_calls: list[dict[str, Any]] | None = None,
+        token_count: int | None = None,
+        pruned_at: datetime | None = None,
+        tool_name: str | None = None,
+        path: str | None = None,
+        content_hash: str | None = None,
+        duplicate_of: str | None = None,
+        superseded_by: str | None = None,
+    ) -> None:
+        self.role = sys.intern(role)
+        self._content: str | None = content
+        self._blob: BlobRef | None = None
+        self.tool_call_id = tool_call_id
+        self.tool_calls = tool_calls or _NO_TOOL_CALLS
+        self.token_count = token_count
+        self.pruned_at = pruned_at
+        self.tool_name = sys.intern(tool_name) if tool_name else None
+        self.path = path
+        self.content_hash = content_hash
+        # Hash of the output this message stands in for, if it is a
+        # reference to an identical earlier result.
+        self.duplicate_of = duplicate_of
+        # Tool call that read the same file again; the pruning pass clears
+        # superseded reads first.
+        self.superseded_by = superseded_by
+        # Position in the session, assigned by the context manager.
+        self.seq = 0
+
+    @property
+    def content(self) -> str:
+        if self._content is None and self._blob is not None:
+            return self._blob.load()
+
+        return self._content or ""
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self._blob = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._blob is not None
+
+    @property
+    def blob_key(self) -> str | None:
+        return self._blob.key if self._blob is not None else None
+
+    def spill(self, store: BlobStore) -> None:
+        if self._content is None:
+            return
+
+        self._blob = BlobRef(store, store.put(self._content))
+        self._content = None
+
+    def __repr__(self) -> str:
+        return (
+            f"MessageItem(role={self.role!r}, tool_call_id={self.tool_call_id!r}, "
+            f"token_count={self.token_count!r}, spilled={self.spilled})"
+        )
+
+    def to_dict(self, bodies: dict[str, str] | None = None) -> dict[str, Any]:
         result: dict[str, Any] = {"role": self.role}
 
         if self.tool_call_id:
@@ -27,15 +115,141 @@ class MessageItem:
         if self.tool_calls:
             result["tool_calls"] = self.tool_calls
 
-        if self.content:
-            result["content"] = self.content
+        if bodies and self._blob is not None and self._blob.key in bodies:
+            content = bodies[self._blob.key]
+        else:
+            content = self.content
+        if content:
+            result["content"] = content
 
         return result
 
+    def to_record(self) -> dict[str, Any]:
+        # Storage form: keeps token counts and pruning state, and refers to
+        # spilled bodies by blob key instead of inlining them.
+        record: dict[str, Any] = {"role": self.role}
+        if self._blob is not None:
+            record["blob"] = self._blob.key
+        else:
+            record["content"] = self._content or ""
+
+        if self.tool_calls:
+            record["tool_calls"] = list(self.tool_calls)
+        if self.pruned_at:
+            record["pruned_at"] = self.pruned_at.isoformat()
+
+        for key in (
+            "tool_call_id",
+            "token_count",
+            "tool_name",
+            "path",
+            "content_hash",
+            "duplicate_of",
+            "superseded_by",
+        ):
+            value = getattr(self, key)
+            if value is not None:
+                record[key] = value
+
+        return record
+
+    @classmethod
+    def from_record(
+        cls, record: dict[str, Any], blob_store: BlobStore | None = None
+    ) -> MessageItem:
+        pruned_at = record.get("pruned_at")
+        item = cls(
+            role=record["role"],
+            content=record.get("content", ""),
+            tool_call_id=record.get("tool_call_id"),
+            tool_calls=record.get("tool_calls"),
+            token_count=record.get("token_count"),
+            pruned_at=datetime.fromisoformat(pruned_at) if pruned_at else None,
+            tool_name=record.get("tool_name"),
+            path=record.get("path"),
+            content_hash=record.get("content_hash"),
+            duplicate_of=record.get("duplicate_of"),
+            superseded_by=record.get("superseded_by"),
+        )
+        if "blob" in record and blob_store is not None:
+            item._content = None
+            item._blob = BlobRef(blob_store, record["blob"])
+
+        return item
+
+
+@dataclass
+class ChunkSummary:
+    content: str
+    level: int = 0
+    message_count: int = 0
+    token_count: int | None = None
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "content": self.content,
+            "level": self.level,
+            "message_count": self.message_count,
+            "token_count": self.token_count,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ChunkSummary:
+        return cls(
+            content=data["content"],
+            level=data.get("level", 0),
+            message_count=data.get("message_count", 0),
+            token_count=data.get("token_count"),
+            created_at=datetime.fromisoformat(data["created_at"]),
+        )
+
+
+SUMMARY_TITLE = "# Context Restoration (Earlier Conversation Compacted)"
+SUMMARY_ACK = (
+    "Understood. I will not repeat completed actions "
+    "and will continue from the current state."
+)
+
+
+def render_summaries(summaries: list[str]) -> str:
+    sections = "\n\n---\n\n".join(summaries)
+    return f"""{SUMMARY_TITLE}
+
+Earlier parts of this conversation were compacted into the summaries below, oldest first. The most recent messages follow verbatim.
+
+**CRITICAL: Actions listed under "COMPLETED ACTIONS" are already done. DO NOT repeat them.**
+
+---
+
+{sections}"""
+
+
+def summary_messages(
+    summaries: list[str], next_role: str | None
+) -> list[dict[str, Any]]:
+    messages = [{"role": "user", "content": render_summaries(summaries)}]
+    if next_role in (None, "user"):
+        messages.append({"role": "assistant", "content": SUMMARY_ACK})
+
+    return messages
+
+
+def is_summary_message(message: dict[str, Any]) -> bool:
+    return message["role"] == "user" and (message.get("content") or "").startswith(
+        SUMMARY_TITLE
+    )
+
+
+def _reference_text(tool_call_id: str | None, where: str = "above") -> str:
+    return f"[Output identical to the result of tool call {tool_call_id} {where}]"
+
 
 class ContextManager:
     PRUNE_PROTECT_TOKENS = 40_000
     PRUNE_MINIMUM_TOKENS = 20_000
+    DEDUP_MIN_CHARS = 512
 
     def __init__(
         self,
@@ -47,13 +261,88 @@ class ContextManager:
         self.config = config
         self._model_name = self.config.model_name
         self._messages: list[MessageItem] = []
+        self._summaries: list[ChunkSummary] = []
+        # Bumped whenever messages or summaries are removed or replaced, so
+        # background compaction can tell whether its snapshot is still valid.
+        self._revision = 0
+        # Content-addressed index of full tool outputs still in context, and
+        # file reads by path, used to collapse repeated and stale results.
+        self._outputs_by_hash: dict[str, MessageItem] = {}
+        self._references: dict[str, list[MessageItem]] = {}
+        self._reads_by_path: dict[str, list[MessageItem]] = {}
+        self.dedup_saved_tokens = 0
+        self._next_seq = 0
+        self._blob_store: BlobStore | None = None
+        self.pruning_policy = PruningPolicy(
+            protect_tokens=self.PRUNE_PROTECT_TOKENS,
+            minimum_tokens=self.PRUNE_MINIMUM_TOKENS,
+            cwd=config.cwd,
+        )
         self._latest_usage = TokenUsage()
         self.total_usage = TokenUsage()
+        self.ledger = TokenLedger(self._model_name)
+        self.ledger.system_tokens = count_tokens(
+            self._system_prompt or "", self._model_name
+        )
+        self._summary_overhead = count_tokens(
+            self._render_summaries(), self._model_name
+        )
+        self._listeners: list[Callable[[str, dict[str, Any]], None]] = []
 
     @property
     def message_count(self) -> int:
         return len(self._messages)
 
+    def add_listener(self, listener: Callable[[str, dict[str, Any]], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, dict[str, Any]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, op: str, **payload: Any) -> None:
+        for listener in self._listeners:
+            listener(op, payload)
+
+    def _append(self, item: MessageItem) -> None:
+        item.seq = self._next_seq
+        self._next_seq += 1
+        self._messages.append(item)
+        self.ledger.add_message(item.token_count or 0)
+        if self._listeners:
+            self._emit("message", item=item.to_record())
+
+    def _index(self, item: MessageItem) -> int:
+        # Messages are only ever removed from the front, so sequence numbers
+        # stay contiguous.
+        return item.seq - self._messages[0].seq
+
+    def _rewrite(
+        self,
+        item: MessageItem,
+        content: str,
+        pruned_at: datetime | None = None,
+        content_hash: str | None = None,
+        duplicate_of: str | None = None,
+    ) -> int:
+        old_tokens = item.token_count or 0
+        self._forget(item)
+        item.content_hash = content_hash
+        item.duplicate_of = duplicate_of
+        item.content = content
+        item.token_count = count_tokens(content, self._model_name)
+        if pruned_at:
+            item.pruned_at = pruned_at
+        threshold = self.config.message_store.spill_threshold_chars
+        if threshold is not None and len(content) >= threshold:
+            item.spill(self.blob_store)
+        self.ledger.adjust_message(old_tokens, item.token_count)
+
+        if self._listeners:
+            self._emit("update", index=self._index(item), item=item.to_record())
+
+        return old_tokens - item.token_count
+
     def add_user_message(self, content: str) -> None:
         item = MessageItem(
             role="user",
@@ -64,7 +353,7 @@ class ContextManager:
             ),
         )
 
-        self._messages.append(item)
+        self._append(item)
 
     def add_assistant_message(
         self,
@@ -77,23 +366,160 @@ class ContextManager:
             token_count=count_tokens(
                 content or "",
                 self._model_name,
+            )
+            + (
+                count_tokens(json.dumps(tool_calls), self._model_name)
+                if tool_calls
+                else 0
             ),
             tool_calls=tool_calls or [],
         )
 
-        self._messages.append(item)
+        self._append(item)
+
+    def add_tool_result(
+        self,
+        tool_call_id: str,
+        content: str,
+        tool_name: str | None = None,
+        path: str | None = None,
+        supersede: bool = False,
+    ) -> None:
+        content_hash = duplicate_of = None
+        if len(content) >= self.DEDUP_MIN_CHARS:
+            content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            original = self._outputs_by_hash.get(content_hash)
+            if original is not None:
+                reference = _reference_text(original.tool_call_id)
+                self.dedup_saved_tokens += count_tokens(
+                    content, self._model_name
+                ) - count_tokens(reference, self._model_name)
+                content, content_hash, duplicate_of = reference, None, content_hash
 
-    def add_tool_result(self, tool_call_id: str, content: str) -> None:
         item = MessageItem(
             role="tool",
             content=content,
             tool_call_id=tool_call_id,
             token_count=count_tokens(content, self._model_name),
+            tool_name=tool_name,
+            path=path,
+            content_hash=content_hash,
+            duplicate_of=duplicate_of,
         )
 
-        self._messages.append(item)
+        if path and supersede and content_hash:
+            self._supersede_reads(path, tool_call_id)
+
+        threshold = self.config.message_store.spill_threshold_chars
+        if threshold is not None and len(content) >= threshold:
+            item.spill(self.blob_store)
+
+        self._append(item)
+
+        if content_hash:
+            self._outputs_by_hash[content_hash] = item
+        if duplicate_of:
+            self._references.setdefault(duplicate_of, []).append(item)
+        if path:
+            self._reads_by_path.setdefault(path, []).append(item)
+
+    def _supersede_reads(self, path: str, tool_call_id: str) -> None:
+        # Earlier reads were already sent, so they are only marked here and
+        # left for the pruning pass; rewriting them now would invalidate the
+        # cached prompt prefix from that point on.
+        for old in self._reads_by_path.pop(path, []):
+            old.superseded_by = tool_call_id
+
+    def _forget(self, item: MessageItem) -> None:
+        if item.duplicate_of:
+            references = self._references.get(item.duplicate_of)
+            if references and item in references:
+                references.remove(item)
+                if not references:
+                    del self._references[item.duplicate_of]
+            item.duplicate_of = None
+
+        if item.content_hash:
+            if self._outputs_by_hash.get(item.content_hash) is item:
+                del self._outputs_by_hash[item.content_hash]
+                self._promote_reference(item)
+            item.content_hash = None
+
+        if item.path:
+            reads = self._reads_by_path.get(item.path)
+            if reads and item in reads:
+                reads.remove(item)
+                if not reads:
+                    del self._reads_by_path[item.path]
+
+    def _promote_reference(self, original: MessageItem) -> None:
+        # The original is leaving context (compacted or pruned), so the prompt
+        # already changes from its position on. Its newest reference takes the
+        # content back and the others point there, so no reference is left
+        # pointing at something gone.
+        content_hash = original.content_hash
+        references = self._references.pop(content_hash, None)
+        if not references:
+            return
+
+        heir = references.pop()
+        self.dedup_saved_tokens += self._rewrite(
+            heir, original.content, content_hash=content_hash
+        )
+        self._outputs_by_hash[content_hash] = heir
+        if heir.path:
+            self._reads_by_path.setdefault(heir.path, []).append(heir)
+
+        reference = _reference_text(heir.tool_call_id, "below")
+        for item in references:
+            self._rewrite(item, reference, duplicate_of=content_hash)
+        if references:
+            self._references[content_hash] = references
+
+    @property
+    def blob_store(self) -> BlobStore:
+        if self._blob_store is None:
+            self._blob_store = BlobStore(
+                get_data_dir() / "blobs",
+                cache_size=self.config.message_store.blob_cache_size,
+            )
 
-    def get_messages(self) -> list[dict[str, Any]]:
+        return self._blob_store
+
+    @property
+    def live_blobs(self) -> set[str]:
+        return {item.blob_key for item in self._messages if item.spilled}
+
+    @property
+    def written_blobs(self) -> dict[str, int]:
+        # Blobs this context spilled itself, for release when it is closed.
+        if self._blob_store is None:
+            return {}
+        return dict(self._blob_store.written)
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    @property
+    def summaries(self) -> list[ChunkSummary]:
+        return list(self._summaries)
+
+    async def load_spilled(self) -> dict[str, str]:
+        # Spilled bodies are read in a thread rather than on the event loop.
+        keys = self.live_blobs
+        if not keys:
+            return {}
+
+        store = self.blob_store
+        return await asyncio.to_thread(lambda: {key: store.get(key) for key in keys})
+
+    async def get_messages_async(self) -> list[dict[str, Any]]:
+        return self.get_messages(await self.load_spilled())
+
+    def get_messages(
+        self, bodies: dict[str, str] | None = None
+    ) -> list[dict[str, Any]]:
         messages = []
 
         if self._system_prompt:
@@ -104,25 +530,156 @@ class ContextManager:
                 }
             )
 
+        if self._summaries:
+            messages.extend(
+                summary_messages(
+                    [s.content for s in self._summaries],
+                    self._messages[0].role if self._messages else None,
+                )
+            )
+
         for item in self._messages:
-            messages.append(item.to_dict())
+            messages.append(item.to_dict(bodies))
 
         return messages
 
+    @property
+    def estimated_tokens(self) -> int:
+        return self.ledger.estimate()
+
+    def set_tool_schemas(self, schemas: list[dict[str, Any]]) -> None:
+        self.ledger.set_schemas(schemas)
+
+    def begin_request(self) -> int:
+        return self.ledger.mark_request()
+
     def needs_compression(self) -> bool:
         context_limit = self.config.model.context_window
-        current_tokens = self._latest_usage.total_tokens
 
-        return current_tokens > (context_limit * 0.8)
+        return self.estimated_tokens > (
+            context_limit * self.config.compaction.threshold
+        )
+
+    def needs_background_compression(self) -> bool:
+        threshold = self.config.compaction.background_threshold
+        if threshold is None:
+            return False
+
+        context_limit = self.config.model.context_window
+        return self.estimated_tokens > (context_limit * threshold)
 
     def set_latest_usage(self, usage: TokenUsage):
         self._latest_usage = usage
+        self.ledger.calibrate(usage.prompt_tokens)
+
+    def _update_summary_tokens(self) -> None:
+        self.ledger.summary_tokens = (
+            sum(s.token_count or 0 for s in self._summaries) + self._summary_overhead
+            if self._summaries
+            else 0
+        )
 
     def add_usage(self, usage: TokenUsage):
         self.total_usage += usage
+        if self._listeners:
+            self._emit("usage", total_usage=self.total_usage.__dict__)
+
+    def _render_summaries(self) -> str:
+        return render_summaries([s.content for s in self._summaries])
+
+    def _turn_boundaries(self) -> list[int]:
+        # A turn starts at a user message or at an assistant message that
+        # follows tool results; cutting there never splits a tool call from
+        # its results.
+        boundaries = []
+        for i, msg in enumerate(self._messages):
+            if msg.role == "user":
+                boundaries.append(i)
+            elif msg.role == "assistant" and i and self._messages[i - 1].role == "tool":
+                boundaries.append(i)
+
+        return boundaries
+
+    def aged_message_count(self, keep_recent_turns: int) -> int:
+        boundaries = self._turn_boundaries()
+        if len(boundaries) <= keep_recent_turns:
+            return 0
+
+        return boundaries[-keep_recent_turns]
+
+    def to_records(self) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        return (
+            [item.to_record() for item in self._messages],
+            [summary.to_dict() for summary in self._summaries],
+        )
+
+    def get_aged_messages(self, count: int) -> list[dict[str, Any]]:
+        return [item.to_dict() for item in self._messages[:count]]
+
+    def add_chunk_summary(self, content: str, message_count: int) -> None:
+        removed = self._messages[:message_count]
+        # Drop references that go too before promoting any to replace an
+        # original that goes.
+        for item in removed:
+            if item.duplicate_of:
+                self._forget(item)
+        for item in removed:
+            self.ledger.remove_message(item.token_count or 0)
+            self._forget(item)
+        del self._messages[:message_count]
+        self._revision += 1
+        self._summaries.append(
+            ChunkSummary(
+                content=content,
+                message_count=message_count,
+                token_count=count_tokens(content, self._model_name),
+            )
+        )
+        self._update_summary_tokens()
+        if self._listeners:
+            self._emit(
+                "summarize",
+                count=message_count,
+                summary=self._summaries[-1].to_dict(),
+            )
+
+    def mergeable_summaries(self, fan_in: int) -> list[ChunkSummary]:
+        # Summaries form levels like a binary counter: new chunks land at
+        # level 0 and every run of `fan_in` same-level summaries at the tail
+        # is merged one level up, so the count stays logarithmic.
+        if not self._summaries:
+            return []
+
+        level = self._summaries[-1].level
+        run = 0
+        for summary in reversed(self._summaries):
+            if summary.level != level:
+                break
+            run += 1
+
+        if run < fan_in:
+            return []
+
+        return self._summaries[-run:]
+
+    def merge_summaries(self, count: int, content: str) -> None:
+        merged = self._summaries[-count:]
+        del self._summaries[-count:]
+        self._revision += 1
+        self._summaries.append(
+            ChunkSummary(
+                content=content,
+                level=max(s.level for s in merged) + 1,
+                message_count=sum(s.message_count for s in merged),
+                token_count=count_tokens(content, self._model_name),
+            )
+        )
+        self._update_summary_tokens()
+        if self._listeners:
+            self._emit("merge", count=count, summary=self._summaries[-1].to_dict())
 
     def replace_with_summary(self, summary: str) -> None:
-        self._messages = []
+        self.clear()
 
         continuation_content = f"""# Context Restoration (Previous Session Compacted)
 
@@ -143,7 +700,7 @@ class ContextManager:
             content=continuation_content,
             token_count=count_tokens(continuation_content, self._model_name),
         )
-        self._messages.append(summary_item)
+        self._append(summary_item)
 
         ack_content = """I've reviewed the context from the previous session. I understand:
 - The original goal and what was requested
@@ -157,7 +714,7 @@ I'll continue with the REMAINING tasks only, starting from where we left off."""
             content=ack_content,
             token_count=count_tokens(ack_content, self._model_name),
         )
-        self._messages.append(ack_item)
+        self._append(ack_item)
 
         continue_content = (
             "Continue with the REMAINING work only. Do NOT repeat any completed actions. "
@@ -169,7 +726,7 @@ I'll continue with the REMAINING tasks only, starting from where we left off."""
             content=continue_content,
             token_count=count_tokens(continue_content, self._model_name),
         )
-        self._messages.append(continue_item)
+        self._append(continue_item)
 
     def prune_tool_outputs(self) -> int:
         user_message_count = sum(1 for msg in self._messages if msg.role == "user")
@@ -177,34 +734,59 @@ I'll continue with the REMAINING tasks only, starting from where we left off."""
         if user_message_count < 2:
             return 0
 
-        total_tokens = 0
-        pruned_tokens = 0
-        to_prune: list[MessageItem] = []
-
-        for msg in reversed(self._messages):
-            if msg.role == "tool" and msg.tool_call_id:
-                if msg.pruned_at:
-                    break
-
-                tokens = msg.token_count or count_tokens(msg.content, self._model_name)
-                total_tokens += tokens
-
-                if total_tokens > self.PRUNE_PROTECT_TOKENS:
-                    pruned_tokens += tokens
-                    to_prune.append(msg)
-
-        if pruned_tokens < self.PRUNE_MINIMUM_TOKENS:
-            return 0
+        decisions = self.pruning_policy.plan(
+            self._messages,
+            lambda text: count_tokens(text, self._model_name),
+        )
 
-        pruned_count = 0
+        for decision in decisions:
+            self._rewrite(decision.item, decision.content, pruned_at=datetime.now())
 
-        for msg in to_prune:
-            msg.content = "[Old tool result content cleared]"
-            msg.token_count = count_tokens(msg.content, self._model_name)
-            msg.pruned_at = datetime.now()
-            pruned_count += 1
+        return len(decisions)
 
-        return pruned_count
+    def restore(
+        self,
+        records: list[dict[str, Any]],
+        summaries: list[dict[str, Any]],
+        total_usage: TokenUsage | None = None,
+    ) -> None:
+        # Bulk load from storage records. Token counts and pruning state come
+        # from the records; only records saved without a count are tokenized.
+        blob_store = self.blob_store if any("blob" in r for r in records) else None
+        items = [MessageItem.from_record(r, blob_store) for r in records]
+        for item in items:
+            if item.token_count is None:
+                item.token_count = count_tokens(item.content, self._model_name)
+
+        self._messages = items
+        self._summaries = [ChunkSummary.from_dict(s) for s in summaries]
+        self._revision += 1
+        self._outputs_by_hash = {}
+        self._references = {}
+        self._reads_by_path = {}
+        for seq, item in enumerate(items, start=self._next_seq):
+            item.seq = seq
+        self._next_seq += len(items)
+        for item in items:
+            if item.duplicate_of:
+                self._references.setdefault(item.duplicate_of, []).append(item)
+            if item.content_hash:
+                self._outputs_by_hash[item.content_hash] = item
+                if item.path and not item.superseded_by:
+                    self._reads_by_path.setdefault(item.path, []).append(item)
+
+        self.ledger.reset_messages([item.token_count for item in items])
+        self._update_summary_tokens()
+        if total_usage is not None:
+            self.total_usage = total_usage
 
     def clear(self) -> None:
         self._messages = []
+        self._summaries = []
+        self._revision += 1
+        self._outputs_by_hash = {}
+        self._references = {}
+        self._reads_by_path = {}
+        self.ledger.reset_messages([])
+        self._update_summary_tokens()
+        self._emit("clear")
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import ast
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import re
+from typing import TYPE_CHECKING, Any
+from tools.builtin.edit_file import EditTool
+from tools.builtin.write_file import WriteFileTool
+
+if TYPE_CHECKING:
+    from context.manager import MessageItem
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_./-]{3,}")
+WRITE_TOOLS = {EditTool.name, WriteFileTool.name}
+
+
+def _parse_arguments(raw: Any) -> dict[str, Any]:
+    if isinstance(raw, dict):
+        return raw
+
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(raw)
+        except (ValueError, SyntaxError, TypeError):
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+
+    return {}
+
+
+def _identifiers(text: str, limit: int = 200) -> set[str]:
+    found: set[str] = set()
+    for match in _IDENTIFIER_RE.finditer(text):
+        found.add(match.group(0))
+        if len(found) >= limit:
+            break
+
+    return found
+
+
+def _same_path(path: str, other: str, cwd: Path | None = None) -> bool:
+    if cwd is not None:
+        return os.path.normpath(os.path.join(cwd, path)) == os.path.normpath(
+            os.path.join(cwd, other)
+        )
+
+    other = other.removeprefix("./")
+    return bool(other) and (path == other or path.endswith("/" + other))
+
+
+@dataclass
+class PruneDecision:
+    item: MessageItem
+    score: float
+    content: str
+
+
+class PruningPolicy:
+    # Recent and later-mentioned results score higher; large results and reads
+    # of files written or read again afterwards score lower and are shrunk first.
+    def __init__(
+        self,
+        protect_tokens: int,
+        minimum_tokens: int,
+        recency_weight: float = 1.0,
+        reference_weight: float = 1.0,
+        overwritten_weight: float = 1.5,
+        size_weight: float = 0.5,
+        head_lines: int = 20,
+        tail_lines: int = 10,
+        cwd: Path | None = None,
+    ) -> None:
+        self.protect_tokens = protect_tokens
+        self.minimum_tokens = minimum_tokens
+        self.recency_weight = recency_weight
+        self.reference_weight = reference_weight
+        self.overwritten_weight = overwritten_weight
+        self.size_weight = size_weight
+        self.head_lines = head_lines
+        self.tail_lines = tail_lines
+        # Relative paths in tool arguments are resolved against this.
+        self.cwd = cwd
+
+    def plan(
+        self,
+        messages: list[MessageItem],
+        count_tokens: Any,
+    ) -> list[PruneDecision]:
+        candidates: list[tuple[int, MessageItem]] = []
+        total_tokens = 0
+
+        # Results of the latest tool round have not been seen by the model yet.
+        last_call = max(
+            (
+                i
+                for i, m in enumerate(messages)
+                if m.role == "assistant" and m.tool_calls
+            ),
+            default=len(messages),
+        )
+        for i, msg in enumerate(messages):
+            if msg.role != "tool" or not msg.tool_call_id or msg.pruned_at:
+                continue
+            total_tokens += msg.token_count or 0
+            if i < last_call:
+                candidates.append((i, msg))
+
+        excess = total_tokens - self.protect_tokens
+        if excess < self.minimum_tokens or not candidates:
+            return []
+
+        scored = self._score(messages, candidates)
+        scored.sort(key=lambda entry: entry[0])
+
+        decisions = []
+        for score, msg, overwritten, grep_patterns in scored:
+            if excess <= 0:
+                break
+
+            content = self._reduce(msg, overwritten, grep_patterns)
+            saved = (msg.token_count or 0) - count_tokens(content)
+            if saved <= 0:
+                continue
+
+            decisions.append(PruneDecision(item=msg, score=score, content=content))
+            excess -= saved
+
+        return decisions
+
+    def _score(
+        self,
+        messages: list[MessageItem],
+        candidates: list[tuple[int, MessageItem]],
+    ) -> list[tuple[float, MessageItem, bool, list[str]]]:
+        # Walk backwards once, so each candidate sees only what came after it.
+        mentioned: set[str] = set()
+        written: list[str] = []
+        grep_patterns: list[str] = []
+        later_turns = 0
+        by_index = dict(candidates)
+        scored = []
+
+        for i in range(len(messages) - 1, -1, -1):
+            msg = messages[i]
+            if i in by_index:
+                scored.append(
+                    self._score_item(
+                        msg, later_turns, mentioned, written, grep_patterns
+                    )
+                )
+
+            if msg.role != "assistant":
+                continue
+
+            later_turns += 1
+            mentioned |= _identifiers(msg.content or "")
+            for call in msg.tool_calls:
+                function = call.get("function", {})
+                args = _parse_arguments(function.get("arguments", ""))
+                mentioned |= _identifiers(" ".join(str(v) for v in args.values()))
+                name = function.get("name")
+                if name in WRITE_TOOLS and args.get("path"):
+                    written.append(str(args["path"]))
+                elif name == "grep" and args.get("pattern"):
+                    grep_patterns.append(str(args["pattern"]))
+
+        return scored
+
+    def _score_item(
+        self,
+        msg: MessageItem,
+        later_turns: int,
+        mentioned: set[str],
+        written: list[str],
+        grep_patterns: list[str],
+    ) -> tuple[float, MessageItem, bool, list[str]]:
+        tokens = msg.token_count or 0
+        recency = 1 / (1 + later_turns / 4)
+
+        keys = _identifiers(msg.content)
+        if msg.path:
+            keys.add(msg.path)
+            keys.add(msg.path.rsplit("/", 1)[-1])
+        references = min(1.0, len(keys & mentioned) / 5)
+
+        overwritten = bool(msg.superseded_by) or (
+            bool(msg.path)
+            and any(_same_path(msg.path, path, self.cwd) for path in written)
+        )
+        size = tokens / (tokens + 2000)
+
+        score = (
+            self.recency_weight * recency
+            + self.reference_weight * references
+            - self.overwritten_weight * overwritten
+            - self.size_weight * size
+        )
+        return score, msg, overwritten, list(grep_patterns)
+
+    def _reduce(
+        self,
+        msg: MessageItem,
+        overwritten: bool,
+        grep_patterns: list[str],
+    ) -> str:
+        if msg.superseded_by:
+            return (
+                f"[Superseded: {msg.path} was read again in tool call "
+                f"{msg.superseded_by}]"
+            )
+
+        if overwritten:
+            return f"[Old tool result cleared: {msg.path} was modified afterwards]"
+
+        lines = msg.content.splitlines()
+
+        if msg.path and grep_patterns:
+            matched = self._grep_lines(lines, grep_patterns)
+            if matched:
+                return "\n".join(
+                    [
+                        f"[Old tool result reduced to {len(matched)} of {len(lines)} "
+                        "lines matched by later searches]"
+                    ]
+                    + matched
+                )
+
+        keep = self.head_lines + self.tail_lines
+        if len(lines) > keep * 2:
+            omitted = len(lines) - keep
+            return "\n".join(
+                lines[: self.head_lines]
+                + [f"[... {omitted} lines of old tool result cleared ...]"]
+                + lines[-self.tail_lines :]
+            )
+
+        return "[Old tool result content cleared]"
+
+    def _grep_lines(self, lines: list[str], patterns: list[str]) -> list[str]:
+        compiled = []
+        for pattern in patterns:
+            try:
+                compiled.append(re.compile(pattern))
+            except re.error:
+                continue
+
+        return [line for line in lines if any(p.search(line) for p in compiled)]
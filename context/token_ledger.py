@@ -0,0 +1,92 @@
+from __future__ import annotations
+import json
+from typing import Any
+
+from utils.text import count_tokens
+
+
+class TokenLedger:
+    # Running size of the next request, kept up to date as messages change and
+    # scaled by a ratio calibrated against the provider's prompt_tokens.
+    MESSAGE_OVERHEAD = 4
+    MIN_RATIO = 0.5
+    MAX_RATIO = 3.0
+
+    def __init__(self, model_name: str, smoothing: float = 0.3) -> None:
+        self.model_name = model_name
+        self.smoothing = smoothing
+        self.system_tokens = 0
+        self.schema_tokens = 0
+        self.summary_tokens = 0
+        self.message_tokens = 0
+        self.message_count = 0
+        self.ratio = 1.0
+        self.samples = 0
+        self._schema_key: tuple[str, ...] | None = None
+        self._pending_estimate: int | None = None
+
+    @property
+    def local_total(self) -> int:
+        return (
+            self.system_tokens
+            + self.schema_tokens
+            + self.summary_tokens
+            + self.message_tokens
+            + self.message_count * self.MESSAGE_OVERHEAD
+        )
+
+    def estimate(self) -> int:
+        return round(self.local_total * self.ratio)
+
+    def add_message(self, tokens: int) -> None:
+        self.message_tokens += tokens
+        self.message_count += 1
+
+    def remove_message(self, tokens: int) -> None:
+        self.message_tokens -= tokens
+        self.message_count -= 1
+
+    def adjust_message(self, old_tokens: int, new_tokens: int) -> None:
+        self.message_tokens += new_tokens - old_tokens
+
+    def reset_messages(self, token_counts: list[int]) -> None:
+        self.message_tokens = sum(token_counts)
+        self.message_count = len(token_counts)
+
+    def set_schemas(self, schemas: list[dict[str, Any]]) -> None:
+        # Tool schemas only change when tools are (un)registered, so the
+        # serialized payload is recounted only when the tool set changes.
+        key = tuple(str(s.get("name", "")) for s in schemas)
+        if key == self._schema_key:
+            return
+
+        self._schema_key = key
+        self.schema_tokens = (
+            count_tokens(json.dumps(schemas), self.model_name) if schemas else 0
+        )
+
+    def mark_request(self) -> int:
+        self._pending_estimate = self.local_total
+        return self._pending_estimate
+
+    def calibrate(self, prompt_tokens: int) -> None:
+        estimate, self._pending_estimate = self._pending_estimate, None
+        if not estimate or prompt_tokens <= 0:
+            return
+
+        observed = prompt_tokens / estimate
+        if self.samples == 0:
+            ratio = observed
+        else:
+            ratio = self.ratio + self.smoothing * (observed - self.ratio)
+
+        self.ratio = min(self.MAX_RATIO, max(self.MIN_RATIO, ratio))
+        self.samples += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "estimated": self.estimate(),
+            "local": self.local_total,
+            "ratio": round(self.ratio, 3),
+            "calibration_samples": self.samples,
+        }
@@ -1,11 +1,15 @@
 import asyncio
 import json
 import os
-import signal
-import sys
+from pathlib import Path
+import shlex
+import shutil
 import tempfile
+import time
 from typing import Any
-from config.config import Config, HookConfig, HookTrigger
+from config.config import Config, HookConfig, HookMode, HookTrigger
+from hooks.hook_worker import HookWorker, kill_process
+from telemetry import current_span, traced
 from tools.base import ToolResult
 
 
@@ -13,27 +17,62 @@ class HookSystem:
     def __init__(self, config: Config):
         self.config = config
         self.hooks: list[HookConfig] = []
+        self.total_time = 0.0
         if self.config.hooks_enabled:
             self.hooks = [hook for hook in self.config.hooks if hook.enabled]
 
-    async def _run_hook(self, hook: HookConfig, env: dict[str, str]) -> None:
+        self._base_env: dict[str, str] | None = None
+        self._script_dir: Path | None = None
+        # Keyed by id(hook): names are not unique, the config objects are
+        # kept for the whole session.
+        self._scripts: dict[int, str] = {}
+        self._workers: dict[int, HookWorker] = {}
+
+    def _hooks_for(self, trigger: HookTrigger) -> list[HookConfig]:
+        return [hook for hook in self.hooks if hook.trigger == trigger]
+
+    def _command(self, hook: HookConfig) -> str:
+        if hook.command:
+            return hook.command
+
+        # Scripts are written once per session, not on every trigger.
+        path = self._scripts.get(id(hook))
+        if path is None:
+            if self._script_dir is None:
+                self._script_dir = Path(tempfile.mkdtemp(prefix="ai-agent-hooks-"))
+            script = self._script_dir / f"{len(self._scripts)}.sh"
+            script.write_text("#!/bin/bash\n" + hook.script)
+            os.chmod(script, 0o755)
+            path = self._scripts[id(hook)] = shlex.quote(str(script))
+        return path
+
+    def _worker(self, hook: HookConfig) -> HookWorker:
+        worker = self._workers.get(id(hook))
+        if worker is None:
+            env = dict(self.base_env)
+            env["AI_AGENT_CWD"] = str(self.config.cwd)
+            env["AI_AGENT_HOOK_MODE"] = HookMode.PERSISTENT.value
+            worker = HookWorker(self._command(hook), self.config.cwd, env)
+            self._workers[id(hook)] = worker
+        return worker
+
+    @traced("hook.run")
+    async def _run_hook(self, hook: HookConfig, event: dict[str, Any]) -> None:
+        current_span().set_attribute("hook", hook.name)
+        current_span().set_attribute("trigger", hook.trigger.value)
+        current_span().set_attribute("mode", hook.mode.value)
+        started = time.perf_counter()
         try:
-            if hook.command:
-                await self._run_command(hook.command, hook.timeout_sec, env)
+            if hook.mode == HookMode.PERSISTENT:
+                await self._worker(hook).send(event, hook.timeout_sec)
             else:
-                with tempfile.NamedTemporaryFile(
-                    mode="w", suffix=".sh", delete=False
-                ) as f:
-                    f.write("#!/bin/bash\n")
-                    f.write(hook.script)
-                    script_path = f.name
-                try:
-                    os.chmod(script_path, 0o755)
-                    await self._run_command(script_path, hook.timeout_sec, env)
-                finally:
-                    os.unlink(script_path)
+                await self._run_command(
+                    self._command(hook), hook.timeout_sec, self._build_env(event)
+                )
         except Exception as e:
             print(e)
+        finally:
+            self.total_time += time.perf_counter() - started
 
     async def _run_command(
         self,
@@ -53,70 +92,82 @@ class HookSystem:
         try:
             await asyncio.wait_for(process.communicate(), timeout=timeout)
         except asyncio.TimeoutError:
-            if sys.platform != "win32":
-                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
-            else:
-                process.kill()
-            await process.wait()
+            await kill_process(process)
+
+    @property
+    def base_env(self) -> dict[str, str]:
+        if self._base_env is None:
+            self._base_env = os.environ.copy()
+        return self._base_env
 
-    def _build_env(
+    def _event(
         self,
         trigger: HookTrigger,
         tool_name: str | None = None,
         user_message: str | None = None,
         error: Exception | None = None,
-    ) -> dict[str, str]:
-        env = os.environ.copy()
-        env["AI_AGENT_TRIGGER"] = trigger.value
-        env["AI_AGENT_CWD"] = str(self.config.cwd)
+    ) -> dict[str, Any]:
+        event: dict[str, Any] = {
+            "trigger": trigger.value,
+            "cwd": str(self.config.cwd),
+        }
 
         if tool_name:
-            env["AI_AGENT_TOOL_NAME"] = tool_name
+            event["tool_name"] = tool_name
 
         if user_message:
-            env["AI_AGENT_USER_MESSAGE"] = user_message
+            event["user_message"] = user_message
 
         if error:
-            env["AI_AGENT_ERROR"] = str(error)
+            event["error"] = str(error)
+
+        return event
 
+    def _build_env(self, event: dict[str, Any]) -> dict[str, str]:
+        env = dict(self.base_env)
+        for key, value in event.items():
+            if not isinstance(value, str):
+                value = json.dumps(value)
+            env[f"AI_AGENT_{key.upper()}"] = value
         return env
 
+    async def _dispatch(self, hooks: list[HookConfig], event: dict[str, Any]) -> None:
+        for hook in hooks:
+            await self._run_hook(hook, event)
+
     async def trigger_before_agent(self, user_message: str) -> None:
-        env = self._build_env(
-            HookTrigger.BEFORE_AGENT,
-            user_message=user_message,
-        )
+        hooks = self._hooks_for(HookTrigger.BEFORE_AGENT)
+        if not hooks:
+            return
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.BEFORE_AGENT:
-                await self._run_hook(hook, env)
+        event = self._event(HookTrigger.BEFORE_AGENT, user_message=user_message)
+        await self._dispatch(hooks, event)
 
     async def trigger_after_agent(
         self,
         user_message: str,
         agent_response: str,
     ) -> None:
-        env = self._build_env(
-            HookTrigger.AFTER_AGENT,
-            user_message=user_message,
-        )
-        env["AI_AGENT_RESPONSE"] = agent_response
+        hooks = self._hooks_for(HookTrigger.AFTER_AGENT)
+        if not hooks:
+            return
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.AFTER_AGENT:
-                await self._run_hook(hook, env)
+        event = self._event(HookTrigger.AFTER_AGENT, user_message=user_message)
+        event["response"] = agent_response
+        await self._dispatch(hooks, event)
 
     async def trigger_before_tool(
         self,
         tool_name: str,
         tool_params: dict[str, Any],
     ) -> None:
-        env = self._build_env(HookTrigger.BEFORE_TOOL, tool_name=tool_name)
-        env["AI_AGENT_TOOL_PARAMS"] = json.dumps(tool_params)
+        hooks = self._hooks_for(HookTrigger.BEFORE_TOOL)
+        if not hooks:
+            return
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.BEFORE_TOOL:
-                await self._run_hook(hook, env)
+        event = self._event(HookTrigger.BEFORE_TOOL, tool_name=tool_name)
+        event["tool_params"] = tool_params
+        await self._dispatch(hooks, event)
 
     async def trigger_after_tool(
         self,
@@ -124,17 +175,29 @@ class HookSystem:
         tool_params: dict[str, Any],
         tool_result: ToolResult,
     ) -> None:
-        env = self._build_env(HookTrigger.AFTER_TOOL, tool_name=tool_name)
-        env["AI_AGENT_TOOL_PARAMS"] = json.dumps(tool_params)
-        env["AI_AGENT_TOOL_RESULT"] = tool_result.to_model_output()
+        hooks = self._hooks_for(HookTrigger.AFTER_TOOL)
+        if not hooks:
+            return
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.AFTER_TOOL:
-                await self._run_hook(hook, env)
+        event = self._event(HookTrigger.AFTER_TOOL, tool_name=tool_name)
+        event["tool_params"] = tool_params
+        event["tool_result"] = tool_result.to_model_output()
+        await self._dispatch(hooks, event)
 
     async def trigger_on_error(self, error: Exception) -> None:
-        env = self._build_env(HookTrigger.ON_ERROR, error=error)
+        hooks = self._hooks_for(HookTrigger.ON_ERROR)
+        if not hooks:
+            return
+
+        await self._dispatch(hooks, self._event(HookTrigger.ON_ERROR, error=error))
+
+    async def close(self) -> None:
+        workers, self._workers = self._workers, {}
+        await asyncio.gather(
+            *(worker.close() for worker in workers.values()), return_exceptions=True
+        )
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.ON_ERROR:
-                await self._run_hook(hook, env)
+        if self._script_dir is not None:
+            shutil.rmtree(self._script_dir, ignore_errors=True)
+            self._script_dir = None
+            self._scripts.clear()
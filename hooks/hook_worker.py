@@ -0,0 +1,93 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+import signal
+import sys
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+async def kill_process(process: asyncio.subprocess.Process) -> None:
+    # Hooks run in their own session, so the whole group goes.
+    if process.returncode is None:
+        try:
+            if sys.platform != "win32":
+                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+    await process.wait()
+
+
+class HookWorker:
+    # One JSON line per event on stdin, one line of reply on stdout. A worker
+    # that exits or times out is killed and restarted on the next event.
+    def __init__(self, command: str, cwd: Path, env: dict[str, str]) -> None:
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.process: asyncio.subprocess.Process | None = None
+        self.started = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def _start(self) -> asyncio.subprocess.Process:
+        process = await asyncio.create_subprocess_shell(
+            self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=self.cwd,
+            env=self.env,
+            start_new_session=True,
+        )
+        self.started += 1
+        logger.debug(f"Started hook worker {process.pid}: {self.command}")
+        return process
+
+    async def send(self, event: dict[str, Any], timeout: float) -> str:
+        async with self._lock:
+            if not self.alive:
+                self.process = await self._start()
+            process = self.process
+
+            try:
+                process.stdin.write((json.dumps(event) + "\n").encode("utf-8"))
+                await process.stdin.drain()
+                reply = await asyncio.wait_for(process.stdout.readline(), timeout)
+            except asyncio.TimeoutError:
+                await kill_process(process)
+                raise TimeoutError(
+                    f"Hook worker did not answer within {timeout}s: {self.command}"
+                ) from None
+            except OSError:
+                await kill_process(process)
+                raise
+            except asyncio.CancelledError:
+                # The reply may still arrive and would answer the next event.
+                await kill_process(process)
+                raise
+
+            if not reply:
+                code = await process.wait()
+                raise RuntimeError(f"Hook worker exited with code {code}")
+            return reply.decode("utf-8", errors="replace").strip()
+
+    async def close(self) -> None:
+        process, self.process = self.process, None
+        if process is None or process.returncode is not None:
+            return
+
+        process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            await kill_process(process)
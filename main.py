@@ -6,10 +6,8 @@ from dotenv import load_dotenv
 
 from agent.agent import Agent
 from agent.events import AgentEventType
-from agent.persistence import PersistenceManager, SessionSnapshot
-from agent.session import Session
 from config.config import ApprovalPolicy, Config
-from config.loader import load_config
+from config.loader import get_data_dir, load_config
 from ui.tui import TUI, get_console
 
 console = get_console()
@@ -100,6 +98,13 @@ class CLI:
                     tool_kind,
                     event.data.get("arguments", {}),
                 )
+            elif event.type == AgentEventType.TOOL_CALL_PROGRESS:
+                self.tui.tool_call_progress(
+                    event.data.get("call_id", ""),
+                    event.data.get("progress", 0),
+                    event.data.get("total"),
+                    event.data.get("message"),
+                )
             elif event.type == AgentEventType.TOOL_CALL_COMPLETE:
                 tool_name = event.data.get("name", "unknown")
                 tool_kind = self._get_tool_kind(tool_name)
@@ -163,10 +168,53 @@ class CLI:
             else:
                 console.print(f"Current approval policy: {self.config.approval.value}")
         elif cmd_name == "/stats":
-            stats = self.agent.session.get_stats()
-            console.print("\n[bold]Session Statistics [/bold]")
-            for key, value in stats.items():
-                console.print(f"   {key}: {value}")
+            stats_args = cmd_args.split(maxsplit=1)
+            if stats_args and stats_args[0] == "csv":
+                if len(stats_args) > 1:
+                    csv_path = Path(command.split(maxsplit=2)[2]).expanduser()
+                else:
+                    csv_path = (
+                        get_data_dir()
+                        / "stats"
+                        / f"{self.agent.session.session_id}_turns.csv"
+                    )
+                count = self.agent.session.turn_stats.export_csv(csv_path)
+                console.print(
+                    f"[success]Exported {count} turn records to {csv_path}[/success]"
+                )
+            else:
+                stats = self.agent.session.get_stats()
+                console.print("\n[bold]Session Statistics [/bold]")
+                for key, value in stats.items():
+                    if isinstance(value, dict):
+                        console.print(f"   {key}:")
+                        for sub_key, sub_value in value.items():
+                            console.print(f"      {sub_key}: {sub_value}")
+                    else:
+                        console.print(f"   {key}: {value}")
+        elif cmd_name == "/profile":
+            session = self.agent.session
+            if cmd_args == "start":
+                if session.start_profiler():
+                    console.print("[success]Profiler started[/success]")
+                else:
+                    console.print("Profiler is already running")
+            elif cmd_args == "stop":
+                if not session.profiling:
+                    console.print("Profiler is not running")
+                else:
+                    path = session.stop_profiler()
+                    profiler = session.profiler
+                    console.print(
+                        f"[success]Profiler stopped ({profiler.samples} samples)[/success]"
+                    )
+                    for name, share in profiler.top():
+                        console.print(f"   {name}: {share}%")
+                    if path:
+                        console.print(f"Collapsed stacks written to {path}")
+            else:
+                state = "running" if session.profiling else "stopped"
+                console.print(f"Profiler is {state}. Usage: /profile start|stop")
         elif cmd_name == "/tools":
             tools = self.agent.session.tool_registry.get_tools()
             console.print(f"\n[bold]Available tools ({len(tools)}) [/bold]")
@@ -177,127 +225,151 @@ class CLI:
             console.print(f"\n[bold]MCP Servers ({len(mcp_servers)}) [/bold]")
             for server in mcp_servers:
                 status = server["status"]
-                status_color = "green" if status == "connected" else "red"
+                status_color = {
+                    "connected": "green",
+                    "idle": "yellow",
+                    "reconnecting": "yellow",
+                }.get(status, "red")
                 console.print(
                     f"  • {server['name']}: [{status_color}]{status}[/{status_color}] ({server['tools']} tools)"
                 )
+                stats = server["stats"]
+                if stats["calls"] or stats["reconnects"]:
+                    latency = (
+                        f", p50 {stats['p50_ms']}ms, p90 {stats['p90_ms']}ms"
+                        if "p50_ms" in stats
+                        else ""
+                    )
+                    console.print(
+                        f"      calls: {stats['calls']}, errors: {stats['errors']}, "
+                        f"reconnects: {stats['reconnects']}, "
+                        f"in flight: {stats['in_flight']}{latency}"
+                    )
+                if stats.get("last_error"):
+                    console.print(f"      last error: {stats['last_error']}")
         elif cmd_name == "/save":
-            persistence_manager = PersistenceManager()
-            session_snapshot = SessionSnapshot(
-                session_id=self.agent.session.session_id,
-                created_at=self.agent.session.created_at,
-                updated_at=self.agent.session.updated_at,
-                turn_count=self.agent.session.turn_count,
-                messages=self.agent.session.context_manager.get_messages(),
-                total_usage=self.agent.session.context_manager.total_usage,
-            )
-            persistence_manager.save_session(session_snapshot)
+            if self.agent.session.journal:
+                await self.agent.session.save(force_sync=True)
+            else:
+                persistence_manager = self.agent.session.persistence_manager
+                persistence_manager.save_session(self.agent.session.snapshot())
             console.print(
                 f"[success]Session saved: {self.agent.session.session_id}[/success]"
             )
         elif cmd_name == "/sessions":
-            persistence_manager = PersistenceManager()
-            sessions = persistence_manager.list_sessions()
-            console.print("\n[bold]Saved Sessions[/bold]")
+            page, cwd, terms = 1, None, []
+            tokens = iter(cmd_args.split())
+            for token in tokens:
+                if token == "--page":
+                    value = next(tokens, "1")
+                    page = max(1, int(value)) if value.isdigit() else 1
+                elif token == "--here":
+                    cwd = str(self.config.cwd)
+                else:
+                    terms.append(token)
+
+            page_size = 20
+            persistence_manager = self.agent.session.persistence_manager
+            sessions, total = persistence_manager.list_sessions(
+                limit=page_size,
+                offset=(page - 1) * page_size,
+                search=" ".join(terms) or None,
+                cwd=cwd,
+            )
+            pages = max(1, -(-total // page_size))
+            console.print(
+                f"\n[bold]Saved Sessions ({total}, page {page}/{pages})[/bold]"
+            )
             for s in sessions:
                 console.print(
                     f"  • {s['session_id']} (turns: {s['turn_count']}, updated: {s['updated_at']})"
                 )
+                if s["first_message"]:
+                    console.print(f"      {s['first_message'].splitlines()[0][:80]}")
+            if page < pages:
+                hint = [*terms, *(["--here"] if cwd else []), "--page", str(page + 1)]
+                console.print(f"Next page: /sessions {' '.join(hint)}")
         elif cmd_name == "/resume":
             if not cmd_args:
                 console.print(f"[error]Usage: /resume <session_id> [/error]")
             else:
-                persistence_manager = PersistenceManager()
+                persistence_manager = self.agent.session.persistence_manager
                 snapshot = persistence_manager.load_session(cmd_args)
                 if not snapshot:
                     console.print(f"[error]Session does not exist [/error]")
                 else:
-                    session = Session(
-                        config=self.config,
-                    )
-                    await session.initialize()
-                    session.session_id = snapshot.session_id
-                    session.created_at = snapshot.created_at
-                    session.updated_at = snapshot.updated_at
-                    session.turn_count = snapshot.turn_count
-                    session.context_manager.total_usage = snapshot.total_usage
-
-                    for msg in snapshot.messages:
-                        if msg.get("role") == "system":
-                            continue
-                        elif msg["role"] == "user":
-                            session.context_manager.add_user_message(
-                                msg.get("content", "")
-                            )
-                        elif msg["role"] == "assistant":
-                            session.context_manager.add_assistant_message(
-                                msg.get("content", ""), msg.get("tool_calls")
-                            )
-                        elif msg["role"] == "tool":
-                            session.context_manager.add_tool_result(
-                                msg.get("tool_call_id", ""), msg.get("content", "")
-                            )
-
-                    await self.agent.session.client.close()
-                    await self.agent.session.mcp_manager.shutdown()
-
-                    self.agent.session = session
+                    session = self.agent.session
+                    await session.restore(snapshot)
                     console.print(
                         f"[success]Resumed session: {session.session_id}[/success]"
                     )
         elif cmd_name == "/checkpoint":
-            persistence_manager = PersistenceManager()
-            session_snapshot = SessionSnapshot(
-                session_id=self.agent.session.session_id,
-                created_at=self.agent.session.created_at,
-                updated_at=self.agent.session.updated_at,
-                turn_count=self.agent.session.turn_count,
-                messages=self.agent.session.context_manager.get_messages(),
-                total_usage=self.agent.session.context_manager.total_usage,
-            )
-            checkpoint_id = persistence_manager.save_checkpoint(session_snapshot)
-            console.print(f"[success]Checkpoint created: {checkpoint_id}[/success]")
+            persistence_manager = self.agent.session.persistence_manager
+            action, _, rest = cmd_args.partition(" ")
+            if action == "export" and rest:
+                # The target path keeps the case it was typed in.
+                export_args = command.split(maxsplit=3)[2:]
+                checkpoint_id = export_args[0]
+                path = Path(
+                    export_args[1].strip()
+                    if len(export_args) > 1
+                    else f"{checkpoint_id}.checkpoint.json.gz"
+                ).expanduser()
+                if not path.is_absolute():
+                    path = self.config.cwd / path
+                exported = persistence_manager.export_checkpoint(checkpoint_id, path)
+                if exported is None:
+                    console.print(f"[error]Checkpoint does not exist [/error]")
+                else:
+                    console.print(
+                        f"[success]Checkpoint exported to {exported}[/success]"
+                    )
+            elif action == "delete" and rest:
+                if persistence_manager.delete_checkpoint(rest.strip()):
+                    console.print(
+                        f"[success]Checkpoint deleted: {rest.strip()}[/success]"
+                    )
+                else:
+                    console.print(f"[error]Checkpoint does not exist [/error]")
+            elif action == "gc":
+                result = persistence_manager.gc_checkpoints()
+                blobs = await asyncio.to_thread(
+                    persistence_manager.gc_blobs,
+                    self.agent.session.context_manager.live_blobs,
+                )
+                console.print(
+                    f"[success]Removed {result.blocks_removed} unreferenced blocks "
+                    f"({result.bytes_freed / 1024:.1f} KiB) and "
+                    f"{blobs.blocks_removed} unreferenced blobs "
+                    f"({blobs.bytes_freed / 1024:.1f} KiB)[/success]"
+                )
+            else:
+                checkpoint_id = await self.agent.session.checkpoint()
+                if checkpoint_id is None:
+                    checkpoint_id = persistence_manager.save_checkpoint(
+                        self.agent.session.snapshot()
+                    )
+                console.print(f"[success]Checkpoint created: {checkpoint_id}[/success]")
         elif cmd_name == "/restore":
             if not cmd_args:
                 console.print(f"[error]Usage: /restire <checkpoint_id> [/error]")
             else:
-                persistence_manager = PersistenceManager()
-                snapshot = persistence_manager.load_checkpoint(cmd_args)
+                persistence_manager = self.agent.session.persistence_manager
+                target = command.split(maxsplit=1)[1].strip()
+                path = Path(target).expanduser()
+                if not path.is_absolute():
+                    path = self.config.cwd / path
+                if path.suffix in (".json", ".gz") and path.is_file():
+                    snapshot = persistence_manager.load_checkpoint_file(path)
+                else:
+                    snapshot = persistence_manager.load_checkpoint(target)
                 if not snapshot:
                     console.print(f"[error]Checkpoint does not exist [/error]")
                 else:
-                    session = Session(
-                        config=self.config,
-                    )
-                    await session.initialize()
-                    session.session_id = snapshot.session_id
-                    session.created_at = snapshot.created_at
-                    session.updated_at = snapshot.updated_at
-                    session.turn_count = snapshot.turn_count
-                    session.context_manager.total_usage = snapshot.total_usage
-
-                    for msg in snapshot.messages:
-                        if msg.get("role") == "system":
-                            continue
-                        elif msg["role"] == "user":
-                            session.context_manager.add_user_message(
-                                msg.get("content", "")
-                            )
-                        elif msg["role"] == "assistant":
-                            session.context_manager.add_assistant_message(
-                                msg.get("content", ""), msg.get("tool_calls")
-                            )
-                        elif msg["role"] == "tool":
-                            session.context_manager.add_tool_result(
-                                msg.get("tool_call_id", ""), msg.get("content", "")
-                            )
-
-                    await self.agent.session.client.close()
-                    await self.agent.session.mcp_manager.shutdown()
-
-                    self.agent.session = session
+                    session = self.agent.session
+                    await session.restore(snapshot)
                     console.print(
-                        f"[success]Resumed session: {session.session_id}, checkpoint: {checkpoint_id}[/success]"
+                        f"[success]Resumed session: {session.session_id}, checkpoint: {target}[/success]"
                     )
         else:
             console.print(f"[error]Unknown command: {cmd_name}[/error]")
@@ -342,4 +414,5 @@ def main(
         asyncio.run(cli.run_interactive())
 
 
-main()
+if __name__ == "__main__":
+    main()
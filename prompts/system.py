@@ -282,7 +282,8 @@ You have access to the following tools to accomplish your tasks:
    - Sub-agents run with isolated context and have limited tool access
    - Provide clear, specific goals when invoking sub-agents
    - For simple queries (like finding a specific function), use direct tools (`grep`, `read_file`) instead
-   - Use sub-agents when the task involves complex refactoring, codebase exploration, or system-wide analysis"""
+   - Use sub-agents when the task involves complex refactoring, codebase exploration, or system-wide analysis
+   - Use `subagent_batch` to split an investigation into independent goals that run in parallel"""
 
     return guidelines
 
@@ -316,6 +317,32 @@ IMPORTANT: Structure your response EXACTLY as follows:
 Be extremely specific with file paths and function names. The goal is to allow seamless continuation without redoing any completed work."""
 
 
+def get_chunk_summary_prompt() -> str:
+    return """Summarize the following segment of an ongoing conversation. The segment will be removed from the context and replaced by your summary; the most recent messages are kept separately.
+
+IMPORTANT: Structure your response EXACTLY as follows:
+
+## GOAL
+[The user's request(s) made in this segment, if any]
+
+## COMPLETED ACTIONS (DO NOT REPEAT THESE)
+[Specific actions completed in this segment: file paths, function names, commands run, changes made. Use bullet points.]
+
+## FINDINGS
+[Facts learned from tool results that later work depends on: file contents, errors, decisions, user preferences.]
+
+## OPEN ITEMS
+[Anything started but not finished in this segment.]
+
+Be concise but extremely specific with file paths and function names. Omit sections that would be empty."""
+
+
+def get_summary_merge_prompt() -> str:
+    return """Merge the following consecutive conversation summaries, oldest first, into a single summary with the same structure (GOAL, COMPLETED ACTIONS, FINDINGS, OPEN ITEMS).
+
+Keep every completed action, file path and decision that is still relevant. Drop open items that a later summary shows were completed, and drop details superseded by later summaries."""
+
+
 def create_loop_breaker_prompt(loop_description: str) -> str:
     return f"""
 [SYSTEM NOTICE: Loop Detected]
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 import re
+import time
 from typing import Any, Awaitable, Callable
 from config.config import ApprovalPolicy
 from tools.base import ToolConfirmation
@@ -99,6 +100,7 @@ class ApprovalManager:
         self.approval_policy = approval_policy
         self.cwd = cwd
         self.confirmation_callback = confirmation_callback
+        self.total_wait_time = 0.0
 
     def _assess_command_safety(self, command: str) -> ApprovalDecision:
         if self.approval_policy == ApprovalPolicy.YOLO:
@@ -151,7 +153,10 @@ class ApprovalManager:
 
     def request_confirmation(self, confirmation: ToolConfirmation) -> bool:
         if self.confirmation_callback:
-            result = self.confirmation_callback(confirmation)
-            return result
+            started = time.perf_counter()
+            try:
+                return self.confirmation_callback(confirmation)
+            finally:
+                self.total_wait_time += time.perf_counter() - started
 
         return True
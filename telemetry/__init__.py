@@ -0,0 +1,13 @@
+from telemetry.metrics import MetricsRegistry, get_metrics
+from telemetry.tracing import Span, Tracer, current_span, get_tracer, span, traced
+
+__all__ = [
+    "MetricsRegistry",
+    "Span",
+    "Tracer",
+    "current_span",
+    "get_metrics",
+    "get_tracer",
+    "span",
+    "traced",
+]
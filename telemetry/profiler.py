@@ -0,0 +1,202 @@
+from __future__ import annotations
+import asyncio
+from collections import Counter
+from datetime import datetime
+import logging
+import os
+from pathlib import Path
+import sys
+import threading
+from types import FrameType
+
+from telemetry.tracing import Span, get_tracer
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 128
+_LABEL_ATTRIBUTES = ("tool", "hook", "model")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def _span_label(span: Span) -> str:
+    for key in _LABEL_ATTRIBUTES:
+        value = span.attributes.get(key)
+        if value:
+            return f"{span.name}[{value}]"
+
+    return span.name
+
+
+def _walk(frame: FrameType | None) -> list[str]:
+    stack: list[str] = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    # Samples the loop thread from a background thread into collapsed stacks;
+    # loop samples are prefixed with the running task and its open spans.
+    def __init__(
+        self,
+        output_dir: Path,
+        interval: float = 0.005,
+        all_threads: bool = False,
+        label: str = "profile",
+    ) -> None:
+        self.output_dir = output_dir
+        self.interval = interval
+        self.all_threads = all_threads
+        self.label = label
+        self.samples = 0
+        self._counts: Counter[str] = Counter()
+        self._task_spans: dict[asyncio.Task, list[Span]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._started_at: datetime | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._started_at = datetime.now()
+        self._stop_event.clear()
+
+        tracer = get_tracer()
+        tracer.add_listener(
+            on_finish=self._on_span_finish, on_start=self._on_span_start
+        )
+        tracer.enable()
+
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> Path | None:
+        if self._thread is None:
+            return None
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+        tracer = get_tracer()
+        tracer.disable()
+        tracer.remove_listener(
+            on_finish=self._on_span_finish, on_start=self._on_span_start
+        )
+        self._task_spans.clear()
+
+        if not self._counts:
+            return None
+
+        return self.write()
+
+    def write(self) -> Path:
+        started = self._started_at or datetime.now()
+        path = self.output_dir / (
+            f"{self.label}_{started.strftime('%Y%m%d_%H%M%S')}.collapsed"
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fp:
+            for stack, count in sorted(self._counts.items()):
+                fp.write(f"{stack} {count}\n")
+
+        return path
+
+    def top(self, limit: int = 10) -> list[tuple[str, float]]:
+        # Inclusive share of samples per span/task prefix, i.e. per tool or
+        # LLM phase, which is what /profile stop reports.
+        totals: Counter[str] = Counter()
+        for stack, count in self._counts.items():
+            seen: set[str] = set()
+            for frame in stack.split(";"):
+                if frame.startswith("task:") or "(" in frame or frame in seen:
+                    continue
+                seen.add(frame)
+                totals[frame] += count
+
+        if not self.samples:
+            return []
+
+        return [
+            (name, round(count / self.samples * 100, 1))
+            for name, count in totals.most_common(limit)
+        ]
+
+    def _on_span_start(self, span: Span) -> None:
+        task = self._task()
+        if task is not None:
+            self._task_spans.setdefault(task, []).append(span)
+
+    def _on_span_finish(self, span: Span) -> None:
+        task = self._task()
+        if task is None:
+            return
+
+        spans = self._task_spans.get(task)
+        if not spans:
+            return
+
+        if span in spans:
+            spans.remove(span)
+        if not spans:
+            del self._task_spans[task]
+
+    def _task(self) -> asyncio.Task | None:
+        try:
+            return asyncio.current_task()
+        except RuntimeError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                logger.exception("Profiler sample failed")
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        sampler_id = threading.get_ident()
+        self.samples += 1
+
+        loop_frame = frames.get(self._loop_thread_id)
+        if loop_frame is not None:
+            self._counts[";".join(self._loop_prefix() + _walk(loop_frame))] += 1
+
+        if not self.all_threads:
+            return
+
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in frames.items():
+            if thread_id in (sampler_id, self._loop_thread_id):
+                continue
+            prefix = f"thread:{names.get(thread_id, thread_id)}"
+            self._counts[";".join([prefix] + _walk(frame))] += 1
+
+    def _loop_prefix(self) -> list[str]:
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return ["task:<idle>"]
+
+        spans = list(self._task_spans.get(task, ()))
+        return [f"task:{task.get_name()}"] + [_span_label(s) for s in spans]
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+
+from config.config import TelemetryConfig
+from config.loader import get_data_dir
+from telemetry.metrics import get_metrics
+from telemetry.tracing import Span, get_tracer
+from utils.loop_lag import LoopLagMonitor
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryRuntime:
+    def __init__(self, config: TelemetryConfig) -> None:
+        self.config = config
+        telemetry_dir = get_data_dir() / "telemetry"
+        self.trace_file = Path(config.trace_file or telemetry_dir / "traces.jsonl")
+        self.metrics_file = Path(config.metrics_file or telemetry_dir / "metrics.prom")
+        self._pending: list[dict] = []
+        self._flush_task: asyncio.Task | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._loop_lag_monitor: LoopLagMonitor | None = None
+
+    def _on_span_finish(self, span: Span) -> None:
+        metrics = get_metrics()
+        metrics.observe("span_duration_seconds", span.duration or 0.0, name=span.name)
+        if span.error:
+            metrics.increment("span_errors_total", name=span.name)
+
+        if self.config.export_traces:
+            self._pending.append(span.to_dict())
+
+    async def start(self) -> None:
+        tracer = get_tracer()
+        tracer.add_listener(on_finish=self._on_span_finish)
+        tracer.enable()
+        get_metrics().enabled = True
+
+        self._flush_task = asyncio.create_task(
+            self._flush_loop(), name="telemetry-flush"
+        )
+
+        if self.config.loop_lag_sampler:
+            self._loop_lag_monitor = LoopLagMonitor(
+                interval=self.config.loop_lag_interval_sec,
+                warn_threshold_ms=self.config.loop_lag_warn_ms,
+                export_metrics=True,
+            )
+            self._loop_lag_monitor.start()
+
+        if self.config.metrics_port is not None:
+            try:
+                self._server = await asyncio.start_server(
+                    self._handle_metrics_request,
+                    host=self.config.metrics_host,
+                    port=self.config.metrics_port,
+                )
+            except OSError as e:
+                logger.warning(f"Could not start metrics endpoint: {e}")
+
+    async def stop(self) -> None:
+        tracer = get_tracer()
+        tracer.disable()
+        tracer.remove_listener(on_finish=self._on_span_finish)
+
+        if self._loop_lag_monitor:
+            await self._loop_lag_monitor.stop()
+            self._loop_lag_monitor = None
+
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        await asyncio.to_thread(self.flush)
+        get_metrics().enabled = False
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.flush_interval_sec)
+            try:
+                await asyncio.to_thread(self.flush)
+            except OSError as e:
+                logger.warning(f"Failed to flush telemetry: {e}")
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, []
+
+        if pending:
+            self.trace_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.trace_file, "a", encoding="utf-8") as fp:
+                for record in pending:
+                    fp.write(json.dumps(record, default=str) + "\n")
+
+        if self.config.export_metrics:
+            self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.metrics_file.with_suffix(".tmp")
+            tmp_path.write_text(get_metrics().render_prometheus(), encoding="utf-8")
+            os.replace(tmp_path, self.metrics_file)
+
+    async def _handle_metrics_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+            body = get_metrics().render_prometheus().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode("ascii")
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            asyncio.TimeoutError,
+            OSError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+
+_runtime: TelemetryRuntime | None = None
+_refs = 0
+
+
+async def start_telemetry(config: TelemetryConfig) -> None:
+    global _runtime, _refs
+
+    _refs += 1
+    if _runtime is None:
+        _runtime = TelemetryRuntime(config)
+        await _runtime.start()
+
+
+async def stop_telemetry() -> None:
+    global _runtime, _refs
+
+    if _refs == 0:
+        return
+
+    _refs -= 1
+    if _refs == 0 and _runtime is not None:
+        runtime, _runtime = _runtime, None
+        await runtime.stop()
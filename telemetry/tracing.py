@@ -0,0 +1,273 @@
+from __future__ import annotations
+import contextlib
+import contextvars
+from dataclasses import dataclass, field
+import functools
+import inspect
+import logging
+import os
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time: float = field(default_factory=time.time)
+    attributes: dict[str, Any] = field(default_factory=dict)
+    duration: float | None = None
+    error: str | None = None
+
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": (
+                round(self.duration * 1000, 3) if self.duration is not None else None
+            ),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    name = ""
+    attributes: dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def elapsed(self) -> float:
+        return 0.0
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _new_id() -> str:
+    return os.urandom(8).hex()
+
+
+class _SpanScope:
+    def __init__(self, tracer: Tracer, name: str, attributes: dict[str, Any]):
+        self._tracer = tracer
+        self._name = name
+        self._attributes = attributes
+        self._span: Span | None = None
+        self._token: contextvars.Token | None = None
+
+    def _start(self) -> Span:
+        parent = _current_span.get()
+        self._span = Span(
+            name=self._name,
+            trace_id=parent.trace_id if parent else _new_id(),
+            span_id=_new_id(),
+            parent_id=parent.span_id if parent else None,
+            attributes=self._attributes,
+        )
+        self._tracer._on_start(self._span)
+        return self._span
+
+    def _finish(self, exc_val: BaseException | None) -> None:
+        span = self._span
+        span.duration = span.elapsed()
+        if exc_val is not None and not isinstance(exc_val, GeneratorExit):
+            span.error = f"{type(exc_val).__name__}: {exc_val}"
+
+        self._tracer._on_finish(span)
+
+    @contextlib.contextmanager
+    def _active(self):
+        token = _current_span.set(self._span)
+        try:
+            yield self._span
+        finally:
+            _current_span.reset(token)
+
+    def __enter__(self) -> Span:
+        span = self._start()
+        self._token = _current_span.set(span)
+        return span
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        _current_span.reset(self._token)
+        self._finish(exc_val)
+
+    async def __aenter__(self) -> Span:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class _NoopScope:
+    def __enter__(self) -> _NoopSpan:
+        return _NOOP_SPAN
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+    async def __aenter__(self) -> _NoopSpan:
+        return _NOOP_SPAN
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NOOP_SCOPE = _NoopScope()
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.enabled = False
+        self._users = 0
+        self._start_listeners: list[Callable[[Span], None]] = []
+        self._finish_listeners: list[Callable[[Span], None]] = []
+
+    def enable(self) -> None:
+        self._users += 1
+        self.enabled = True
+
+    def disable(self) -> None:
+        self._users = max(0, self._users - 1)
+        self.enabled = self._users > 0
+
+    def span(self, name: str, **attributes: Any) -> _SpanScope | _NoopScope:
+        if not self.enabled:
+            return _NOOP_SCOPE
+
+        return _SpanScope(self, name, attributes)
+
+    def add_listener(
+        self,
+        on_finish: Callable[[Span], None] | None = None,
+        on_start: Callable[[Span], None] | None = None,
+    ) -> None:
+        if on_start:
+            self._start_listeners.append(on_start)
+        if on_finish:
+            self._finish_listeners.append(on_finish)
+
+    def remove_listener(
+        self,
+        on_finish: Callable[[Span], None] | None = None,
+        on_start: Callable[[Span], None] | None = None,
+    ) -> None:
+        if on_start in self._start_listeners:
+            self._start_listeners.remove(on_start)
+        if on_finish in self._finish_listeners:
+            self._finish_listeners.remove(on_finish)
+
+    def _on_start(self, span: Span) -> None:
+        for listener in self._start_listeners:
+            try:
+                listener(span)
+            except Exception:
+                logger.exception("Span start listener failed")
+
+    def _on_finish(self, span: Span) -> None:
+        for listener in self._finish_listeners:
+            try:
+                listener(span)
+            except Exception:
+                logger.exception("Span finish listener failed")
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attributes: Any) -> _SpanScope | _NoopScope:
+    return _tracer.span(name, **attributes)
+
+
+def current_span() -> Span | _NoopSpan:
+    if not _tracer.enabled:
+        return _NOOP_SPAN
+
+    return _current_span.get() or _NOOP_SPAN
+
+
+def traced(name: str | None = None) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                async with contextlib.aclosing(func(*args, **kwargs)) as agen:
+                    if not _tracer.enabled:
+                        async for item in agen:
+                            yield item
+                        return
+
+                    # The span is current only while the generator runs, so
+                    # the consumer's other work never nests under it.
+                    scope = _tracer.span(span_name)
+                    scope._start()
+                    error: BaseException | None = None
+                    try:
+                        while True:
+                            with scope._active():
+                                try:
+                                    item = await anext(agen)
+                                except StopAsyncIteration:
+                                    break
+                            yield item
+                    except BaseException as e:
+                        error = e
+                        raise
+                    finally:
+                        with scope._active():
+                            await agen.aclose()
+                        scope._finish(error)
+
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _tracer.enabled:
+                    return await func(*args, **kwargs)
+
+                with _tracer.span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+
+            with _tracer.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
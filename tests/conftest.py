@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+
+class FakeMCPServer:
+    # Stands in for fastmcp.Client: every Client(...) is a session on this
+    # server, whose tools and health the tests change as they go.
+    def __init__(self) -> None:
+        self.tools = ["search"]
+        self.refuse_connects = 0
+        self.call_delay = 0.0
+        self.fail_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sessions: list[FakeMCPSession] = []
+        self.calls: list[str] = []
+
+    def client(self, transport=None):
+        session = FakeMCPSession(self)
+        self.sessions.append(session)
+        return session
+
+
+class FakeMCPSession:
+    def __init__(self, server: FakeMCPServer) -> None:
+        self.server = server
+        self.open = False
+
+    async def __aenter__(self):
+        if self.server.refuse_connects:
+            self.server.refuse_connects -= 1
+            raise ConnectionError("connection refused")
+        self.open = True
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.open = False
+
+    async def list_tools(self):
+        return [
+            SimpleNamespace(name=name, description=f"{name} tool", inputSchema={})
+            for name in self.server.tools
+        ]
+
+    def is_connected(self) -> bool:
+        return self.open
+
+    async def ping(self):
+        if not self.is_connected():
+            raise ConnectionError("server went away")
+
+    async def call_tool(self, name, arguments, **kwargs):
+        if not self.is_connected():
+            raise ConnectionError("broken pipe")
+        if self.server.fail_calls:
+            self.server.fail_calls -= 1
+            raise RuntimeError("request failed")
+        server = self.server
+        server.calls.append(name)
+        server.in_flight += 1
+        server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            await asyncio.sleep(server.call_delay)
+        finally:
+            server.in_flight -= 1
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=f"{name} ok")],
+            is_error=False,
+        )
+
+
+@pytest.fixture
+def mcp_server(monkeypatch, tmp_path):
+    server = FakeMCPServer()
+    monkeypatch.setattr("tools.mcp.client.Client", server.client)
+    monkeypatch.setattr(
+        "tools.mcp.client.MCPClient._create_transport", lambda client: None
+    )
+    monkeypatch.setattr("tools.mcp.mcp_manager.get_data_dir", lambda: tmp_path)
+    return server
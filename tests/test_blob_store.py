@@ -0,0 +1,46 @@
+import json
+from agent.persistence import PersistenceManager
+from context.blob_store import BlobStore
+
+
+def test_gc_keeps_referenced_and_recent_blobs(tmp_path):
+    store = BlobStore(tmp_path)
+    kept = store.put("kept")
+    recent = store.put("recent")
+
+    assert store.gc({kept}, grace_sec=3600) == (0, 0)
+    assert store.gc({kept}, grace_sec=0) == (1, len("recent"))
+    assert store.path(kept).exists()
+    assert not store.path(recent).exists()
+
+
+def test_release_skips_referenced_and_rewritten_blobs(tmp_path):
+    owner = BlobStore(tmp_path)
+    own = owner.put("only mine")
+    shared = owner.put("shared")
+    referenced = owner.put("still in the journal")
+    BlobStore(tmp_path).put("shared")
+
+    removed, _ = owner.release(owner.written, {referenced})
+
+    assert removed == 1
+    assert not owner.path(own).exists()
+    assert owner.path(shared).exists()
+    assert owner.path(referenced).exists()
+
+
+def test_release_blobs_reads_only_the_sessions_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.persistence.get_data_dir", lambda: tmp_path)
+    manager = PersistenceManager()
+    store = BlobStore(tmp_path / "blobs")
+    kept = store.put("kept body")
+    dropped = store.put("dropped body")
+    journal = manager.journals_dir / "s1"
+    journal.mkdir(parents=True)
+    (journal / "000000.jsonl").write_text(json.dumps({"blob": kept}) + "\n")
+
+    result = manager.release_blobs("s1", store.written)
+
+    assert result.blocks_removed == 1
+    assert store.path(kept).exists()
+    assert not store.path(dropped).exists()
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+from agent.catalog import SessionCatalog, SessionEntry
+from agent.persistence import PersistenceManager
+from agent.session import Session
+from config.config import Config
+import utils.text
+
+
+def entry(session_id, updated_at, **fields):
+    return SessionEntry(
+        session_id=session_id,
+        created_at="2026-01-01T00:00:00",
+        updated_at=updated_at,
+        **fields,
+    )
+
+
+@pytest.fixture(params=[True, False], ids=["fts", "like"])
+def catalog(request, tmp_path):
+    catalog = SessionCatalog(tmp_path / "sessions.db")
+    if not request.param:
+        catalog.has_fts = False
+    elif not catalog.has_fts:
+        pytest.skip("SQLite was built without FTS5")
+    catalog.upsert_many(
+        [
+            entry("a", "2026-01-01T10:00:00", cwd="/w/one", first_message="fix parser"),
+            entry("b", "2026-01-03T10:00:00", cwd="/w/two", first_message="add tests"),
+            entry(
+                "c", "2026-01-02T10:00:00", cwd="/w/one", first_message="parse dates"
+            ),
+        ]
+    )
+    yield catalog
+    catalog.close()
+
+
+def ids(result):
+    entries, total = result
+    return [e.session_id for e in entries], total
+
+
+def test_query_orders_filters_and_pages(catalog):
+    assert ids(catalog.query()) == (["b", "c", "a"], 3)
+    assert ids(catalog.query(limit=1, offset=1)) == (["c"], 3)
+    assert ids(catalog.query(cwd="/w/one")) == (["c", "a"], 2)
+    assert ids(catalog.query(since="2026-01-02")) == (["b", "c"], 2)
+
+
+def test_search(catalog):
+    assert ids(catalog.query(search="pars")) == (["c", "a"], 2)
+    assert ids(catalog.query(search="tests", cwd="/w/one")) == ([], 0)
+    # Search syntax in user input is matched literally.
+    assert ids(catalog.query(search='"fix OR')) == ([], 0)
+
+
+def test_upsert_keeps_first_message_and_updates_counts(catalog):
+    catalog.upsert(
+        entry("a", "2026-01-04T10:00:00", turn_count=3, first_message="other")
+    )
+
+    updated = catalog.get("a")
+    assert updated.turn_count == 3
+    assert updated.first_message == "fix parser"
+    assert updated.cwd == "/w/one"
+    assert ids(catalog.query(limit=1)) == (["a"], 3)
+
+    catalog.delete("a")
+    assert catalog.get("a") is None
+    assert ids(catalog.query(search="fix")) == ([], 0)
+
+
+def test_existing_sessions_are_imported_once(tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.persistence.get_data_dir", lambda: tmp_path)
+    sessions = tmp_path / "sessions"
+    sessions.mkdir()
+    (sessions / "old.json").write_text(
+        json.dumps(
+            {
+                "session_id": "old",
+                "created_at": "2026-01-01T00:00:00",
+                "updated_at": "2026-01-01T00:00:00",
+                "turn_count": 2,
+                "total_usage": {"total_tokens": 5},
+                "messages": [{"role": "user", "content": "hello"}],
+            }
+        )
+    )
+
+    listed, total = PersistenceManager().list_sessions()
+
+    assert total == 1
+    assert listed[0]["first_message"] == "hello"
+    assert listed[0]["total_tokens"] == 5
+
+
+def test_only_sessions_with_turns_are_listed(tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.persistence.get_data_dir", lambda: tmp_path)
+    monkeypatch.setattr("agent.session.get_data_dir", lambda: tmp_path)
+    monkeypatch.setattr(
+        utils.text, "get_tokenizer", lambda model: lambda text: text.split()
+    )
+
+    async def run(subagent, turns):
+        session = Session(Config(cwd=tmp_path), subagent=subagent)
+        await session.initialize()
+        session.context_manager.add_user_message("hello")
+        for _ in range(turns):
+            session.increment_turn()
+        await session.save()
+        await session.close()
+        return session.session_id
+
+    asyncio.run(run(subagent=False, turns=0))
+    asyncio.run(run(subagent=True, turns=1))
+    listed = asyncio.run(run(subagent=False, turns=1))
+
+    sessions, total = PersistenceManager().list_sessions()
+    assert total == 1
+    assert sessions[0]["session_id"] == listed
+    assert [p.name for p in (tmp_path / "journals").iterdir()] == [listed]
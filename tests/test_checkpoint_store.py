@@ -0,0 +1,118 @@
+from datetime import datetime
+import pytest
+from agent.checkpoint_store import CheckpointStore
+from agent.journal import JournalState, SessionJournal
+from agent.persistence import PersistenceManager, SessionSnapshot
+from client.response import TokenUsage
+
+
+def records(count, prefix="message"):
+    return [{"role": "user", "content": f"{prefix} {i}"} for i in range(count)]
+
+
+@pytest.mark.parametrize("codec", ["zlib", "none"])
+def test_blocks_round_trip_and_are_shared(tmp_path, codec):
+    store = CheckpointStore(tmp_path, codec=codec)
+    first = store.put_records(records(300))
+    blocks = store.size()
+    second = store.put_records(records(300) + records(5, "new"))
+
+    assert store.get_records(first) == records(300)
+    assert store.get_records(second) == records(300) + records(5, "new")
+    # Boundaries depend on content, so appending only adds the last block.
+    assert len(set(second) - set(first)) <= 2
+    assert store.size() < blocks * 1.5
+
+
+def test_zstd_falls_back_to_zlib_without_the_package(tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.checkpoint_store.zstandard", None)
+    store = CheckpointStore(tmp_path, codec="zstd")
+
+    assert store.codec == "zlib"
+    assert store.get_records(store.put_records(records(3))) == records(3)
+
+
+def test_gc_keeps_referenced_and_recent_blocks(tmp_path):
+    store = CheckpointStore(tmp_path, codec="zlib")
+    kept = store.put_records(records(50))
+    dropped = store.put_records(records(50, "other"))
+
+    assert store.gc(set(kept)).blocks_removed == 0
+    result = store.gc(set(kept), grace_sec=0)
+
+    assert result.blocks_removed == len(set(dropped) - set(kept))
+    assert result.bytes_freed > 0
+    assert store.get_records(kept) == records(50)
+
+
+@pytest.fixture
+def persistence(tmp_path, monkeypatch):
+    monkeypatch.setattr("agent.persistence.get_data_dir", lambda: tmp_path)
+    return PersistenceManager()
+
+
+def snapshot(session_id="s1", count=20):
+    now = datetime.now()
+    return SessionSnapshot(
+        session_id=session_id,
+        created_at=now,
+        updated_at=now,
+        turn_count=2,
+        total_usage=TokenUsage(10, 5, 15),
+        records=records(count),
+        summaries=[{"content": "summary"}],
+        turn_stats=[{"turn": 1}],
+        cwd="/work",
+    )
+
+
+def test_checkpoint_manifest_round_trip_and_gc(persistence):
+    checkpoint_id = persistence.save_checkpoint(snapshot())
+
+    loaded = persistence.load_checkpoint(checkpoint_id)
+    assert loaded.records == records(20)
+    assert loaded.summaries == [{"content": "summary"}]
+    assert loaded.total_usage.total_tokens == 15
+    assert loaded.cwd == "/work"
+
+    assert persistence.gc_checkpoints(grace_sec=0).blocks_removed == 0
+    persistence.delete_checkpoint(checkpoint_id)
+    assert persistence.gc_checkpoints(grace_sec=0).blocks_removed > 0
+
+
+def test_journal_checkpoints_survive_compaction(persistence):
+    journal = SessionJournal(persistence.journals_dir, "s1", fsync_interval=0)
+    now = datetime.now()
+    journal.open(JournalState(session_id="s1", created_at=now, updated_at=now))
+    journal.append("message", item={"role": "user", "content": "before"})
+    checkpoint_id = persistence.save_checkpoint_pointer(
+        "s1", journal.generation, journal.commit()
+    )
+    journal.append("message", item={"role": "user", "content": "after"})
+    journal.compact()
+
+    assert persistence.materialize_checkpoints("s1", journal.generation) == 1
+    journal.remove_generations(persistence.checkpoint_generations("s1"))
+    journal.close()
+
+    loaded = persistence.load_checkpoint(checkpoint_id)
+    assert loaded.records == [{"role": "user", "content": "before"}]
+    assert persistence.checkpoint_generations("s1") == set()
+
+
+@pytest.mark.parametrize("suffix", [".json", ".json.gz"])
+def test_export_inlines_blobs(persistence, tmp_path, suffix):
+    data = snapshot()
+    key = persistence.blob_store.put("spilled body")
+    data.records.append({"role": "tool", "tool_call_id": "c1", "blob": key})
+    checkpoint_id = persistence.save_checkpoint(data)
+
+    path = persistence.export_checkpoint(checkpoint_id, tmp_path / f"out{suffix}")
+    restored = persistence.load_checkpoint_file(path)
+
+    assert restored.records[-1] == {
+        "role": "tool",
+        "tool_call_id": "c1",
+        "content": "spilled body",
+    }
+    assert restored.records[:-1] == records(20)
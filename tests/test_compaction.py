@@ -0,0 +1,169 @@
+import asyncio
+import pytest
+from client.response import StreamEvent, StreamEventType, TextDelta, TokenUsage
+from config.config import Config
+from context.compaction import ChatCompactor
+from context.manager import ContextManager
+import utils.text
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    # tiktoken downloads its encodings on first use.
+    monkeypatch.setattr(
+        utils.text, "get_tokenizer", lambda model: lambda text: text.split()
+    )
+
+
+class SummaryClient:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.requests: list[str] = []
+
+    async def chat_completion(self, messages, tools=None, stream=True):
+        self.requests.append(messages[-1]["content"])
+        await asyncio.sleep(self.delay)
+        yield StreamEvent(
+            type=StreamEventType.MESSAGE_COMPLETE,
+            text_delta=TextDelta(f"summary {len(self.requests)}"),
+            usage=TokenUsage(10, 2, 12),
+        )
+
+
+def make_manager(tmp_path, turns, **compaction):
+    config = Config(cwd=tmp_path)
+    config.message_store.spill_threshold_chars = None
+    for key, value in compaction.items():
+        setattr(config.compaction, key, value)
+    manager = ContextManager(config, user_memory=None, tools=None)
+    for turn in range(turns):
+        add_turn(manager, turn)
+    return manager
+
+
+def add_turn(manager, turn):
+    manager.add_user_message(f"question {turn}")
+    manager.add_assistant_message(
+        "", [{"id": f"c{turn}", "type": "function", "function": {"name": "grep"}}]
+    )
+    manager.add_tool_result(f"c{turn}", f"result {turn}")
+    manager.add_assistant_message(f"answer {turn}")
+
+
+def test_aged_messages_end_on_a_turn_boundary(tmp_path):
+    manager = make_manager(tmp_path, 3)
+
+    # A turn starts at a user message, and again at the assistant reply
+    # that follows tool results.
+    assert manager.aged_message_count(6) == 0
+    assert manager.aged_message_count(2) == 8
+    assert manager._messages[8].content == "question 2"
+    assert manager.aged_message_count(1) == 11
+    assert manager._messages[10].role == "tool"
+
+
+def test_incremental_compaction_summarizes_only_aged_messages(tmp_path):
+    manager = make_manager(tmp_path, 3, keep_recent_turns=2)
+    client = SummaryClient()
+
+    usage = asyncio.run(ChatCompactor(client).compact_incremental(manager))
+
+    assert usage.total_tokens == 12
+    assert len(client.requests) == 1
+    assert "question 0" in client.requests[0]
+    assert "question 2" not in client.requests[0]
+    assert [s.content for s in manager.summaries] == ["summary 1"]
+    assert manager.summaries[0].message_count == 8
+    assert manager.get_messages()[1]["content"].endswith("summary 1")
+    assert manager.get_messages()[3]["content"] == "question 2"
+
+
+def test_summaries_merge_one_level_up(tmp_path):
+    manager = make_manager(tmp_path, 1, merge_fan_in=2)
+    for i in range(3):
+        manager.add_chunk_summary(f"chunk {i}", 0)
+
+    assert [s.content for s in manager.mergeable_summaries(2)] == [
+        "chunk 0",
+        "chunk 1",
+        "chunk 2",
+    ]
+    manager.merge_summaries(2, "merged")
+    assert [(s.content, s.level) for s in manager.summaries] == [
+        ("chunk 0", 0),
+        ("merged", 1),
+    ]
+    assert manager.mergeable_summaries(2) == []
+
+    manager.add_chunk_summary("chunk 3", 0)
+    manager.add_chunk_summary("chunk 4", 0)
+    manager.merge_summaries(2, "merged again")
+    assert [s.level for s in manager.mergeable_summaries(2)] == [1, 1]
+
+
+def test_incremental_compaction_merges_full_levels(tmp_path):
+    manager = make_manager(tmp_path, 3, keep_recent_turns=1, merge_fan_in=2)
+    manager.add_chunk_summary("earlier", 0)
+    client = SummaryClient()
+
+    asyncio.run(ChatCompactor(client).compact_incremental(manager))
+
+    assert len(client.requests) == 2
+    assert [(s.content, s.level) for s in manager.summaries] == [("summary 2", 1)]
+    assert client.requests[1] == "earlier\n\n---\n\nsummary 1"
+
+
+def test_background_compaction_applies_at_turn_boundary(tmp_path):
+    manager = make_manager(
+        tmp_path, 3, keep_recent_turns=1, background_threshold=0.000001
+    )
+    compactor = ChatCompactor(SummaryClient())
+
+    async def go():
+        assert compactor.start_background(manager)
+        assert not compactor.start_background(manager)
+        assert compactor.apply_background(manager) is None
+        return await compactor.finish_background(manager)
+
+    usage = asyncio.run(go())
+
+    assert usage.total_tokens == 12
+    assert not compactor.background_running
+    assert [s.content for s in manager.summaries] == ["summary 1"]
+    assert manager.message_count == 1
+
+
+def test_stale_background_compaction_is_discarded(tmp_path):
+    manager = make_manager(
+        tmp_path, 3, keep_recent_turns=1, background_threshold=0.000001
+    )
+    compactor = ChatCompactor(SummaryClient())
+
+    async def go():
+        compactor.start_background(manager)
+        manager.add_chunk_summary("foreground", 2)
+        return await compactor.finish_background(manager)
+
+    usage = asyncio.run(go())
+
+    # The usage is still reported, but the summary is not applied.
+    assert usage.total_tokens == 12
+    assert [s.content for s in manager.summaries] == ["foreground"]
+
+
+def test_cancel_background_compaction(tmp_path):
+    manager = make_manager(
+        tmp_path, 3, keep_recent_turns=1, background_threshold=0.000001
+    )
+    compactor = ChatCompactor(SummaryClient(delay=10))
+
+    async def go():
+        compactor.start_background(manager)
+        await asyncio.sleep(0)
+        assert compactor.background_running
+        await compactor.cancel_background()
+        return await compactor.finish_background(manager)
+
+    assert asyncio.run(go()) is None
+    assert manager.summaries == []
+    assert manager.message_count == 12
@@ -0,0 +1,149 @@
+import pytest
+from config.config import Config
+from context.manager import ContextManager
+from context.pruning import PruningPolicy
+import utils.text
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    # tiktoken downloads its encodings on first use.
+    monkeypatch.setattr(
+        utils.text, "get_tokenizer", lambda model: lambda text: text.split()
+    )
+
+
+@pytest.fixture
+def manager(tmp_path):
+    config = Config(cwd=tmp_path)
+    config.message_store.spill_threshold_chars = None
+    return ContextManager(config, user_memory=None, tools=None)
+
+
+OUTPUT = "def foo():\n    return 1\n" * 40
+
+
+def tool_turn(manager, call_id, content, path=None, supersede=False):
+    manager.add_assistant_message(
+        "", [{"id": call_id, "type": "function", "function": {"name": "read_file"}}]
+    )
+    manager.add_tool_result(call_id, content, "read_file", path, supersede)
+
+
+def prune_one(manager):
+    # Leaves just enough excess that only the lowest scored result is pruned.
+    total = sum(m.token_count for m in manager._messages if m.role == "tool")
+    manager.pruning_policy = PruningPolicy(protect_tokens=total - 1, minimum_tokens=1)
+    return manager.prune_tool_outputs()
+
+
+def tool_outputs(manager):
+    return {
+        m["tool_call_id"]: m["content"]
+        for m in manager.get_messages()
+        if m["role"] == "tool"
+    }
+
+
+def test_duplicate_output_becomes_reference(manager):
+    manager.add_user_message("look")
+    tool_turn(manager, "c1", OUTPUT)
+    tool_turn(manager, "c2", OUTPUT)
+
+    outputs = tool_outputs(manager)
+    assert outputs["c1"] == OUTPUT
+    assert outputs["c2"] == "[Output identical to the result of tool call c1 above]"
+
+
+def test_compacting_past_original_keeps_content(manager):
+    manager.add_user_message("look")
+    tool_turn(manager, "c1", OUTPUT)
+    manager.add_user_message("again")
+    tool_turn(manager, "c6", OUTPUT)
+    tool_turn(manager, "c7", OUTPUT)
+
+    manager.add_chunk_summary("summary", 3)
+
+    outputs = tool_outputs(manager)
+    assert "c1" not in outputs
+    assert outputs["c7"] == OUTPUT
+    assert outputs["c6"] == "[Output identical to the result of tool call c7 below]"
+
+    # c7 is now the original, so a later duplicate points at it.
+    tool_turn(manager, "c8", OUTPUT)
+    assert "c7" in tool_outputs(manager)["c8"]
+
+
+def test_compacting_original_and_references_together(manager):
+    manager.add_user_message("look")
+    tool_turn(manager, "c1", OUTPUT)
+    tool_turn(manager, "c2", OUTPUT)
+    manager.add_user_message("next")
+    tool_turn(manager, "c3", OUTPUT)
+
+    manager.add_chunk_summary("summary", 5)
+
+    assert tool_outputs(manager) == {"c3": OUTPUT}
+
+
+def test_superseded_read_is_left_in_place(manager):
+    updates = []
+    manager.add_listener(lambda op, payload: updates.append(op))
+    manager.add_user_message("look")
+    tool_turn(manager, "c1", OUTPUT, path="a.py", supersede=True)
+    tool_turn(manager, "c2", OUTPUT)
+    tool_turn(manager, "c3", "changed\n" * 200, path="a.py", supersede=True)
+
+    outputs = tool_outputs(manager)
+    assert outputs["c1"] == OUTPUT
+    assert outputs["c2"] == "[Output identical to the result of tool call c1 above]"
+    assert "update" not in updates
+
+
+def test_pruning_clears_superseded_read_first(manager):
+    manager.add_user_message("look")
+    tool_turn(manager, "c1", OUTPUT, path="a.py", supersede=True)
+    tool_turn(manager, "c2", OUTPUT)
+    manager.add_user_message("again")
+    tool_turn(manager, "c3", "changed\n" * 200, path="a.py", supersede=True)
+    tool_turn(manager, "c4", "done")
+
+    assert prune_one(manager) == 1
+    outputs = tool_outputs(manager)
+    assert outputs["c1"] == "[Superseded: a.py was read again in tool call c3]"
+    assert outputs["c2"] == OUTPUT
+
+
+def test_restored_references_are_tracked(manager, tmp_path):
+    manager.add_user_message("look")
+    tool_turn(manager, "c1", OUTPUT)
+    manager.add_user_message("again")
+    tool_turn(manager, "c2", OUTPUT)
+    records, summaries = manager.to_records()
+
+    config = Config(cwd=tmp_path)
+    config.message_store.spill_threshold_chars = None
+    restored = ContextManager(config, user_memory=None, tools=None)
+    restored.restore(records, summaries)
+    restored.add_chunk_summary("summary", 3)
+
+    assert tool_outputs(restored) == {"c2": OUTPUT}
+
+
+def test_rewrite_reports_message_index(manager):
+    updates = []
+    manager.add_listener(
+        lambda op, payload: updates.append(payload["index"]) if op == "update" else None
+    )
+    manager.add_user_message("look")
+    tool_turn(manager, "c1", OUTPUT)
+    manager.add_user_message("again")
+    tool_turn(manager, "c2", OUTPUT)
+    manager.add_chunk_summary("summary", 3)
+    tool_turn(manager, "c3", "other\n" * 200, path="a.py", supersede=True)
+    manager.add_user_message("more")
+    tool_turn(manager, "c4", "newer\n" * 200, path="a.py", supersede=True)
+    prune_one(manager)
+
+    # c2 is message 5 before the summary; c3 is message 4 after it.
+    assert updates == [5, 4]
@@ -0,0 +1,131 @@
+import asyncio
+import shlex
+import sys
+import pytest
+from config.config import Config, HookConfig
+from hooks.hook_system import HookSystem
+from hooks.hook_worker import HookWorker
+
+# Logs every event it is sent and answers with the event count. A "stop"
+# event makes it exit without answering; a "hang" event is never answered.
+WORKER = """
+import json, sys
+count = 0
+for line in sys.stdin:
+    event = json.loads(line)
+    with open("events.log", "a") as log:
+        log.write(event.get("tool_name", "") + "\\n")
+    if event.get("tool_name") == "stop":
+        break
+    if event.get("tool_name") == "hang":
+        continue
+    count += 1
+    print(count, flush=True)
+"""
+
+
+@pytest.fixture
+def worker_command(tmp_path):
+    script = tmp_path / "worker.py"
+    script.write_text(WORKER)
+    return f"{shlex.quote(sys.executable)} {shlex.quote(str(script))}"
+
+
+def hook_system(tmp_path, *hooks):
+    return HookSystem(Config(cwd=tmp_path, hooks_enabled=True, hooks=list(hooks)))
+
+
+def logged(tmp_path):
+    return (tmp_path / "events.log").read_text().split()
+
+
+def test_persistent_hook_reuses_one_worker(tmp_path, worker_command):
+    hook = HookConfig(
+        name="audit", trigger="before_tool", command=worker_command, mode="persistent"
+    )
+    hooks = hook_system(tmp_path, hook)
+
+    async def go():
+        for tool in ("read_file", "grep", "shell"):
+            await hooks.trigger_before_tool(tool, {})
+        worker = hooks._workers[id(hook)]
+        await hooks.close()
+        return worker
+
+    worker = asyncio.run(go())
+
+    assert worker.started == 1
+    assert not worker.alive
+    assert logged(tmp_path) == ["read_file", "grep", "shell"]
+
+
+def test_worker_is_restarted_after_it_exits(tmp_path, worker_command):
+    worker = HookWorker(worker_command, tmp_path, env=None)
+
+    async def go():
+        first = await worker.send({"tool_name": "a"}, timeout=10)
+        with pytest.raises(RuntimeError, match="exited"):
+            await worker.send({"tool_name": "stop"}, timeout=10)
+        # The replacement starts counting again.
+        second = await worker.send({"tool_name": "b"}, timeout=10)
+        await worker.close()
+        return first, second
+
+    assert asyncio.run(go()) == ("1", "1")
+    assert worker.started == 2
+
+
+def test_worker_that_misses_the_timeout_is_killed(tmp_path, worker_command):
+    worker = HookWorker(worker_command, tmp_path, env=None)
+
+    async def go():
+        await worker.send({"tool_name": "a"}, timeout=10)
+        with pytest.raises(TimeoutError):
+            await worker.send({"tool_name": "hang"}, timeout=0.5)
+        dead = worker.alive
+        # The late reply must not answer this event.
+        reply = await worker.send({"tool_name": "b"}, timeout=10)
+        await worker.close()
+        return dead, reply
+
+    assert asyncio.run(go()) == (False, "1")
+    assert worker.started == 2
+
+
+def test_scripts_are_written_once_per_hook(tmp_path):
+    # Same name, different scripts: the cache must not mix them up.
+    first = HookConfig(
+        name="log", trigger="after_agent", script='echo first >> "$AI_AGENT_CWD/out"'
+    )
+    second = HookConfig(
+        name="log", trigger="after_agent", script='echo second >> "$AI_AGENT_CWD/out"'
+    )
+    hooks = hook_system(tmp_path, first, second)
+
+    async def go():
+        for _ in range(2):
+            await hooks.trigger_after_agent("hi", "done")
+        script_dir = hooks._script_dir
+        scripts = sorted(p.name for p in script_dir.iterdir())
+        await hooks.close()
+        return script_dir, scripts
+
+    script_dir, scripts = asyncio.run(go())
+
+    assert scripts == ["0.sh", "1.sh"]
+    assert (tmp_path / "out").read_text().split() == [
+        "first",
+        "second",
+        "first",
+        "second",
+    ]
+    assert not script_dir.exists()
+
+
+def test_triggers_without_hooks_do_no_work(tmp_path):
+    hooks = hook_system(tmp_path)
+
+    asyncio.run(hooks.trigger_before_tool("shell", {}))
+
+    assert hooks._base_env is None
+    assert hooks._script_dir is None
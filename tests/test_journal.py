@@ -0,0 +1,86 @@
+from datetime import datetime
+from agent.journal import JournalState, SessionJournal, read_header, replay
+
+
+def message(text):
+    return {"role": "user", "content": text}
+
+
+def open_journal(tmp_path):
+    journal = SessionJournal(tmp_path, "s1", fsync_interval=0)
+    now = datetime.now()
+    journal.open(JournalState(session_id="s1", created_at=now, updated_at=now))
+    return journal
+
+
+def test_replay_applies_committed_records(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("message", item=message("one"))
+    journal.append("message", item=message("two"))
+    journal.append("update", index=0, item=message("one, pruned"))
+    journal.append("summarize", count=1, summary={"content": "s"})
+    journal.append("usage", total_usage={"total_tokens": 7})
+    journal.append(
+        "turn",
+        turn_count=1,
+        updated_at=datetime.now().isoformat(),
+        turn_stats=[{"turn": 1}],
+    )
+
+    # Nothing reaches the file before a commit.
+    assert replay(journal.path).records == 1
+    journal.commit()
+    journal.close()
+
+    state = replay(journal.path)
+    assert state.session_id == "s1"
+    assert state.messages == [message("two")]
+    assert state.summaries == [{"content": "s"}]
+    assert state.total_usage == {"total_tokens": 7}
+    assert state.turn_count == 1
+    assert state.turn_stats == [{"turn": 1}]
+
+
+def test_replay_stops_at_offset_and_torn_write(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("message", item=message("one"))
+    checkpoint = journal.commit()
+    journal.append("message", item=message("two"))
+    journal.close()
+
+    assert replay(journal.path, checkpoint).messages == [message("one")]
+
+    with open(journal.path, "ab") as fp:
+        fp.write(b'{"op": "message", "item": {"role": "us')
+    assert replay(journal.path).messages == [message("one"), message("two")]
+
+
+def test_compaction_starts_a_new_generation(tmp_path):
+    journal = open_journal(tmp_path)
+    for i in range(5):
+        journal.append("message", item=message(str(i)))
+    journal.append("clear")
+    journal.append("message", item=message("kept"))
+    assert journal.needs_compaction(min_records=3, ratio=2)
+
+    first = journal.path
+    journal.compact()
+    journal.remove_generations(keep=set())
+    journal.close()
+
+    assert journal.generation == 1
+    assert not first.exists()
+    assert read_header(journal.path)["generation"] == 1
+    state = replay(journal.path)
+    assert state.messages == [message("kept")]
+    assert state.records == 1
+    assert SessionJournal.latest_generation(journal.directory) == 1
+
+
+def test_reopening_never_appends_to_an_old_generation(tmp_path):
+    open_journal(tmp_path).close()
+    journal = open_journal(tmp_path)
+    assert journal.generation == 1
+
+    journal.discard()
+    assert SessionJournal.latest_generation(journal.directory) == 0
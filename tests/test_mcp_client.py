@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from config.config import MCPServerConfig
+from tools.mcp.client import MCPClient, MCPServerStatus
+
+
+def make_client(tmp_path, **config):
+    config.setdefault("heartbeat_interval_sec", None)
+    config.setdefault("reconnect_base_delay_sec", 0.01)
+    return MCPClient("docs", MCPServerConfig(command="srv", **config), tmp_path)
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_heartbeat_reconnects_a_dead_session(tmp_path, mcp_server):
+    client = make_client(tmp_path, heartbeat_interval_sec=0.01)
+
+    async def go():
+        await client.ensure_connected()
+        mcp_server.sessions[0].open = False
+        await wait_for(
+            lambda: len(mcp_server.sessions) == 2
+            and client.status == MCPServerStatus.CONNECTED
+        )
+        result = await client.call_tool("search", {})
+        await client.disconnect()
+        return result
+
+    assert asyncio.run(go())["is_error"] is False
+    assert client.stats.reconnects == 1
+    assert "ping failed" in client.stats.last_error
+
+
+def test_failed_call_on_dead_session_reconnects(tmp_path, mcp_server):
+    client = make_client(tmp_path)
+
+    async def go():
+        await client.ensure_connected()
+        mcp_server.sessions[0].open = False
+        with pytest.raises(ConnectionError):
+            await client.call_tool("search", {})
+        assert client.status == MCPServerStatus.RECONNECTING
+
+        # The next call waits for the reconnect instead of failing.
+        await client.call_tool("search", {})
+        await client.disconnect()
+
+    asyncio.run(go())
+
+    assert len(mcp_server.sessions) == 2
+    assert client.stats.errors == 1
+    assert mcp_server.calls == ["search"]
+
+
+def test_reconnect_gives_up_after_max_attempts(tmp_path, mcp_server):
+    client = make_client(tmp_path, reconnect_max_attempts=2)
+
+    async def go():
+        await client.ensure_connected()
+        mcp_server.sessions[0].open = False
+        mcp_server.refuse_connects = 10
+        with pytest.raises(ConnectionError):
+            await client.call_tool("search", {})
+        with pytest.raises(RuntimeError, match="unavailable"):
+            await client.call_tool("search", {})
+        await client.disconnect()
+
+    asyncio.run(go())
+
+    assert client.stats.reconnects == 2
+    assert "reconnect failed" in client.stats.last_error
+
+
+def test_failed_request_on_live_session_only_probes(tmp_path, mcp_server):
+    client = make_client(tmp_path)
+
+    async def go():
+        await client.ensure_connected()
+        mcp_server.fail_calls = 1
+        with pytest.raises(RuntimeError, match="request failed"):
+            await client.call_tool("search", {})
+        await client._probe_task
+        status = client.status
+        await client.disconnect()
+        return status
+
+    assert asyncio.run(go()) == MCPServerStatus.CONNECTED
+    assert len(mcp_server.sessions) == 1
+    assert client.stats.reconnects == 0
+
+
+def test_concurrent_calls_share_one_session_up_to_the_limit(tmp_path, mcp_server):
+    client = make_client(tmp_path, max_concurrency=2)
+    mcp_server.call_delay = 0.02
+
+    async def go():
+        await asyncio.gather(*(client.call_tool("search", {}) for _ in range(6)))
+        await client.disconnect()
+
+    asyncio.run(go())
+
+    assert len(mcp_server.sessions) == 1
+    assert mcp_server.max_in_flight == 2
+    assert client.stats.calls == 6
+    assert client.stats.to_dict()["p50_ms"] >= 20
@@ -0,0 +1,92 @@
+import base64
+from types import SimpleNamespace
+import pytest
+from context.blob_store import BlobStore
+from tools.mcp.content import MAX_CHARS_PER_TOKEN, render_content
+import utils.text
+
+tokenized: list[int] = []
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    # tiktoken downloads its encodings on first use.
+    def tokenize(text):
+        tokenized.append(len(text))
+        return text.split()
+
+    tokenized.clear()
+    monkeypatch.setattr(utils.text, "get_tokenizer", lambda model: tokenize)
+
+
+def text(value):
+    return SimpleNamespace(type="text", text=value)
+
+
+def image(data, mime_type="image/png"):
+    return SimpleNamespace(type="image", data=data, mimeType=mime_type)
+
+
+def test_content_within_budget_is_joined(tmp_path):
+    rendered = render_content(
+        [text("one"), text("two")], BlobStore(tmp_path), 100, "model"
+    )
+
+    assert rendered.output == "one\ntwo"
+    assert not rendered.truncated
+    assert rendered.omitted_items == 0
+
+
+def test_large_text_is_cut_before_tokenizing(tmp_path):
+    rendered = render_content(
+        [text("word " * 100_000), text("after")], BlobStore(tmp_path), 50, "model"
+    )
+
+    assert rendered.truncated
+    assert rendered.omitted_items == 1
+    assert len(rendered.output.split()) <= 50
+    assert rendered.output.endswith("[MCP output truncated to 50 tokens]")
+    assert max(tokenized) <= 50 * MAX_CHARS_PER_TOKEN + 100
+
+
+def test_binary_payloads_go_to_the_blob_store(tmp_path):
+    store = BlobStore(tmp_path)
+    png = b"\x89PNG" + bytes(range(256)) * 40
+    rendered = render_content(
+        [text("word " * 1000), image(base64.b64encode(png).decode())],
+        store,
+        20,
+        "model",
+    )
+
+    [blob] = rendered.blobs
+    assert blob["size"] == len(png)
+    assert blob["mime_type"] == "image/png"
+    assert store.path(blob["key"]).read_bytes() == png
+    assert base64.b64encode(png).decode()[:100] not in rendered.output
+
+
+def test_resources_and_links(tmp_path):
+    store = BlobStore(tmp_path)
+    items = [
+        SimpleNamespace(
+            type="resource",
+            resource=SimpleNamespace(uri="file:///a.txt", text="inline", blob=None),
+        ),
+        SimpleNamespace(
+            type="resource",
+            resource=SimpleNamespace(
+                uri="file:///b.bin", text=None, blob="not base64!", mimeType=None
+            ),
+        ),
+        SimpleNamespace(type="resource_link", name="c", uri="file:///c"),
+    ]
+
+    rendered = render_content(items, store, None, "model")
+
+    lines = rendered.output.splitlines()
+    assert lines[0] == "inline"
+    assert lines[1].startswith("[resource file:///b.bin application/octet-stream")
+    assert lines[2] == "[resource link: c file:///c]"
+    assert store.path(rendered.blobs[0]["key"]).read_bytes() == b"not base64!"
+    assert not rendered.truncated
@@ -0,0 +1,66 @@
+import asyncio
+from fastmcp import Client, FastMCP
+import httpx
+from config.config import MCPServerConfig
+from tools.mcp.http import HttpClientPool, PooledHttpTransport
+
+
+def test_pool_shares_clients_by_connection_settings():
+    pool = HttpClientPool()
+    config = MCPServerConfig(url="http://a/mcp", transport="http")
+
+    async def go():
+        first = pool.acquire(config)
+        same = pool.acquire(MCPServerConfig(url="http://b/mcp", transport="http"))
+        other = pool.acquire(config.model_copy(update={"headers": {"X-Key": "1"}}))
+        assert first is same
+        assert other is not first
+
+        await pool.release(first)
+        assert not first.is_closed
+        await pool.release(same)
+        assert first.is_closed
+        await pool.release(other)
+        assert other.is_closed
+
+    asyncio.run(go())
+
+
+def make_server():
+    server = FastMCP("test")
+
+    @server.tool
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    return server.http_app(path="/mcp")
+
+
+def test_sessions_share_the_pooled_client():
+    app = make_server()
+    methods: list[str] = []
+
+    async def record(request):
+        methods.append(request.method)
+
+    async def go():
+        async with app.router.lifespan_context(app):
+            http = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                event_hooks={"request": [record]},
+            )
+
+            async def session():
+                transport = PooledHttpTransport("http://test/mcp", http)
+                async with Client(transport=transport) as client:
+                    result = await client.call_tool("add", {"a": 1, "b": 2})
+                    return result.content[0].text
+
+            results = await asyncio.gather(session(), session())
+            await http.aclose()
+            return results
+
+    assert asyncio.run(asyncio.wait_for(go(), 30)) == ["3", "3"]
+    # No standalone listening stream, and each session is ended explicitly.
+    assert "GET" not in methods
+    assert methods.count("DELETE") == 2
@@ -0,0 +1,117 @@
+import asyncio
+from pathlib import Path
+from config.config import Config, MCPServerConfig
+from tools.mcp.client import MCPServerStatus, MCPToolInfo
+from tools.mcp.mcp_manager import MCPManager
+from tools.mcp.schema_cache import MCPSchemaCache, server_cache_key
+from tools.registry import ToolRegistry
+
+
+def test_cache_key_covers_what_selects_the_server(tmp_path):
+    stdio = MCPServerConfig(command="server", env={"TOKEN": "a"})
+    http = MCPServerConfig(url="http://localhost/mcp")
+
+    assert server_cache_key(stdio, Path("/a")) != server_cache_key(stdio, Path("/b"))
+    assert server_cache_key(http, Path("/a")) == server_cache_key(http, Path("/b"))
+    assert server_cache_key(stdio) != server_cache_key(
+        MCPServerConfig(command="server", env={"TOKEN": "b"})
+    )
+
+    pinned = MCPServerConfig(command="server", env={"TOKEN": "a"}, cwd=Path("/p"))
+    assert server_cache_key(pinned, Path("/a")) == server_cache_key(pinned, Path("/b"))
+
+
+def test_schema_cache_round_trip(tmp_path):
+    cache = MCPSchemaCache(tmp_path)
+    tools = [MCPToolInfo("search", "finds", {"type": "object"}, "docs")]
+
+    assert cache.load("k") is None
+    cache.store("k", "docs", tools)
+    assert cache.load("k") == tools
+
+    (tmp_path / "k.json").write_text("{not json")
+    assert cache.load("k") is None
+    cache.invalidate("k")
+    cache.invalidate("k")
+    assert not (tmp_path / "k.json").exists()
+
+
+def make_config(tmp_path, **server):
+    return Config(
+        cwd=tmp_path, mcp_servers={"docs": MCPServerConfig(command="srv", **server)}
+    )
+
+
+def mcp_tool_names(registry):
+    return sorted(tool.name for tool in registry.connected_mcp_servers)
+
+
+def test_lazy_server_registers_cached_tools_without_connecting(tmp_path, mcp_server):
+    config = make_config(tmp_path)
+
+    async def go():
+        # The first session has no cache, so it connects and fills it.
+        first = MCPManager(config)
+        await first.initialize()
+        await first.shutdown()
+        assert len(mcp_server.sessions) == 1
+
+        mcp_server.tools = ["search", "fetch"]
+        manager = MCPManager(config)
+        await manager.initialize()
+        registry = ToolRegistry(config)
+        manager.register_tools(registry)
+        client = manager._clients["docs"]
+        lazy = (len(mcp_server.sessions), client.status, mcp_tool_names(registry))
+
+        # Connecting replaces the cached listing with the live one.
+        await client.ensure_connected()
+        live = mcp_tool_names(registry)
+        await manager.shutdown()
+        return lazy, live
+
+    lazy, live = asyncio.run(go())
+
+    assert lazy == (1, MCPServerStatus.IDLE, ["docs__search"])
+    assert live == ["docs__fetch", "docs__search"]
+
+
+def test_live_listing_drops_removed_tools(tmp_path, mcp_server):
+    config = make_config(tmp_path)
+    mcp_server.tools = ["search", "old"]
+
+    async def go():
+        first = MCPManager(config)
+        await first.initialize()
+        await first.shutdown()
+
+        mcp_server.tools = ["search"]
+        manager = MCPManager(config)
+        await manager.initialize()
+        registry = ToolRegistry(config)
+        manager.register_tools(registry)
+        cached = mcp_tool_names(registry)
+        await manager._clients["docs"].ensure_connected()
+        live = mcp_tool_names(registry)
+        await manager.shutdown()
+        return cached, live
+
+    cached, live = asyncio.run(go())
+
+    assert cached == ["docs__old", "docs__search"]
+    assert live == ["docs__search"]
+
+
+def test_eager_server_connects_at_startup(tmp_path, mcp_server):
+    config = make_config(tmp_path, lazy=False)
+
+    async def go():
+        for _ in range(2):
+            manager = MCPManager(config)
+            await manager.initialize()
+            status = manager._clients["docs"].status
+            await manager.shutdown()
+        return status
+
+    assert asyncio.run(go()) == MCPServerStatus.CONNECTED
+    assert len(mcp_server.sessions) == 2
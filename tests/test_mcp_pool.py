@@ -0,0 +1,59 @@
+import asyncio
+from pathlib import Path
+from config.config import Config, MCPServerConfig
+from tools.mcp.client import MCPServerStatus
+from tools.mcp.mcp_manager import MCPManager
+from tools.mcp.pool import MCPClientPool, get_mcp_pool
+
+
+def test_pool_shares_clients_until_the_last_release(mcp_server):
+    pool = MCPClientPool()
+    config = MCPServerConfig(command="srv")
+
+    async def go():
+        first = pool.acquire("docs", config, Path("/work"))
+        second = pool.acquire("docs", config.model_copy(), Path("/work"))
+        other_cwd = pool.acquire("docs", config, Path("/elsewhere"))
+        assert first is second
+        assert other_cwd is not first
+
+        await first.ensure_connected()
+        await pool.release(first)
+        assert first.status == MCPServerStatus.CONNECTED
+
+        await pool.release(second)
+        assert first.status == MCPServerStatus.DISCONNECTED
+        # Releasing a client the pool no longer holds is a no-op.
+        await pool.release(first)
+
+        assert pool.acquire("docs", config, Path("/work")) is not first
+        await pool.release(other_cwd)
+
+    asyncio.run(go())
+
+
+def test_parent_and_subagent_share_one_connection(tmp_path, mcp_server):
+    config = Config(
+        cwd=tmp_path,
+        mcp_servers={"docs": MCPServerConfig(command="srv", lazy=False)},
+    )
+
+    async def go():
+        parent = MCPManager(config)
+        await parent.initialize()
+        child = MCPManager(config.model_copy(deep=True))
+        await child.initialize()
+        shared = parent._clients["docs"] is child._clients["docs"]
+
+        await child.shutdown()
+        still_connected = parent._clients["docs"].status
+        await parent.shutdown()
+        return shared, still_connected
+
+    shared, still_connected = asyncio.run(go())
+
+    assert shared
+    assert still_connected == MCPServerStatus.CONNECTED
+    assert len(mcp_server.sessions) == 1
+    assert not mcp_server.sessions[0].open
+    assert get_mcp_pool()._entries == {}
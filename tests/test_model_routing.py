@@ -0,0 +1,92 @@
+import asyncio
+from agent.session import Session
+from client.llm_client import LLMClient, create_routed_client
+from client.response import StreamEvent, StreamEventType, TextDelta
+from config.config import Config, ModelRoute
+from tools.subagents import SubagentDefinition, _subagent_config, subagent_route
+
+
+def definition(name="reviewer"):
+    return SubagentDefinition(name=name, description="test", goal_prompt="Review.")
+
+
+def routed_config(tmp_path, **models):
+    return Config(cwd=tmp_path, models={"main": {"name": "big"}, **models})
+
+
+def test_subagent_route_prefers_the_definition_entry(tmp_path):
+    config = routed_config(
+        tmp_path,
+        subagent={"name": "small"},
+        subagents={"reviewer": {"name": "careful"}},
+    )
+
+    assert subagent_route(config, definition()).name == "careful"
+    assert subagent_route(config, definition("other")).name == "small"
+    assert subagent_route(routed_config(tmp_path), definition()) is None
+
+
+def test_routed_child_falls_back_to_the_parent_model(tmp_path):
+    config = routed_config(tmp_path, subagent={"name": "small", "max_tokens": 512})
+
+    child = _subagent_config(config, definition())
+
+    assert child.models.main == ModelRoute(name="small", max_tokens=512)
+    assert child.models.fallback == ModelRoute(name="big")
+    assert not child.persistence.journal
+    # Without a route the child keeps the parent's models.
+    assert _subagent_config(routed_config(tmp_path), definition()).models == (
+        routed_config(tmp_path).models
+    )
+
+
+def test_unrouted_roles_share_the_main_client(tmp_path):
+    config = Config(cwd=tmp_path)
+    main = LLMClient(config)
+
+    assert create_routed_client(config, None, main) is main
+    routed = create_routed_client(config, ModelRoute(name="cheap"), main)
+    assert routed.model_name == "cheap"
+    assert routed.fallback is main
+
+    config.models.fallback_to_main = False
+    assert create_routed_client(config, ModelRoute(), main).fallback is None
+
+
+def test_session_builds_a_client_per_role(tmp_path):
+    session = Session(
+        routed_config(
+            tmp_path,
+            compaction={"name": "summarizer"},
+            fallback={"name": "backup"},
+        )
+    )
+
+    assert session.client.model_name == "big"
+    assert session.client.fallback.model_name == "backup"
+    assert session.compaction_client.model_name == "summarizer"
+    assert session.compaction_client.fallback is session.client
+    assert session.loop_breaker_client is session.client
+
+
+def test_failed_call_is_retried_on_the_fallback(tmp_path):
+    config = Config(cwd=tmp_path)
+    backup = LLMClient(config, route=ModelRoute(name="backup"))
+    client = LLMClient(config, route=ModelRoute(name="primary"), fallback=backup)
+
+    async def failing(messages, tools, stream):
+        yield StreamEvent(type=StreamEventType.ERROR, error="API error: down")
+
+    async def answering(messages, tools, stream):
+        yield StreamEvent(type=StreamEventType.TEXT_DELTA, text_delta=TextDelta("hi"))
+
+    client._chat_completion = failing
+    backup._chat_completion = answering
+
+    async def go():
+        return [event async for event in client.chat_completion([])]
+
+    events = asyncio.run(go())
+
+    assert [event.type for event in events] == [StreamEventType.TEXT_DELTA]
+    assert events[0].text_delta.content == "hi"
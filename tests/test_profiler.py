@@ -0,0 +1,48 @@
+import asyncio
+import time
+from telemetry.profiler import SamplingProfiler
+from telemetry.tracing import get_tracer, span
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_are_attributed_to_open_spans(tmp_path):
+    profiler = SamplingProfiler(tmp_path, interval=0.001, label="turn")
+
+    async def go():
+        profiler.start()
+        with span("tool.execute", tool="grep"):
+            busy(0.2)
+        return profiler.stop()
+
+    path = asyncio.run(go())
+
+    assert profiler.samples > 0
+    assert path.parent == tmp_path
+    assert path.name.startswith("turn_")
+    lines = path.read_text().splitlines()
+    assert lines
+    assert any("tool.execute[grep];" in line for line in lines)
+    assert all(line.startswith("task:") for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+
+    top = dict(profiler.top())
+    assert top["tool.execute[grep]"] > 50
+    assert not get_tracer().enabled
+
+
+def test_stop_without_samples_writes_nothing(tmp_path):
+    profiler = SamplingProfiler(tmp_path, interval=10)
+    assert profiler.stop() is None
+
+    async def go():
+        profiler.start()
+        assert profiler.running
+        return profiler.stop()
+
+    assert asyncio.run(go()) is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+from context.manager import MessageItem
+from context.pruning import PruningPolicy, _same_path
+
+BODY = "\n".join(f"line {i}" for i in range(200))
+
+
+def call(call_id, name, **args):
+    return MessageItem(
+        role="assistant",
+        content="",
+        tool_calls=[
+            {
+                "id": call_id,
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }
+        ],
+    )
+
+
+def read(call_id, path):
+    return [
+        call(call_id, "read_file", path=path),
+        MessageItem(
+            role="tool",
+            content=BODY,
+            tool_call_id=call_id,
+            token_count=1000,
+            tool_name="read_file",
+            path=path,
+        ),
+    ]
+
+
+def read_score(policy, messages):
+    scores = policy._score(messages, [(1, messages[1])])
+    return scores[0][0], scores[0][2]
+
+
+def test_edit_after_read_lowers_score(tmp_path):
+    policy = PruningPolicy(protect_tokens=0, minimum_tokens=0, cwd=tmp_path)
+    path = str(tmp_path / "pkg" / "x.py")
+    untouched = read("c1", path) + [call("c2", "list_dir", path=".")]
+    edited = read("c1", path) + [call("c2", "edit", path="pkg/x.py")]
+
+    score, overwritten = read_score(policy, untouched)
+    edited_score, edited_overwritten = read_score(policy, edited)
+
+    assert not overwritten
+    assert edited_overwritten
+    assert edited_score < score
+
+
+def test_overwritten_read_is_cleared_first(tmp_path):
+    policy = PruningPolicy(protect_tokens=0, minimum_tokens=0, cwd=tmp_path)
+    messages = (
+        read("c1", str(tmp_path / "a.py"))
+        + read("c2", str(tmp_path / "b.py"))
+        + [call("c3", "write_file", path="a.py")]
+    )
+
+    decisions = policy.plan(messages, lambda text: len(text.split()))
+
+    assert decisions[0].item is messages[1]
+    assert "modified afterwards" in decisions[0].content
+
+
+def test_same_path_resolves_against_cwd():
+    cwd = Path("/work/repo")
+    assert _same_path("/work/repo/.env", ".env", cwd)
+    assert _same_path("/work/repo/src/x.py", "./src/x.py", cwd)
+    assert not _same_path("/work/repo/pkg/x.py", "../pkg/x.py", cwd)
+
+
+def test_same_path_without_cwd_strips_only_the_prefix():
+    assert _same_path("/work/repo/.env", ".env")
+    assert _same_path("src/x.py", "./src/x.py")
+    assert not _same_path("/work/repo/pkg/x.py", "../pkg/x.py")
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+import pytest
+from agent.persistence import PersistenceManager, SessionSnapshot
+from agent.session import Session
+from client.response import TokenUsage
+from config.config import Config
+from context.manager import ContextManager
+import utils.text
+
+tokenized: list[str] = []
+
+
+@pytest.fixture(autouse=True)
+def counting_tokenizer(monkeypatch, tmp_path):
+    # tiktoken downloads its encodings on first use.
+    def get_tokenizer(model):
+        def tokenize(text):
+            tokenized.append(text)
+            return text.split()
+
+        return tokenize
+
+    tokenized.clear()
+    monkeypatch.setattr(utils.text, "get_tokenizer", get_tokenizer)
+    monkeypatch.setattr("agent.persistence.get_data_dir", lambda: tmp_path)
+    monkeypatch.setattr("agent.session.get_data_dir", lambda: tmp_path)
+
+
+def make_manager(tmp_path):
+    config = Config(cwd=tmp_path)
+    config.message_store.spill_threshold_chars = None
+    return ContextManager(config, user_memory=None, tools=None)
+
+
+def test_restore_uses_stored_token_counts(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.add_user_message("count these four")
+    manager.add_assistant_message("and these")
+    manager.add_chunk_summary("summary of earlier work", 0)
+    records, summaries = manager.to_records()
+    records.append({"role": "user", "content": "saved without a count"})
+
+    restored = make_manager(tmp_path)
+    tokenized.clear()
+    restored.restore(records, summaries, total_usage=TokenUsage(1, 2, 3))
+
+    assert tokenized == ["saved without a count"]
+    assert [m.token_count for m in restored._messages] == [3, 2, 4]
+    assert restored.ledger.message_tokens == 9
+    assert restored.ledger.summary_tokens == manager.ledger.summary_tokens
+    assert restored.total_usage.total_tokens == 3
+
+
+def test_saved_session_round_trips_records(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.add_user_message("hello there")
+    manager.add_assistant_message("hi")
+    records, summaries = manager.to_records()
+    now = datetime.now()
+    persistence = PersistenceManager()
+    persistence.save_session(
+        SessionSnapshot(
+            session_id="s1",
+            created_at=now,
+            updated_at=now,
+            turn_count=1,
+            total_usage=TokenUsage(5, 1, 6),
+            records=records,
+            summaries=summaries,
+        )
+    )
+
+    loaded = persistence.load_session("s1")
+
+    assert loaded.message_records() == records
+    assert loaded.to_entry().first_message == "hello there"
+
+
+def test_legacy_snapshot_messages_load():
+    now = datetime.now()
+    snapshot = SessionSnapshot.from_dict(
+        {
+            "session_id": "old",
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+            "turn_count": 1,
+            "total_usage": {},
+            "messages": [
+                {"role": "system", "content": "prompt"},
+                {"role": "user", "content": "hello"},
+                {"role": "tool", "content": "out", "tool_call_id": "c1"},
+            ],
+        }
+    )
+
+    assert snapshot.message_records() == [
+        {"role": "user", "content": "hello"},
+        {"role": "tool", "content": "out", "tool_call_id": "c1"},
+    ]
+
+
+def test_session_restore_swaps_conversation_in_place(tmp_path):
+    async def go():
+        saved = Session(Config(cwd=tmp_path))
+        await saved.initialize()
+        saved.context_manager.add_user_message("first session")
+        saved.increment_turn()
+        snapshot = saved.snapshot()
+        await saved.close()
+
+        session = Session(Config(cwd=tmp_path))
+        await session.initialize()
+        client = session.client
+        await session.restore(snapshot)
+        await session.close()
+        return saved.session_id, session, client
+
+    saved_id, session, client = asyncio.run(go())
+
+    assert session.session_id == saved_id
+    assert session.client is client
+    assert session.turn_count == 1
+    assert [m["content"] for m in session.context_manager.get_messages()[1:]] == [
+        "first session"
+    ]
@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from config.config import Config
+from tools.base import ToolInvocation
+from tools.subagents import CODEBASE_INVESTIGATOR, SubagentBatchTool, SubagentRun
+
+
+class FakeChildren:
+    # Replaces run_subagent_cached; goals starting with "fail" error out and
+    # every child charges the shared budget.
+    def __init__(self, tokens=10, delays=None):
+        self.tokens = tokens
+        self.delays = delays or {}
+        self.running = 0
+        self.max_running = 0
+        self.started: list[str] = []
+
+    async def __call__(self, config, definition, goal, budget=None):
+        self.started.append(goal)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(goal, 0.01))
+        finally:
+            self.running -= 1
+        if budget is not None:
+            budget.charge(self.tokens)
+        if goal.startswith("fail"):
+            return SubagentRun(goal=goal, termination="error", error="boom")
+        return SubagentRun(goal=goal, response=f"answer to {goal}", tokens=10)
+
+
+@pytest.fixture
+def children(monkeypatch):
+    def install(**kwargs):
+        fake = FakeChildren(**kwargs)
+        monkeypatch.setattr("tools.subagents.run_subagent_cached", fake)
+        return fake
+
+    return install
+
+
+def run_batch(tmp_path, goals, progress=None, fail_fast=False, **settings):
+    config = Config(cwd=tmp_path)
+    for key, value in settings.items():
+        setattr(config.subagents, key, value)
+    tool = SubagentBatchTool(config, [CODEBASE_INVESTIGATOR])
+    invocation = ToolInvocation(
+        params={"goals": goals, "fail_fast": fail_fast},
+        cwd=tmp_path,
+        progress=progress,
+    )
+    return asyncio.run(tool.execute(invocation))
+
+
+def test_results_are_aggregated_in_goal_order(tmp_path, children):
+    fake = children(delays={"slow": 0.05})
+    progress = []
+
+    result = run_batch(
+        tmp_path,
+        ["slow", "fail here", "fast"],
+        progress=lambda done, total, message: progress.append((done, total)),
+    )
+
+    assert result.success
+    assert "2 of 3 goals completed" in result.output
+    assert result.output.index("answer to slow") < result.output.index("answer to fast")
+    assert result.metadata == {"goals": 3, "failed": 1, "tokens": 30}
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert fake.max_running == 3
+
+
+def test_parallelism_is_bounded(tmp_path, children):
+    fake = children()
+
+    run_batch(tmp_path, [f"goal {i}" for i in range(6)], max_parallel=2)
+
+    assert fake.max_running == 2
+    assert len(fake.started) == 6
+
+
+def test_goals_after_the_budget_runs_out_are_skipped(tmp_path, children):
+    children(tokens=60)
+
+    result = run_batch(
+        tmp_path, ["a", "b", "c"], max_parallel=1, batch_token_budget=100
+    )
+
+    assert result.success
+    assert "token budget 120/100" in result.output
+    assert "Not started, the token budget is exhausted" in result.output
+    assert result.metadata["failed"] == 1
+
+
+def test_fail_fast_cancels_the_rest(tmp_path, children):
+    fake = children(delays={"slow": 10})
+
+    result = run_batch(tmp_path, ["fail now", "slow"], fail_fast=True)
+
+    assert not result.success
+    assert "Cancelled after another goal failed" in result.error
+    assert fake.running == 0
+
+
+def test_all_failed_or_invalid_batches_are_errors(tmp_path, children):
+    children()
+
+    assert not run_batch(tmp_path, ["fail a", "fail b"]).success
+    too_many = run_batch(tmp_path, ["a", "b", "c"], max_batch_goals=2)
+    assert "the limit is 2" in too_many.error
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import time
+import pytest
+from config.config import Config
+from tools.subagent_cache import (
+    SubagentResultCache,
+    normalize_goal,
+    workspace_fingerprint,
+)
+from tools.subagents import SubagentRun, get_default_subagent_definitions
+
+
+def git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "dev@example.com")
+    git(tmp_path, "config", "user.name", "dev")
+    (tmp_path / "old.py").write_text("a = 1\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-qm", "init")
+    return tmp_path
+
+
+def test_normalize_goal_keeps_case():
+    assert normalize_goal("  Where is  `Config`\ndefined?") == "Where is `Config` defined"
+    assert normalize_goal("where is `Config`") != normalize_goal("where is `config`")
+
+
+def test_fingerprint_follows_edits_to_a_renamed_file(repo):
+    git(repo, "mv", "old.py", "new.py")
+    renamed = workspace_fingerprint(repo)
+    assert renamed.startswith("git:")
+
+    (repo / "new.py").write_text("a = 2\n")
+    stat = (repo / "new.py").stat()
+    os.utime(repo / "new.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert workspace_fingerprint(repo) != renamed
+
+
+def test_fingerprint_changes_with_untracked_files(repo):
+    clean = workspace_fingerprint(repo)
+    (repo / "notes.txt").write_text("x")
+    assert workspace_fingerprint(repo) != clean
+
+
+def test_fingerprint_outside_git_walks_files(tmp_path):
+    (tmp_path / "a.txt").write_text("x")
+    assert workspace_fingerprint(tmp_path).startswith("walk:")
+
+
+def test_key_changes_with_workspace(repo):
+    cache = SubagentResultCache(repo / ".cache", ttl_sec=None)
+    config = Config(cwd=repo)
+    definition = get_default_subagent_definitions()[0]
+
+    key = cache.key(config, definition, "Find Config.")
+    assert key == cache.key(config, definition, "Find   Config")
+    (repo / "other.py").write_text("b = 1\n")
+    assert cache.key(config, definition, "Find Config") != key
+
+
+def test_entries_round_trip_and_expire(tmp_path):
+    cache = SubagentResultCache(tmp_path, ttl_sec=60)
+    cache.store("k", SubagentRun(goal="g", response="found"))
+
+    run = cache.load("k")
+    assert run.response == "found" and run.cached
+
+    old = time.time() - 120
+    os.utime(tmp_path / "k.json", (old, old))
+    assert cache.prune() == 1
+    assert cache.load("k") is None
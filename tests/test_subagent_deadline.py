@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from client.response import (
+    StreamEvent,
+    StreamEventType,
+    TextDelta,
+    TokenUsage,
+    ToolCall,
+)
+from config.config import Config
+from context.manager import SUMMARY_ACK, summary_messages
+from tools.subagents import SubagentDefinition, partial_transcript, run_subagent
+import utils.text
+
+
+def test_partial_transcript_skips_prompts_and_keeps_progress():
+    messages = [
+        {"role": "system", "content": "system prompt"},
+        *summary_messages(["earlier work"], "user"),
+        {"role": "user", "content": "task prompt"},
+        {
+            "role": "assistant",
+            "content": "Looking around",
+            "tool_calls": [{"function": {"name": "grep", "arguments": '{"p": 1}'}}],
+        },
+        {"role": "tool", "content": "x" * 2000},
+    ]
+
+    lines = partial_transcript(messages, in_progress="Found it").splitlines()
+
+    assert lines == [
+        "assistant: Looking around",
+        'tool call: grep {"p": 1}',
+        "tool result: " + "x" * 500,
+        "assistant (interrupted): Found it",
+    ]
+    assert all(SUMMARY_ACK not in line for line in lines)
+
+
+def test_partial_transcript_keeps_the_newest_part():
+    messages = [{"role": "user", "content": "task"}] + [
+        {"role": "tool", "content": f"result {i}"} for i in range(100)
+    ]
+
+    transcript = partial_transcript(messages, max_chars=100)
+
+    assert transcript.startswith("...\n")
+    assert transcript.endswith("tool result: result 99")
+    assert len(transcript) <= 104
+
+
+class StallingClient:
+    # Calls one tool, then streams part of an answer and never finishes.
+    def __init__(self, config=None, route=None, fallback=None):
+        self.fallback = fallback
+        self.calls = 0
+
+    async def chat_completion(self, messages, tools=None, stream=True):
+        self.calls += 1
+        if self.calls == 1:
+            yield StreamEvent(
+                type=StreamEventType.TOOL_CALL_COMPLETE,
+                tool_call=ToolCall(call_id="c1", name="list_dir", arguments={}),
+            )
+            yield StreamEvent(
+                type=StreamEventType.MESSAGE_COMPLETE, usage=TokenUsage(50, 5, 55)
+            )
+            return
+
+        yield StreamEvent(
+            type=StreamEventType.TEXT_DELTA, text_delta=TextDelta("Half an ans")
+        )
+        await asyncio.sleep(60)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def stalling_llm(monkeypatch, tmp_path):
+    monkeypatch.setattr("agent.session.LLMClient", StallingClient)
+    monkeypatch.setattr("agent.session.get_data_dir", lambda: tmp_path)
+    monkeypatch.setattr(
+        utils.text, "get_tokenizer", lambda model: lambda text: text.split()
+    )
+
+
+def test_timed_out_child_returns_partial_transcript(tmp_path, stalling_llm):
+    (tmp_path / "notes.txt").write_text("hello")
+    definition = SubagentDefinition(
+        name="investigator",
+        description="test",
+        goal_prompt="Investigate.",
+        allowed_tools=["list_dir"],
+        timeout_seconds=1,
+    )
+
+    run = asyncio.run(
+        asyncio.wait_for(
+            run_subagent(Config(cwd=tmp_path), definition, "look around"), 30
+        )
+    )
+
+    assert run.termination == "timeout"
+    assert run.tool_calls == ["list_dir"]
+    assert run.tokens == 55
+    assert "tool call: list_dir" in run.transcript
+    assert "notes.txt" in run.transcript
+    assert run.transcript.endswith("assistant (interrupted): Half an ans")
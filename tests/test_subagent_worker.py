@@ -0,0 +1,152 @@
+import asyncio
+import subprocess
+import sys
+import pytest
+from config.config import Config, SubagentConfig
+from tools.subagent_worker import (
+    MAX_MESSAGE_BYTES,
+    PROJECT_ROOT,
+    SubagentWorker,
+    SubagentWorkerPool,
+    encode_message,
+    read_message,
+)
+from tools.subagents import CODEBASE_INVESTIGATOR, SubagentBudget
+
+# Speaks the worker protocol without running an agent: reports some usage and
+# answers with its pid, or exits for the goal "crash".
+FAKE_WORKER = """
+import asyncio, os, sys
+from tools.subagent_worker import encode_message, read_message
+
+async def main():
+    reader = asyncio.StreamReader()
+    await asyncio.get_running_loop().connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+    while (message := await read_message(reader)) is not None:
+        if message["goal"] == "crash":
+            os._exit(3)
+        run = {"goal": message["goal"], "response": str(os.getpid())}
+        sys.stdout.buffer.write(encode_message({"type": "usage", "tokens": 5}))
+        sys.stdout.buffer.write(encode_message({"type": "result", "run": run}))
+        sys.stdout.buffer.flush()
+
+asyncio.run(main())
+"""
+
+
+class FakeWorkerPool(SubagentWorkerPool):
+    async def _spawn(self) -> SubagentWorker:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-c",
+            FAKE_WORKER,
+            cwd=PROJECT_ROOT,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        return SubagentWorker(process)
+
+
+def run_goals(tmp_path, goals, budget=None, **settings):
+    pool = FakeWorkerPool(SubagentConfig(**settings))
+    config = Config(cwd=tmp_path)
+
+    async def go():
+        runs = [
+            await pool.run(config, CODEBASE_INVESTIGATOR, goal, budget)
+            for goal in goals
+        ]
+        await pool.shutdown()
+        return runs
+
+    return asyncio.run(go())
+
+
+def read(data):
+    async def go():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await read_message(reader), await read_message(reader)]
+
+    return asyncio.run(go())
+
+
+def test_messages_round_trip():
+    message = {"type": "usage", "tokens": 12}
+    assert read(encode_message(message)) == [message, None]
+
+
+def test_truncated_message_ends_the_stream():
+    assert read(encode_message({"type": "usage"})[:3]) == [None, None]
+
+
+def test_oversized_message_is_rejected():
+    header = (MAX_MESSAGE_BYTES + 1).to_bytes(4, "big")
+    with pytest.raises(ValueError):
+        read(header)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs resource")
+def test_cpu_limit_is_moved_for_each_run():
+    # Run in a child: the limit must not leak into the test process.
+    script = """
+import resource, time
+from tools.subagent_worker import _limit_cpu
+_limit_cpu(1)
+first = resource.getrlimit(resource.RLIMIT_CPU)[0]
+end = time.process_time() + 1.2
+while time.process_time() < end:
+    pass
+_limit_cpu(1)
+print(first, resource.getrlimit(resource.RLIMIT_CPU)[0])
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    first, second = map(int, result.stdout.split())
+    assert second > first
+
+
+def test_pool_is_rebuilt_when_worker_settings_change():
+    from tools.subagent_worker import get_worker_pool, shutdown_worker_pool
+
+    async def go():
+        settings = SubagentConfig()
+        pool = await get_worker_pool(settings)
+        same = await get_worker_pool(SubagentConfig())
+        settings.worker_memory_mb = 1024
+        rebuilt = await get_worker_pool(settings)
+        await shutdown_worker_pool()
+        return pool, same, rebuilt
+
+    pool, same, rebuilt = asyncio.run(go())
+    assert same is pool
+    assert rebuilt is not pool
+    assert rebuilt.settings.worker_memory_mb == 1024
+
+
+def test_workers_are_reused_until_max_tasks(tmp_path):
+    budget = SubagentBudget()
+    runs = run_goals(
+        tmp_path, ["a", "b", "c"], budget, worker_pool_size=1, worker_max_tasks=2
+    )
+
+    pids = [run.response for run in runs]
+    assert pids[0] == pids[1] != pids[2]
+    assert budget.used == 15
+
+
+def test_crashed_worker_is_replaced(tmp_path):
+    crashed, after = run_goals(tmp_path, ["crash", "a"], worker_pool_size=1)
+
+    assert crashed.termination == "error"
+    assert crashed.error == "Sub-agent worker exited with code 3"
+    assert after.failed is False
+    assert after.response.isdigit()
@@ -0,0 +1,83 @@
+import pytest
+from client.response import TokenUsage
+from config.config import Config
+from context.manager import ContextManager
+from context.token_ledger import TokenLedger
+import utils.text
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    # tiktoken downloads its encodings on first use.
+    monkeypatch.setattr(
+        utils.text, "get_tokenizer", lambda model: lambda text: text.split()
+    )
+
+
+def test_calibration_smooths_and_clamps_the_ratio():
+    ledger = TokenLedger("model", smoothing=0.5)
+    ledger.add_message(96)
+    assert ledger.local_total == 100
+
+    ledger.mark_request()
+    ledger.calibrate(120)
+    assert ledger.ratio == pytest.approx(1.2)
+    assert ledger.estimate() == 120
+
+    ledger.mark_request()
+    ledger.calibrate(160)
+    assert ledger.ratio == pytest.approx(1.4)
+
+    # Usage without a marked request does not count as a sample.
+    ledger.calibrate(1000)
+    assert ledger.samples == 2
+
+    ledger.mark_request()
+    ledger.calibrate(100_000)
+    assert ledger.ratio == TokenLedger.MAX_RATIO
+
+
+def test_schemas_are_recounted_only_when_tools_change():
+    ledger = TokenLedger("model")
+    schemas = [{"name": "read_file", "description": "reads a file"}]
+    ledger.set_schemas(schemas)
+    counted = ledger.schema_tokens
+    assert counted > 0
+
+    ledger.set_schemas([{"name": "read_file", "description": "much longer " * 10}])
+    assert ledger.schema_tokens == counted
+
+    ledger.set_schemas([])
+    assert ledger.schema_tokens == 0
+
+
+def test_manager_keeps_the_ledger_in_step(tmp_path):
+    config = Config(cwd=tmp_path)
+    config.message_store.spill_threshold_chars = None
+    manager = ContextManager(config, user_memory=None, tools=None)
+    base = manager.ledger.local_total
+
+    manager.add_user_message("one two three")
+    manager.add_assistant_message(
+        "", [{"id": "c1", "type": "function", "function": {"name": "grep"}}]
+    )
+    manager.add_tool_result("c1", "x " * 600)
+    manager.add_user_message("next")
+    manager.add_assistant_message("done")
+    grown = manager.ledger.local_total
+    assert grown > base + 600
+
+    manager.add_chunk_summary("short summary", 3)
+    records, summaries = manager.to_records()
+    assert manager.ledger.message_count == 2
+    assert manager.ledger.summary_tokens > 0
+    assert manager.ledger.local_total < grown
+
+    manager.begin_request()
+    manager.set_latest_usage(TokenUsage(prompt_tokens=manager.ledger.local_total * 2))
+    assert manager.estimated_tokens == manager.ledger.local_total * 2
+
+    restored = ContextManager(config, user_memory=None, tools=None)
+    restored.restore(records, summaries)
+    assert restored.ledger.message_tokens == manager.ledger.message_tokens
+    assert restored.ledger.summary_tokens == manager.ledger.summary_tokens
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import threading
+from config.config import Config, ExecutorKind, ToolExecutionConfig
+from tools.base import Tool, ToolInvocation, ToolResult
+from tools.executor import ToolExecutor
+from utils.loop_lag import LoopLagMonitor
+
+
+class BlockingTool(Tool):
+    name = "blocking"
+    executor_kind = ExecutorKind.THREAD
+    max_concurrency = 2
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        return ToolResult.success_result(
+            str(await self.run_blocking(invocation, threading.get_ident))
+        )
+
+
+def run_tool(config, executor=None):
+    async def go():
+        invocation = ToolInvocation(params={}, cwd=config.cwd, executor=executor)
+        result = await BlockingTool(config).execute(invocation)
+        return int(result.output), threading.get_ident()
+
+    return asyncio.run(go())
+
+
+def test_thread_and_inline_executors():
+    executor = ToolExecutor(ToolExecutionConfig())
+
+    async def go():
+        loop_thread = threading.get_ident()
+        threaded = await executor.run(ExecutorKind.THREAD, threading.get_ident)
+        inline = await executor.run(ExecutorKind.INLINE, threading.get_ident)
+        return loop_thread, threaded, inline
+
+    try:
+        loop_thread, threaded, inline = asyncio.run(go())
+    finally:
+        executor.shutdown()
+
+    assert threaded != loop_thread
+    assert inline == loop_thread
+
+
+def test_process_executor_runs_in_another_process():
+    executor = ToolExecutor(ToolExecutionConfig(process_workers=1))
+    try:
+        pid = asyncio.run(executor.run(ExecutorKind.PROCESS, os.getpid))
+    finally:
+        executor.shutdown()
+
+    assert pid != os.getpid()
+
+
+def test_run_blocking_uses_tool_default_and_config_override(tmp_path):
+    config = Config(cwd=tmp_path)
+    worker, loop_thread = run_tool(config)
+    assert worker != loop_thread
+
+    config.tool_execution.executors["blocking"] = ExecutorKind.INLINE
+    worker, loop_thread = run_tool(config, ToolExecutor(config.tool_execution))
+    assert worker == loop_thread
+
+
+def test_concurrency_limits(tmp_path):
+    tool = BlockingTool(Config(cwd=tmp_path))
+    executor = ToolExecutor(ToolExecutionConfig(default_concurrency=8))
+    assert executor.get_limit(tool) == 2
+
+    executor = ToolExecutor(ToolExecutionConfig(concurrency_limits={"blocking": 5}))
+    assert executor.get_limit(tool) == 5
+
+    async def go():
+        return executor.limit(tool), executor.limit(tool)
+
+    first, second = asyncio.run(go())
+    assert first is second
+
+
+def test_loop_lag_stats():
+    monitor = LoopLagMonitor(warn_threshold_ms=50)
+    assert monitor.get_stats() == {"samples": 0}
+
+    for lag in (1.0, 2.0, 120.0):
+        monitor.record(lag)
+
+    stats = monitor.get_stats()
+    assert stats["samples"] == 3
+    assert stats["max_ms"] == 120.0
+    assert stats["slow_samples"] == 1
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from telemetry.tracing import current_span, get_tracer, span, traced
+
+
+@pytest.fixture
+def finished():
+    tracer = get_tracer()
+    spans = []
+    tracer.enable()
+    tracer.add_listener(on_finish=spans.append)
+    yield spans
+    tracer.remove_listener(on_finish=spans.append)
+    tracer.disable()
+
+
+@traced("stream")
+async def stream(seen):
+    for i in range(3):
+        seen.append(current_span().name)
+        yield i
+
+
+def test_async_generator_span_is_not_current_between_items(finished):
+    seen = []
+
+    async def go():
+        with span("turn"):
+            async for _ in stream(seen):
+                assert current_span().name == "turn"
+                with span("handler"):
+                    await asyncio.sleep(0)
+
+    asyncio.run(go())
+
+    assert seen == ["stream"] * 3
+    by_name = {s.name: s for s in finished}
+    assert by_name["stream"].parent_id == by_name["turn"].span_id
+    assert by_name["handler"].parent_id == by_name["turn"].span_id
+
+
+def test_async_generator_closed_from_another_task_finishes_span(finished):
+    async def go():
+        agen = stream([])
+        await anext(agen)
+        await asyncio.create_task(agen.aclose())
+
+    asyncio.run(go())
+
+    [closed] = finished
+    assert closed.name == "stream"
+    assert closed.error is None
+    assert closed.duration is not None
+
+
+def test_async_generator_error_is_recorded(finished):
+    @traced("failing")
+    async def failing():
+        yield 1
+        raise ValueError("boom")
+
+    async def go():
+        async for _ in failing():
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(go())
+
+    assert finished[0].error == "ValueError: boom"
@@ -1,13 +1,20 @@
 from __future__ import annotations
 import abc
+import asyncio
+import difflib
 from pathlib import Path
 from pydantic import BaseModel, ValidationError
 from enum import Enum
-from typing import Any
+from typing import Any, Callable, TypeVar
 from dataclasses import dataclass, field
 from pydantic.json_schema import model_json_schema
 
-from config.config import Config
+from config.config import Config, ExecutorKind
+from tools.executor import ToolExecutor
+
+T = TypeVar("T")
+
+PROCESS_DIFF_THRESHOLD = 256 * 1024
 
 
 class ToolKind(str, Enum):
@@ -19,6 +26,34 @@ class ToolKind(str, Enum):
     MCP = "mcp"
 
 
+def render_unified_diff(
+    path: str,
+    old_content: str,
+    new_content: str,
+    is_new_file: bool = False,
+    is_deletion: bool = False,
+) -> str:
+    old_lines = old_content.splitlines(keepends=True)
+    new_lines = new_content.splitlines(keepends=True)
+
+    if old_lines and not old_lines[-1].endswith("\n"):
+        old_lines[-1] += "\n"
+    if new_lines and not new_lines[-1].endswith("\n"):
+        new_lines[-1] += "\n"
+
+    old_name = "/dev/null" if is_new_file else path
+    new_name = "/dev/null" if is_deletion else path
+
+    diff = difflib.unified_diff(
+        old_lines,
+        new_lines,
+        fromfile=old_name,
+        tofile=new_name,
+    )
+
+    return "".join(diff)
+
+
 @dataclass
 class FileDiff:
     path: Path
@@ -28,28 +63,19 @@ class FileDiff:
     is_new_file: bool = False
     is_deletion: bool = False
 
-    def to_diff(self) -> str:
-        import difflib
-
-        old_lines = self.old_content.splitlines(keepends=True)
-        new_lines = self.new_content.splitlines(keepends=True)
-
-        if old_lines and not old_lines[-1].endswith("\n"):
-            old_lines[-1] += "\n"
-        if new_lines and not new_lines[-1].endswith("\n"):
-            new_lines[-1] += "\n"
-
-        old_name = "/dev/null" if self.is_new_file else str(self.path)
-        new_name = "/dev/null" if self.is_deletion else str(self.path)
+    rendered: str | None = field(default=None, repr=False)
 
-        diff = difflib.unified_diff(
-            old_lines,
-            new_lines,
-            fromfile=old_name,
-            tofile=new_name,
-        )
+    def to_diff(self) -> str:
+        if self.rendered is None:
+            self.rendered = render_unified_diff(
+                str(self.path),
+                self.old_content,
+                self.new_content,
+                self.is_new_file,
+                self.is_deletion,
+            )
 
-        return "".join(diff)
+        return self.rendered
 
 
 @dataclass
@@ -92,6 +118,9 @@ class ToolResult:
 class ToolInvocation:
     params: dict[str, Any]
     cwd: Path
+    executor: ToolExecutor | None = None
+    # Called with (progress, total, message) by tools that report progress.
+    progress: Callable[[float, float | None, str | None], None] | None = None
 
 
 @dataclass
@@ -110,6 +139,8 @@ class Tool(abc.ABC):
     name: str = "base_tool"
     description: str = "Base tool"
     kind: ToolKind = ToolKind.READ
+    executor_kind: ExecutorKind = ExecutorKind.INLINE
+    max_concurrency: int | None = None
 
     def __init__(self, config: Config) -> None:
         self.config = config
@@ -122,6 +153,46 @@ class Tool(abc.ABC):
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         pass
 
+    async def run_blocking(
+        self,
+        invocation: ToolInvocation,
+        func: Callable[..., T],
+        *args: Any,
+        kind: ExecutorKind | None = None,
+        **kwargs: Any,
+    ) -> T:
+        if kind is None:
+            kind = self.config.tool_execution.executors.get(
+                self.name, self.executor_kind
+            )
+
+        if invocation.executor is not None:
+            return await invocation.executor.run(kind, func, *args, **kwargs)
+
+        if kind == ExecutorKind.INLINE:
+            return func(*args, **kwargs)
+
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def render_diff(self, invocation: ToolInvocation, diff: FileDiff) -> None:
+        size = len(diff.old_content) + len(diff.new_content)
+        kind = (
+            ExecutorKind.PROCESS
+            if size > PROCESS_DIFF_THRESHOLD
+            else ExecutorKind.THREAD
+        )
+
+        diff.rendered = await self.run_blocking(
+            invocation,
+            render_unified_diff,
+            str(diff.path),
+            diff.old_content,
+            diff.new_content,
+            diff.is_new_file,
+            diff.is_deletion,
+            kind=kind,
+        )
+
     def validate_params(self, params: dict[str, Any]) -> list[str]:
         schema = self.schema
         if isinstance(schema, type) and issubclass(schema, BaseModel):
@@ -1,4 +1,5 @@
 from pathlib import Path
+from config.config import ExecutorKind
 from tools.base import (
     FileDiff,
     Tool,
@@ -39,6 +40,7 @@ class EditTool(Tool):
         "For creating new files or complete rewrites, use write_file instead."
     )
     kind = ToolKind.WRITE
+    executor_kind = ExecutorKind.THREAD
     schema = EditParams
 
     async def get_confirmation(
@@ -48,7 +50,9 @@ class EditTool(Tool):
         params = EditParams(**invocation.params)
         path = resolve_path(invocation.cwd, params.path)
 
-        is_new_file = not path.exists()
+        is_new_file, old_content = await self.run_blocking(
+            invocation, self._read_existing, path
+        )
 
         if is_new_file:
             diff = FileDiff(
@@ -57,6 +61,7 @@ class EditTool(Tool):
                 new_content=params.new_string,
                 is_new_file=True,
             )
+            await self.render_diff(invocation, diff)
 
             return ToolConfirmation(
                 tool_name=self.name,
@@ -66,8 +71,6 @@ class EditTool(Tool):
                 affected_paths=[path],
             )
 
-        old_content = path.read_text(encoding="utf-8")
-
         if params.replace_all:
             new_content = old_content.replace(params.old_string, params.new_string)
         else:
@@ -78,6 +81,7 @@ class EditTool(Tool):
             old_content=old_content,
             new_content=new_content,
         )
+        await self.render_diff(invocation, diff)
 
         return ToolConfirmation(
             tool_name=self.name,
@@ -87,10 +91,23 @@ class EditTool(Tool):
             affected_paths=[path],
         )
 
+    def _read_existing(self, path: Path) -> tuple[bool, str]:
+        if not path.exists():
+            return True, ""
+
+        return False, path.read_text(encoding="utf-8")
+
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = EditParams(**invocation.params)
         path = resolve_path(invocation.cwd, params.path)
 
+        result = await self.run_blocking(invocation, self._edit_file, path, params)
+        if result.diff:
+            await self.render_diff(invocation, result.diff)
+
+        return result
+
+    def _edit_file(self, path: Path, params: EditParams) -> ToolResult:
         if not path.exists():
             if params.old_string:
                 return ToolResult.error_result(
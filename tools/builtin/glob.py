@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import re
+from config.config import ExecutorKind
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 
@@ -20,6 +21,7 @@ class GlobTool(Tool):
         "Find files matching a glob pattern. Supports ** for recursive matching."
     )
     kind = ToolKind.READ
+    executor_kind = ExecutorKind.THREAD
     schema = GlobParams
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
@@ -27,6 +29,11 @@ class GlobTool(Tool):
 
         search_path = resolve_path(invocation.cwd, params.path)
 
+        return await self.run_blocking(
+            invocation, self._glob, search_path, params, invocation.cwd
+        )
+
+    def _glob(self, search_path: Path, params: GlobParams, cwd: Path) -> ToolResult:
         if not search_path.exists() or not search_path.is_dir():
             return ToolResult.error_result(f"Directory does not exist: {search_path}")
 
@@ -40,7 +47,7 @@ class GlobTool(Tool):
 
         for file_path in matches[:1000]:
             try:
-                rel_path = file_path.relative_to(invocation.cwd)
+                rel_path = file_path.relative_to(cwd)
             except Exception:
                 rel_path = file_path
 
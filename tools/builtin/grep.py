@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import re
+from config.config import ExecutorKind
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 
@@ -22,6 +23,7 @@ class GrepTool(Tool):
     name = "grep"
     description = "Search for a regex pattern in file contents. Returns matching lines with file paths and line numbers."
     kind = ToolKind.READ
+    executor_kind = ExecutorKind.PROCESS
     schema = GrepParams
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
@@ -38,42 +40,13 @@ class GrepTool(Tool):
         except re.error as e:
             return ToolResult.error_result(f"Invalid regex pattern: {e}")
 
-        if search_path.is_dir():
-            files = self._find_files(search_path)
-        else:
-            files = [search_path]
-
-        output_lines = []
-        matches = 0
-
-        for file_path in files:
-            try:
-                content = file_path.read_text(encoding="utf-8")
-            except Exception:
-                continue
-
-            lines = content.splitlines()
-            file_matches = False
-
-            # === path.py ===
-            # 1: async def execute()
-            # 30: async def execute()
-
-            # === path2.py ===
-            # 1: async def execute()
-            # 30: async def execute()
-            for i, line in enumerate(lines, start=1):
-                if pattern.search(line):
-                    matches += 1
-                    if not file_matches:
-                        rel_path = file_path.relative_to(invocation.cwd)
-                        output_lines.append(f"=== {rel_path} ===")
-                        file_matches = True
-
-                    output_lines.append(f"{i}:{line}")
-
-            if file_matches:
-                output_lines.append("")
+        output_lines, matches, files_searched = await self.run_blocking(
+            invocation,
+            search_files,
+            search_path,
+            pattern,
+            invocation.cwd,
+        )
 
         if not output_lines:
             return ToolResult.success_result(
@@ -81,7 +54,7 @@ class GrepTool(Tool):
                 metadata={
                     "path": str(search_path),
                     "matches": 0,
-                    "files_searched": len(files),
+                    "files_searched": files_searched,
                 },
             )
 
@@ -90,28 +63,74 @@ class GrepTool(Tool):
             metadata={
                 "path": str(search_path),
                 "matches": matches,
-                "files_searched": len(files),
+                "files_searched": files_searched,
             },
         )
 
-    def _find_files(self, search_path: Path) -> list[Path]:
-        files = []
 
-        for root, dirs, filenames in os.walk(search_path):
-            dirs[:] = [
-                d
-                for d in dirs
-                if d not in {"node_modules", "__pycache__", ".git", ".venv", "venv"}
-            ]
+def search_files(
+    search_path: Path,
+    pattern: re.Pattern[str],
+    cwd: Path,
+) -> tuple[list[str], int, int]:
+    if search_path.is_dir():
+        files = _find_files(search_path)
+    else:
+        files = [search_path]
+
+    output_lines = []
+    matches = 0
+
+    for file_path in files:
+        try:
+            content = file_path.read_text(encoding="utf-8")
+        except Exception:
+            continue
+
+        lines = content.splitlines()
+        file_matches = False
+
+        # === path.py ===
+        # 1: async def execute()
+        # 30: async def execute()
+
+        # === path2.py ===
+        # 1: async def execute()
+        # 30: async def execute()
+        for i, line in enumerate(lines, start=1):
+            if pattern.search(line):
+                matches += 1
+                if not file_matches:
+                    rel_path = file_path.relative_to(cwd)
+                    output_lines.append(f"=== {rel_path} ===")
+                    file_matches = True
+
+                output_lines.append(f"{i}:{line}")
+
+        if file_matches:
+            output_lines.append("")
 
-            for filename in filenames:
-                if filename.startswith("."):
-                    continue
+    return output_lines, matches, len(files)
+
+
+def _find_files(search_path: Path) -> list[Path]:
+    files = []
+
+    for root, dirs, filenames in os.walk(search_path):
+        dirs[:] = [
+            d
+            for d in dirs
+            if d not in {"node_modules", "__pycache__", ".git", ".venv", "venv"}
+        ]
+
+        for filename in filenames:
+            if filename.startswith("."):
+                continue
 
-                file_path = Path(root) / filename
-                if not is_binary_file(file_path):
-                    files.append(file_path)
-                    if len(files) >= 500:
-                        return files
+            file_path = Path(root) / filename
+            if not is_binary_file(file_path):
+                files.append(file_path)
+                if len(files) >= 500:
+                    return files
 
-        return files
+    return files
@@ -1,3 +1,5 @@
+from pathlib import Path
+from config.config import ExecutorKind
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 
@@ -18,6 +20,7 @@ class ListDirTool(Tool):
     name = "list_dir"
     description = "List contents of a directory"
     kind = ToolKind.READ
+    executor_kind = ExecutorKind.THREAD
     schema = ListDirParams
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
@@ -25,6 +28,9 @@ class ListDirTool(Tool):
 
         dir_path = resolve_path(invocation.cwd, params.path)
 
+        return await self.run_blocking(invocation, self._list_dir, dir_path, params)
+
+    def _list_dir(self, dir_path: Path, params: ListDirParams) -> ToolResult:
         if not dir_path.exists() or not dir_path.is_dir():
             return ToolResult.error_result(f"Directory does not exist: {dir_path}")
 
@@ -1,6 +1,6 @@
 import json
 import uuid
-from config.config import Config
+from config.config import Config, ExecutorKind
 from config.loader import get_data_dir
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
@@ -20,6 +20,8 @@ class MemoryTool(Tool):
     name = "memory"
     description = "Store and retrieve persistent memory. Use this to remember user preferences, important context or notes."
     kind = ToolKind.MEMORY
+    executor_kind = ExecutorKind.THREAD
+    max_concurrency = 1
     schema = MemoryParams
 
     def _load_memory(self) -> dict:
@@ -46,6 +48,9 @@ class MemoryTool(Tool):
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = MemoryParams(**invocation.params)
 
+        return await self.run_blocking(invocation, self._run_action, params)
+
+    def _run_action(self, params: MemoryParams) -> ToolResult:
         if params.action.lower() == "set":
             if not params.key or not params.value:
                 return ToolResult.error_result(
@@ -1,5 +1,7 @@
+from pathlib import Path
 from pydantic import BaseModel, Field
 
+from config.config import ExecutorKind
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from utils.paths import is_binary_file, resolve_path
 from utils.text import count_tokens, truncate_text
@@ -33,6 +35,7 @@ class ReadFileTool(Tool):
         "Cannot read binary files (images, executables, etc.)."
     )
     kind = ToolKind.READ
+    executor_kind = ExecutorKind.THREAD
 
     schema = ReadFileParams
 
@@ -43,6 +46,9 @@ class ReadFileTool(Tool):
         params = ReadFileParams(**invocation.params)
         path = resolve_path(invocation.cwd, params.path)
 
+        return await self.run_blocking(invocation, self._read_file, path, params)
+
+    def _read_file(self, path: Path, params: ReadFileParams) -> ToolResult:
         if not path.exists():
             return ToolResult.error_result(f"File not found: {path}")
 
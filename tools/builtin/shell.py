@@ -108,12 +108,12 @@ class ShellTool(Tool):
                 timeout=params.timeout,
             )
         except asyncio.TimeoutError:
-            if sys.platform != "win32":
-                os.killpg(os.getpgid(process.pid), signal.SIGKILL)
-            else:
-                process.kill()
-            await process.wait()
+            await self._kill(process)
             return ToolResult.error_result(f"Command timed out after {params.timeout}s")
+        except asyncio.CancelledError:
+            # The caller's deadline expired; don't leave the command running.
+            await self._kill(process)
+            raise
 
         stdout = stdout_data.decode("utf-8", errors="replace")
         stderr = stderr_data.decode("utf-8", errors="replace")
@@ -140,6 +140,17 @@ class ShellTool(Tool):
             exit_code=exit_code,
         )
 
+    async def _kill(self, process: asyncio.subprocess.Process) -> None:
+        if process.returncode is None:
+            try:
+                if sys.platform != "win32":
+                    os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+                else:
+                    process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
     def _build_environment(self) -> dict[str, str]:
         env = os.environ.copy()
 
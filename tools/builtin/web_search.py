@@ -1,3 +1,4 @@
+from config.config import ExecutorKind
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 from ddgs import DDGS
@@ -17,13 +18,16 @@ class WebSearchTool(Tool):
     name = "web_search"
     description = "Search the web for information. Returns search results with titles, URLs and snippets"
     kind = ToolKind.NETWORK
+    executor_kind = ExecutorKind.THREAD
     schema = WebSearchParams
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = WebSearchParams(**invocation.params)
 
         try:
-            results = DDGS().text(
+            results = await self.run_blocking(
+                invocation,
+                DDGS().text,
                 params.query,
                 region="us-en",
                 safesearch="off",
@@ -1,3 +1,5 @@
+from pathlib import Path
+from config.config import ExecutorKind
 from tools.base import (
     FileDiff,
     Tool,
@@ -31,6 +33,7 @@ class WriteFileTool(Tool):
         "For partial modifications, use the edit tool instead."
     )
     kind = ToolKind.WRITE
+    executor_kind = ExecutorKind.THREAD
     schema = WriteFileParams
 
     async def get_confirmation(
@@ -39,14 +42,9 @@ class WriteFileTool(Tool):
         params = WriteFileParams(**invocation.params)
         path = resolve_path(invocation.cwd, params.path)
 
-        is_new_file = not path.exists()
-
-        old_content = ""
-        if not is_new_file:
-            try:
-                old_content = path.read_text(encoding="utf-8")
-            except:
-                pass
+        is_new_file, old_content = await self.run_blocking(
+            invocation, self._read_existing, path
+        )
 
         diff = FileDiff(
             path=path,
@@ -54,6 +52,7 @@ class WriteFileTool(Tool):
             new_content=params.content,
             is_new_file=is_new_file,
         )
+        await self.render_diff(invocation, diff)
 
         action = "Created" if is_new_file else "Updated"
 
@@ -66,10 +65,7 @@ class WriteFileTool(Tool):
             is_dangerous=not is_new_file,
         )
 
-    async def execute(self, invocation: ToolInvocation) -> ToolResult:
-        params = WriteFileParams(**invocation.params)
-        path = resolve_path(invocation.cwd, params.path)
-
+    def _read_existing(self, path: Path) -> tuple[bool, str]:
         is_new_file = not path.exists()
         old_content = ""
 
@@ -79,6 +75,21 @@ class WriteFileTool(Tool):
             except:
                 pass
 
+        return is_new_file, old_content
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = WriteFileParams(**invocation.params)
+        path = resolve_path(invocation.cwd, params.path)
+
+        result = await self.run_blocking(invocation, self._write_file, path, params)
+        if result.diff:
+            await self.render_diff(invocation, result.diff)
+
+        return result
+
+    def _write_file(self, path: Path, params: WriteFileParams) -> ToolResult:
+        is_new_file, old_content = self._read_existing(path)
+
         try:
             if params.create_directories:
                 ensure_parent_directory(path)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import logging
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from config.config import ExecutorKind, ToolExecutionConfig
+
+if TYPE_CHECKING:
+    from tools.base import Tool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ToolExecutor:
+    def __init__(self, config: ToolExecutionConfig) -> None:
+        self.config = config
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._limits: dict[str, asyncio.Semaphore] = {}
+
+    def _get_pool(self, kind: ExecutorKind) -> Executor:
+        if kind == ExecutorKind.PROCESS:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.config.process_workers,
+                )
+            return self._process_pool
+
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.config.thread_workers,
+                thread_name_prefix="tool-io",
+            )
+        return self._thread_pool
+
+    async def run(
+        self,
+        kind: ExecutorKind,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        if kind == ExecutorKind.INLINE:
+            return func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+
+        try:
+            return await loop.run_in_executor(self._get_pool(kind), call)
+        except BrokenProcessPool:
+            logger.warning("Tool process pool broke, recreating it")
+            self._process_pool = None
+            raise
+
+    def get_limit(self, tool: Tool) -> int:
+        limit = self.config.concurrency_limits.get(tool.name)
+        if limit is None:
+            limit = tool.max_concurrency or self.config.default_concurrency
+
+        return max(1, limit)
+
+    def limit(self, tool: Tool) -> asyncio.Semaphore:
+        semaphore = self._limits.get(tool.name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.get_limit(tool))
+            self._limits[tool.name] = semaphore
+
+        return semaphore
+
+    def shutdown(self) -> None:
+        if self._thread_pool:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+
+        if self._process_pool:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+
+        self._limits.clear()
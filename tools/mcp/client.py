@@ -1,17 +1,30 @@
+from __future__ import annotations
+import asyncio
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
+import logging
 import os
 from pathlib import Path
-from typing import Any
-from config.config import MCPServerConfig
+import random
+import time
+from typing import Any, Awaitable, Callable
+from config.config import MCPServerConfig, MCPTransportKind
 from fastmcp import Client
-from fastmcp.client.transports import SSETransport, StdioTransport
+from fastmcp.client.transports import ClientTransport, SSETransport, StdioTransport
+import httpx
+from telemetry import get_metrics
+from tools.mcp.http import PooledHttpTransport, get_http_pool
+
+logger = logging.getLogger(__name__)
 
 
 class MCPServerStatus(str, Enum):
     DISCONNECTED = "disconnected"
+    IDLE = "idle"
     CONNECTING = "connecting"
     CONNECTED = "connected"
+    RECONNECTING = "reconnecting"
     ERROR = "error"
 
 
@@ -24,6 +37,33 @@ class MCPToolInfo:
     server_name: str = ""
 
 
+@dataclass
+class MCPServerStats:
+    calls: int = 0
+    errors: int = 0
+    reconnects: int = 0
+    in_flight: int = 0
+    last_error: str | None = None
+    latencies_ms: deque[float] = field(default_factory=lambda: deque(maxlen=256))
+
+    def to_dict(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        result: dict[str, Any] = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+            "in_flight": self.in_flight,
+        }
+        if latencies:
+            result["p50_ms"] = round(latencies[len(latencies) // 2], 1)
+            result["p90_ms"] = round(latencies[int(len(latencies) * 0.9)], 1)
+            result["max_ms"] = round(latencies[-1], 1)
+        if self.last_error:
+            result["last_error"] = self.last_error
+
+        return result
+
+
 class MCPClient:
     def __init__(
         self,
@@ -35,7 +75,17 @@ class MCPClient:
         self.config = config
         self.cwd = cwd
         self.status = MCPServerStatus.DISCONNECTED
+        self.stats = MCPServerStats()
         self._client: Client | None = None
+        self._http_client: httpx.AsyncClient | None = None
+        self._connect_lock = asyncio.Lock()
+        # One session multiplexes concurrent requests; this bounds them.
+        self._request_limit = asyncio.Semaphore(config.max_concurrency)
+        self._heartbeat_task: asyncio.Task | None = None
+        self._reconnect_task: asyncio.Task | None = None
+        self._probe_task: asyncio.Task | None = None
+        self._closing = False
+        self._listeners: list[Callable[[MCPClient], None]] = []
 
         self._tools: dict[str, MCPToolInfo] = dict()
 
@@ -43,7 +93,18 @@ class MCPClient:
     def tools(self) -> list[MCPToolInfo]:
         return list(self._tools.values())
 
-    def _create_transport(self) -> StdioTransport | SSETransport:
+    def add_listener(self, listener: Callable[[MCPClient], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[MCPClient], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def load_cached_tools(self, tools: list[MCPToolInfo]) -> None:
+        self._tools = {tool.name: tool for tool in tools}
+        self.status = MCPServerStatus.IDLE
+
+    def _create_transport(self) -> ClientTransport:
         if self.config.command:
             env = os.environ.copy()
             env.update(self.config.env)
@@ -55,14 +116,21 @@ class MCPClient:
                 cwd=str(self.config.cwd or self.cwd),
                 log_file=Path(os.devnull),
             )
+        elif self.config.transport == MCPTransportKind.HTTP:
+            if self._http_client is None:
+                self._http_client = get_http_pool().acquire(self.config)
+            return PooledHttpTransport(
+                self.config.url, self._http_client, listen=self.config.http_listen
+            )
         else:
-            return SSETransport(url=self.config.url)
+            return SSETransport(url=self.config.url, headers=self.config.headers)
 
     async def connect(self) -> None:
         if self.status == MCPServerStatus.CONNECTED:
             return
 
         self.status = MCPServerStatus.CONNECTING
+        self._closing = False
 
         try:
             self._client = Client(transport=self._create_transport())
@@ -70,8 +138,9 @@ class MCPClient:
             await self._client.__aenter__()
 
             tool_result = await self._client.list_tools()
+            tools = {}
             for tool in tool_result:
-                self._tools[tool.name] = MCPToolInfo(
+                tools[tool.name] = MCPToolInfo(
                     name=tool.name,
                     description=tool.description or "",
                     input_schema=(
@@ -80,33 +149,197 @@ class MCPClient:
                     server_name=self.name,
                 )
 
+            self._tools = tools
             self.status = MCPServerStatus.CONNECTED
         except Exception:
             self.status = MCPServerStatus.ERROR
             raise
 
+        self._start_heartbeat()
+        for listener in list(self._listeners):
+            listener(self)
+
+    async def ensure_connected(self) -> None:
+        if self.status == MCPServerStatus.CONNECTED:
+            return
+
+        if self._reconnect_task and not self._reconnect_task.done():
+            # The supervisor owns reconnection; wait for its outcome.
+            await asyncio.shield(self._reconnect_task)
+            if self.status != MCPServerStatus.CONNECTED:
+                raise RuntimeError(
+                    f"MCP server {self.name} is unavailable: {self.stats.last_error}"
+                )
+            return
+
+        async with self._connect_lock:
+            if self.status == MCPServerStatus.CONNECTED:
+                return
+
+            try:
+                await asyncio.wait_for(
+                    self.connect(), timeout=self.config.startup_timeout_sec
+                )
+            except BaseException:
+                # A timed-out connect is cancelled mid-handshake.
+                if self.status == MCPServerStatus.CONNECTING:
+                    self.status = MCPServerStatus.ERROR
+                    self._client = None
+                raise
+
+    def _start_heartbeat(self) -> None:
+        interval = self.config.heartbeat_interval_sec
+        if not interval or (self._heartbeat_task and not self._heartbeat_task.done()):
+            return
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(interval))
+
+    async def _heartbeat(self, interval: float) -> None:
+        while self.status == MCPServerStatus.CONNECTED:
+            await asyncio.sleep(interval)
+            client = self._client
+            if client is None or self.status != MCPServerStatus.CONNECTED:
+                return
+
+            if not await self._ping(client, timeout=interval):
+                return
+
+    async def _ping(self, client: Client, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(client.ping(), timeout=timeout)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._connection_lost(f"ping failed: {str(e) or type(e).__name__}")
+            return False
+
+    def _start_probe(self, client: Client) -> None:
+        # Only the latest probe is tracked, so an older one is cancelled
+        # rather than left running where disconnect() can't reach it.
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+        self._probe_task = asyncio.create_task(self._ping(client, 5))
+
+    def _connection_lost(self, reason: str) -> None:
+        if self._closing or self.status != MCPServerStatus.CONNECTED:
+            return
+
+        logger.warning(f"MCP server {self.name} connection lost ({reason})")
+        self.stats.last_error = reason
+        self.status = MCPServerStatus.RECONNECTING
+        client, self._client = self._client, None
+        self._reconnect_task = asyncio.create_task(self._reconnect(client))
+
+    async def _reconnect(self, stale: Client | None) -> None:
+        if stale is not None:
+            try:
+                await asyncio.wait_for(stale.__aexit__(None, None, None), timeout=5)
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError) and self._closing:
+                    raise
+                logger.debug(f"Closing stale MCP session for {self.name}: {e}")
+
+        delay = self.config.reconnect_base_delay_sec
+        for attempt in range(1, self.config.reconnect_max_attempts + 1):
+            # Full jitter keeps restarted servers from being hit in lockstep.
+            await asyncio.sleep(random.uniform(0, delay))
+            if self._closing:
+                return
+
+            self.stats.reconnects += 1
+            get_metrics().increment("mcp_reconnects_total", server=self.name)
+            try:
+                await asyncio.wait_for(
+                    self.connect(), timeout=self.config.startup_timeout_sec
+                )
+                logger.info(f"MCP server {self.name} reconnected (attempt {attempt})")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._client = None
+                self.stats.last_error = (
+                    f"reconnect failed: {str(e) or type(e).__name__}"
+                )
+                self.status = MCPServerStatus.RECONNECTING
+                delay = min(delay * 2, self.config.reconnect_max_delay_sec)
+
+        self.status = MCPServerStatus.ERROR
+        logger.warning(
+            f"MCP server {self.name} unavailable after "
+            f"{self.config.reconnect_max_attempts} reconnect attempts"
+        )
+
     async def disconnect(self) -> None:
+        self._closing = True
+        tasks = [
+            t
+            for t in (self._heartbeat_task, self._reconnect_task, self._probe_task)
+            if t
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._heartbeat_task = self._reconnect_task = self._probe_task = None
+
         if self._client:
             await self._client.__aexit__(None, None, None)
             self._client = None
 
+        if self._http_client is not None:
+            await get_http_pool().release(self._http_client)
+            self._http_client = None
+
         self._tools.clear()
         self.status = MCPServerStatus.DISCONNECTED
 
-    async def call_tool(self, tool_name: str, arguments: dict[str, Any]):
-        if not self._client or self.status != MCPServerStatus.CONNECTED:
-            raise RuntimeError(f"Not connected to server {self.name}")
-
-        result = await self._client.call_tool(tool_name, arguments)
+    async def call_tool(
+        self,
+        tool_name: str,
+        arguments: dict[str, Any],
+        progress: (
+            Callable[[float, float | None, str | None], Awaitable[None]] | None
+        ) = None,
+    ) -> dict[str, Any]:
+        async with self._request_limit:
+            await self.ensure_connected()
+            client = self._client
+            if not client:
+                raise RuntimeError(f"Not connected to server {self.name}")
 
-        output = []
-        for item in result.content:
-            if hasattr(item, "text"):
-                output.append(item.text)
-            else:
-                output.append(str(item))
+            self.stats.in_flight += 1
+            started = time.perf_counter()
+            try:
+                # Tool errors come back as results; anything raised here is
+                # a protocol or transport failure.
+                result = await client.call_tool(
+                    tool_name,
+                    arguments,
+                    timeout=self.config.request_timeout_sec,
+                    progress_handler=progress,
+                    raise_on_error=False,
+                )
+            except Exception as e:
+                self.stats.errors += 1
+                self.stats.last_error = f"{tool_name}: {str(e) or type(e).__name__}"
+                get_metrics().increment("mcp_call_errors_total", server=self.name)
+                # Tell a dead server from a failed request without waiting
+                # for the next heartbeat.
+                if not client.is_connected():
+                    self._connection_lost(str(e) or type(e).__name__)
+                else:
+                    self._start_probe(client)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                self.stats.in_flight -= 1
+                self.stats.calls += 1
+                self.stats.latencies_ms.append(elapsed * 1000)
+                get_metrics().observe("mcp_call_seconds", elapsed, server=self.name)
 
+        # Content items are rendered by the caller against its output budget.
         return {
-            "output": "\n".join(output),
+            "content": result.content,
             "is_error": result.is_error,
         }
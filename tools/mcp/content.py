@@ -0,0 +1,113 @@
+from __future__ import annotations
+import base64
+import binascii
+from dataclasses import dataclass, field
+from typing import Any
+from context.blob_store import BlobStore
+from utils.text import truncate_text
+
+# Upper bound on characters per token, used to drop text that cannot fit the
+# budget before it is tokenized.
+MAX_CHARS_PER_TOKEN = 8
+
+
+@dataclass
+class RenderedContent:
+    output: str
+    truncated: bool = False
+    omitted_items: int = 0
+    blobs: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _store_binary(
+    store: BlobStore,
+    data: str,
+    mime_type: str | None,
+    label: str,
+    blobs: list[dict[str, Any]],
+) -> str:
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raw = data.encode("utf-8")
+
+    key = store.put_bytes(raw)
+    path = store.path(key)
+    blobs.append(
+        {"key": key, "mime_type": mime_type, "size": len(raw), "path": str(path)}
+    )
+    return f"[{label} {mime_type or 'application/octet-stream'}, {len(raw)} bytes, stored at {path}]"
+
+
+def _render_item(item: Any, store: BlobStore, blobs: list[dict[str, Any]]) -> str:
+    kind = getattr(item, "type", None)
+
+    if kind == "text":
+        return item.text
+    if kind in ("image", "audio"):
+        return _store_binary(store, item.data, item.mimeType, kind, blobs)
+    if kind == "resource":
+        resource = item.resource
+        if getattr(resource, "text", None) is not None:
+            return resource.text
+        return _store_binary(
+            store,
+            resource.blob,
+            resource.mimeType,
+            f"resource {resource.uri}",
+            blobs,
+        )
+    if kind == "resource_link":
+        return f"[resource link: {item.name} {item.uri}]"
+
+    return str(item)
+
+
+def render_content(
+    items: list[Any],
+    store: BlobStore,
+    max_tokens: int | None,
+    model: str,
+) -> RenderedContent:
+    # Text is cut on a token boundary once over budget; binary payloads go to
+    # the blob store and are replaced by a reference.
+    blobs: list[dict[str, Any]] = []
+    parts: list[str] = []
+    char_limit = max_tokens * MAX_CHARS_PER_TOKEN if max_tokens else None
+    size = 0
+    omitted = 0
+    cut = False
+
+    for item in items:
+        if char_limit is not None and size >= char_limit:
+            # Binary payloads are still stored; their references are small.
+            if getattr(item, "type", None) in ("text", "resource_link"):
+                omitted += 1
+                continue
+
+        stored = len(blobs)
+        text = _render_item(item, store, blobs)
+        is_reference = len(blobs) > stored
+        if (
+            char_limit is not None
+            and not is_reference
+            and size + len(text) > char_limit
+        ):
+            text = text[: max(0, char_limit - size)]
+            cut = True
+        parts.append(text)
+        size += len(text) + 1
+
+    output = "\n".join(parts)
+    truncated = cut or omitted > 0
+    if max_tokens is not None:
+        suffix = f"\n... [MCP output truncated to {max_tokens} tokens]"
+        limited = truncate_text(output, model, max_tokens, suffix=suffix)
+        if limited != output:
+            output, truncated = limited, True
+        elif truncated:
+            output += suffix
+
+    return RenderedContent(
+        output=output, truncated=truncated, omitted_items=omitted, blobs=blobs
+    )
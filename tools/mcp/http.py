@@ -0,0 +1,157 @@
+from __future__ import annotations
+import contextlib
+from dataclasses import dataclass
+import logging
+from typing import AsyncIterator
+import anyio
+from config.config import MCPServerConfig
+from fastmcp.client.transports import ClientTransport
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import StreamableHTTPTransport
+from mcp.shared.message import SessionMessage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PoolEntry:
+    client: httpx.AsyncClient
+    refs: int = 0
+
+
+class HttpClientPool:
+    # Servers with the same connection settings share one httpx client and its
+    # keep-alive connections. Requests themselves are never resent.
+    def __init__(self) -> None:
+        self._entries: dict[tuple, _PoolEntry] = {}
+
+    @staticmethod
+    def _key(config: MCPServerConfig) -> tuple:
+        return (
+            tuple(sorted(config.headers.items())),
+            config.http_connect_timeout_sec,
+            config.http_read_timeout_sec,
+            config.http_retries,
+            config.http_max_connections,
+            config.http_keepalive_expiry_sec,
+        )
+
+    @staticmethod
+    def _create(config: MCPServerConfig) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_connections,
+            keepalive_expiry=config.http_keepalive_expiry_sec,
+        )
+        return httpx.AsyncClient(
+            headers=config.headers,
+            # Reads cover server-sent event streams, so they get the long limit.
+            timeout=httpx.Timeout(
+                config.http_connect_timeout_sec, read=config.http_read_timeout_sec
+            ),
+            limits=limits,
+            transport=httpx.AsyncHTTPTransport(
+                retries=config.http_retries, limits=limits
+            ),
+        )
+
+    def acquire(self, config: MCPServerConfig) -> httpx.AsyncClient:
+        key = self._key(config)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PoolEntry(client=self._create(config))
+            self._entries[key] = entry
+
+        entry.refs += 1
+        return entry.client
+
+    async def release(self, client: httpx.AsyncClient) -> None:
+        for key, entry in self._entries.items():
+            if entry.client is client:
+                break
+        else:
+            return
+
+        entry.refs -= 1
+        if entry.refs > 0:
+            return
+
+        del self._entries[key]
+        await client.aclose()
+
+
+_pool = HttpClientPool()
+
+
+def get_http_pool() -> HttpClientPool:
+    return _pool
+
+
+class _RequestOnlyTransport(StreamableHTTPTransport):
+    async def handle_get_stream(self, client, read_stream_writer) -> None:
+        # Responses and progress arrive on each request's own stream; without
+        # the standalone GET stream an idle session holds no connection.
+        return
+
+
+class PooledHttpTransport(ClientTransport):
+    # MCP sessions are a header on ordinary requests, so many of them share the
+    # pooled connections; the server-initiated stream is opened only by listen().
+    def __init__(
+        self, url: str, http_client: httpx.AsyncClient, listen: bool = False
+    ) -> None:
+        self.url = url
+        self.http_client = http_client
+        self.listen = listen
+
+    @contextlib.asynccontextmanager
+    async def connect_session(self, **session_kwargs) -> AsyncIterator[ClientSession]:
+        async with self._streams() as (read_stream, write_stream):
+            async with ClientSession(
+                read_stream, write_stream, **session_kwargs
+            ) as session:
+                yield session
+
+    @contextlib.asynccontextmanager
+    async def _streams(self):
+        # Same wiring as mcp's streamable_http_client, which always listens.
+        transport_class = (
+            StreamableHTTPTransport if self.listen else _RequestOnlyTransport
+        )
+        transport = transport_class(self.url)
+        client = self.http_client
+        read_writer, read_stream = anyio.create_memory_object_stream[
+            SessionMessage | Exception
+        ](0)
+        write_stream, write_reader = anyio.create_memory_object_stream[SessionMessage](
+            0
+        )
+
+        async with anyio.create_task_group() as tg:
+            try:
+
+                def start_get_stream() -> None:
+                    tg.start_soon(transport.handle_get_stream, client, read_writer)
+
+                tg.start_soon(
+                    transport.post_writer,
+                    client,
+                    write_reader,
+                    read_writer,
+                    write_stream,
+                    start_get_stream,
+                    tg,
+                )
+                try:
+                    yield read_stream, write_stream
+                finally:
+                    if transport.session_id:
+                        await transport.terminate_session(client)
+                    tg.cancel_scope.cancel()
+            finally:
+                await read_writer.aclose()
+                await write_stream.aclose()
+
+    def __repr__(self) -> str:
+        return f"<PooledHttpTransport(url='{self.url}')>"
@@ -1,16 +1,26 @@
 import asyncio
+import logging
 from typing import Any
 from config.config import Config
-from tools.mcp.client import MCPClient, MCPServerStatus
+from config.loader import get_data_dir
+from tools.mcp.client import MCPClient
 from tools.mcp.mcp_tool import MCPTool
+from tools.mcp.pool import get_mcp_pool
+from tools.mcp.schema_cache import MCPSchemaCache, server_cache_key
 from tools.registry import ToolRegistry
 
+logger = logging.getLogger(__name__)
+
 
 class MCPManager:
     def __init__(self, config: Config):
         self.config = config
         self._clients: dict[str, MCPClient] = {}
         self._initialized = False
+        self._registry: ToolRegistry | None = None
+        self._warm_up_tasks: set[asyncio.Task] = set()
+        self._registered: dict[str, set[str]] = {}
+        self.schema_cache = MCPSchemaCache(get_data_dir() / "mcp_cache")
 
     async def initialize(self) -> None:
         if self._initialized:
@@ -21,53 +31,108 @@ class MCPManager:
         if not mcp_configs:
             return
 
+        eager: list[MCPClient] = []
         for name, server_config in mcp_configs.items():
             if not server_config.enabled:
                 continue
 
-            self._clients[name] = MCPClient(
-                name=name,
-                config=server_config,
-                cwd=self.config.cwd,
-            )
+            client = get_mcp_pool().acquire(name, server_config, self.config.cwd)
+            client.add_listener(self._on_client_connected)
+            self._clients[name] = client
 
-        connection_tasks = [
-            asyncio.wait_for(
-                client.connect(),
-                timeout=client.config.startup_timeout_sec,
-            )
-            for name, client in self._clients.items()
-        ]
+            if client.tools:
+                # Borrowed from another session (usually the parent agent)
+                # that already connected or loaded the cached listing.
+                continue
+
+            # Lazy servers with a cached tool listing are registered without
+            # connecting; the connection is made on the first tool call.
+            cached = None
+            if server_config.lazy:
+                cached = self.schema_cache.load(self._cache_key(client))
+            if cached is None:
+                eager.append(client)
+                continue
+
+            client.load_cached_tools(cached)
+            if server_config.warm_up:
+                self._start_warm_up(client)
 
-        await asyncio.gather(*connection_tasks, return_exceptions=True)
+        await asyncio.gather(
+            *(client.ensure_connected() for client in eager),
+            return_exceptions=True,
+        )
 
         self._initialized = True
 
+    def _cache_key(self, client: MCPClient) -> str:
+        return server_cache_key(client.config, client.cwd)
+
+    def _on_client_connected(self, client: MCPClient) -> None:
+        self.schema_cache.store(self._cache_key(client), client.name, client.tools)
+        if self._registry is not None:
+            self._register_client_tools(client, self._registry)
+
+    def _start_warm_up(self, client: MCPClient) -> None:
+        task = asyncio.create_task(self._warm_up(client))
+        self._warm_up_tasks.add(task)
+        task.add_done_callback(self._warm_up_tasks.discard)
+
+    async def _warm_up(self, client: MCPClient) -> None:
+        try:
+            await client.ensure_connected()
+        except Exception as e:
+            logger.debug(f"Warm-up of MCP server {client.name} failed: {e}")
+
+    def _register_client_tools(self, client: MCPClient, registry: ToolRegistry) -> int:
+        names: set[str] = set()
+        for tool_info in client.tools:
+            mcp_tool = MCPTool(
+                tool_info=tool_info,
+                client=client,
+                config=self.config,
+                name=f"{client.name}__{tool_info.name}",
+            )
+            registry.register_mcp_tool(mcp_tool)
+            names.add(mcp_tool.name)
+
+        # A live listing replaces the cached one; tools the server no longer
+        # offers are dropped.
+        for name in self._registered.get(client.name, set()) - names:
+            registry.unregister_mcp_tool(name)
+        self._registered[client.name] = names
+
+        return len(names)
+
     def register_tools(self, registry: ToolRegistry) -> int:
+        self._registry = registry
         count = 0
 
         for client in self._clients.values():
-            if client.status != MCPServerStatus.CONNECTED:
+            # Lazy clients carry cached tools before they ever connect.
+            if not client.tools:
                 continue
 
-            for tool_info in client.tools:
-                mcp_tool = MCPTool(
-                    tool_info=tool_info,
-                    client=client,
-                    config=self.config,
-                    name=f"{client.name}__{tool_info.name}",
-                )
-                registry.register_mcp_tool(mcp_tool)
-                count += 1
+            count += self._register_client_tools(client, registry)
 
         return count
 
     async def shutdown(self) -> None:
-        disconnection_tasks = [client.disconnect() for client in self._clients.values()]
+        for task in self._warm_up_tasks:
+            task.cancel()
+        await asyncio.gather(*self._warm_up_tasks, return_exceptions=True)
+
+        pool = get_mcp_pool()
+        for client in self._clients.values():
+            client.remove_listener(self._on_client_connected)
 
-        await asyncio.gather(*disconnection_tasks, return_exceptions=True)
+        await asyncio.gather(
+            *(pool.release(client) for client in self._clients.values()),
+            return_exceptions=True,
+        )
 
         self._clients.clear()
+        self._registered.clear()
         self._initialized = False
 
     def get_all_servers(self) -> list[dict[str, Any]]:
@@ -77,6 +142,7 @@ class MCPManager:
                 "name": name,
                 "status": client.status.value,
                 "tools": len(client.tools),
+                "stats": client.stats.to_dict(),
             }
             servers.append(server_info)
 
@@ -1,7 +1,10 @@
 from typing import Any
-from config.config import Config
+from config.config import Config, ExecutorKind
+from config.loader import get_data_dir
+from context.blob_store import BlobStore
 from tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from tools.mcp.client import MCPClient, MCPToolInfo
+from tools.mcp.content import render_content
 from utils.paths import resolve_path
 
 
@@ -34,18 +37,53 @@ class MCPTool(Tool):
 
     kind = ToolKind.MCP
 
+    @property
+    def max_output_tokens(self) -> int | None:
+        server_config = self._client.config
+        return server_config.tool_output_tokens.get(
+            self._tool_info.name, server_config.max_output_tokens
+        )
+
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        progress = None
+        if invocation.progress is not None:
+            report = invocation.progress
+
+            async def progress(
+                value: float, total: float | None, message: str | None
+            ) -> None:
+                report(value, total, message)
+
         try:
             result = await self._client.call_tool(
                 self._tool_info.name,
                 invocation.params,
+                progress=progress,
+            )
+            # Decoding payloads and tokenizing large text stays off the loop.
+            rendered = await self.run_blocking(
+                invocation,
+                render_content,
+                result["content"],
+                BlobStore(get_data_dir() / "blobs"),
+                self.max_output_tokens,
+                self.config.model_name,
+                kind=ExecutorKind.THREAD,
             )
-            output = result.get("output", "")
-            is_error = result.get("is_error", False)
-
-            if is_error:
-                return ToolResult.error_result(output)
-
-            return ToolResult.success_result(output)
         except Exception as e:
             return ToolResult.error_result(f"MCP tool failed: {e}")
+
+        metadata: dict[str, Any] = {}
+        if rendered.blobs:
+            metadata["blobs"] = rendered.blobs
+        if rendered.omitted_items:
+            metadata["omitted_items"] = rendered.omitted_items
+
+        if result["is_error"]:
+            return ToolResult.error_result(
+                rendered.output, metadata=metadata, truncated=rendered.truncated
+            )
+
+        return ToolResult.success_result(
+            rendered.output, metadata=metadata, truncated=rendered.truncated
+        )
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+from config.config import MCPServerConfig
+from tools.mcp.client import MCPClient
+from tools.mcp.schema_cache import server_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PoolEntry:
+    client: MCPClient
+    refs: int = 0
+
+
+class MCPClientPool:
+    # Sessions configuring the same server (sub-agents inherit the parent's
+    # config) borrow one client; the last release disconnects it.
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, str, str], _PoolEntry] = {}
+
+    @staticmethod
+    def _key(name: str, config: MCPServerConfig, cwd: Path) -> tuple[str, str, str]:
+        return (name, server_cache_key(config), str(config.cwd or cwd))
+
+    def acquire(self, name: str, config: MCPServerConfig, cwd: Path) -> MCPClient:
+        key = self._key(name, config, cwd)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PoolEntry(client=MCPClient(name=name, config=config, cwd=cwd))
+            self._entries[key] = entry
+        else:
+            logger.debug(f"Reusing pooled MCP client {name}")
+
+        entry.refs += 1
+        return entry.client
+
+    async def release(self, client: MCPClient) -> None:
+        for key, entry in self._entries.items():
+            if entry.client is client:
+                break
+        else:
+            return
+
+        entry.refs -= 1
+        if entry.refs > 0:
+            return
+
+        # Drop it before awaiting so a concurrent acquire starts a new client.
+        del self._entries[key]
+        await client.disconnect()
+
+
+_pool = MCPClientPool()
+
+
+def get_mcp_pool() -> MCPClientPool:
+    return _pool
@@ -0,0 +1,82 @@
+from __future__ import annotations
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from config.config import MCPServerConfig
+from tools.mcp.client import MCPToolInfo
+
+logger = logging.getLogger(__name__)
+
+
+def server_cache_key(config: MCPServerConfig, cwd: Path | None = None) -> str:
+    # Anything that selects which server (and so which tools) we get is part
+    # of the key. Env values are hashed, never written out. Stdio servers
+    # without a configured cwd start in the session's ``cwd``.
+    if config.url:
+        cwd = None
+    cwd = config.cwd or cwd
+    identity = {
+        "command": config.command,
+        "args": list(config.args),
+        "env": dict(sorted(config.env.items())),
+        "cwd": str(cwd) if cwd else None,
+        "url": config.url,
+        "transport": config.transport.value if config.url else None,
+        "headers": dict(sorted(config.headers.items())),
+    }
+    return hashlib.sha256(
+        json.dumps(identity, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class MCPSchemaCache:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def load(self, key: str) -> list[MCPToolInfo] | None:
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return [MCPToolInfo(**tool) for tool in data["tools"]]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable MCP schema cache {path}: {e}")
+            return None
+
+    def store(self, key: str, server_name: str, tools: list[MCPToolInfo]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        data = {
+            "server": server_name,
+            "cached_at": datetime.now().isoformat(),
+            "tools": [
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "input_schema": tool.input_schema,
+                    "server_name": tool.server_name,
+                }
+                for tool in tools
+            ],
+        }
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write MCP schema cache {path}: {e}")
+
+    def invalidate(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
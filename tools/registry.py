@@ -1,21 +1,28 @@
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 from config.config import Config
 from hooks.hook_system import HookSystem
 from safety.approval import ApprovalContext, ApprovalDecision, ApprovalManager
 from tools.base import Tool, ToolInvocation, ToolResult
 import logging
+from tools.executor import ToolExecutor
+from telemetry import current_span, get_metrics, traced
 from tools.builtin import ReadFileTool, get_all_builtin_tools
-from tools.subagents import SubagentTool, get_default_subagent_definitions
+from tools.subagents import (
+    SubagentBatchTool,
+    SubagentTool,
+    get_default_subagent_definitions,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class ToolRegistry:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, executor: ToolExecutor | None = None):
         self._tools: dict[str, Tool] = {}
         self._mcp_tools: dict[str, Tool] = {}
         self.config = config
+        self.executor = executor or ToolExecutor(config.tool_execution)
 
     @property
     def connected_mcp_servers(self) -> list[Tool]:
@@ -39,7 +46,22 @@ class ToolRegistry:
 
         return False
 
+    def unregister_mcp_tool(self, name: str) -> bool:
+        if name in self._mcp_tools:
+            del self._mcp_tools[name]
+            return True
+
+        return False
+
+    def is_allowed(self, name: str) -> bool:
+        return not self.config.allowed_tools or name in self.config.allowed_tools
+
     def get(self, name: str) -> Tool | None:
+        # Sub-agents share the parent's MCP servers but only see the tools
+        # their config allows, so lookups are filtered as well as listings.
+        if not self.is_allowed(name):
+            return None
+
         if name in self._tools:
             return self._tools[name]
         elif name in self._mcp_tools:
@@ -57,14 +79,14 @@ class ToolRegistry:
             tools.append(mcp_tool)
 
         if self.config.allowed_tools:
-            allowed_set = set(self.config.allowed_tools)
-            tools = [t for t in tools if t.name in allowed_set]
+            tools = [t for t in tools if self.is_allowed(t.name)]
 
         return tools
 
     def get_schemas(self) -> list[dict[str, Any]]:
         return [tool.to_openai_schema() for tool in self.get_tools()]
 
+    @traced("tool.invoke")
     async def invoke(
         self,
         name: str,
@@ -72,7 +94,9 @@ class ToolRegistry:
         cwd: Path,
         hook_system: HookSystem,
         approval_manager: ApprovalManager | None = None,
+        progress: Callable[[float, float | None, str | None], None] | None = None,
     ) -> ToolResult:
+        current_span().set_attribute("tool", name)
         tool = self.get(name)
         if tool is None:
             result = ToolResult.error_result(
@@ -100,6 +124,8 @@ class ToolRegistry:
         invocation = ToolInvocation(
             params=params,
             cwd=cwd,
+            executor=self.executor,
+            progress=progress,
         )
         if approval_manager:
             confirmation = await tool.get_confirmation(invocation)
@@ -129,7 +155,8 @@ class ToolRegistry:
                         return result
 
         try:
-            result = await tool.execute(invocation)
+            async with self.executor.limit(tool):
+                result = await tool.execute(invocation)
         except Exception as e:
             logger.exception(f"Tool {name} raised unexpected error")
             result = ToolResult.error_result(
@@ -140,6 +167,11 @@ class ToolRegistry:
                 },
             )
 
+        get_metrics().increment(
+            "tool_invocations_total",
+            tool=name,
+            success=result.success,
+        )
         await hook_system.trigger_after_tool(name, params, result)
         return result
 
@@ -150,7 +182,9 @@ def create_default_registry(config: Config) -> ToolRegistry:
     for tool_class in get_all_builtin_tools():
         registry.register(tool_class(config))
 
-    for subagent_def in get_default_subagent_definitions():
+    subagent_defs = get_default_subagent_definitions()
+    for subagent_def in subagent_defs:
         registry.register(SubagentTool(config, subagent_def))
+    registry.register(SubagentBatchTool(config, subagent_defs))
 
     return registry
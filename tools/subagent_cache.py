@@ -0,0 +1,197 @@
+from __future__ import annotations
+from dataclasses import asdict
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import subprocess
+import time
+from config.config import Config, SubagentConfig
+from config.loader import get_data_dir
+from tools.subagents import SubagentDefinition, SubagentRun, subagent_route
+
+logger = logging.getLogger(__name__)
+
+SKIP_DIRS = {"node_modules", "__pycache__", ".git", ".venv", "venv"}
+# Workspaces outside git are fingerprinted by walking them; past this many
+# files that costs more than it saves and results are not cached.
+MAX_WALK_FILES = 20_000
+# Space-separated fields before the path in ``git status --porcelain=v2``.
+_PATH_FIELD = {"1": 8, "2": 9, "u": 10}
+
+
+def normalize_goal(goal: str) -> str:
+    # Case is kept: identifiers in a goal are case-sensitive.
+    return " ".join(goal.split()).rstrip(" .?!")
+
+
+def _git(cwd: Path, *args: str) -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _git_fingerprint(cwd: Path) -> str | None:
+    top = _git(cwd, "rev-parse", "--show-toplevel")
+    if top is None:
+        return None
+    status = _git(cwd, "status", "--porcelain=v2", "-z", "--untracked-files=all")
+    if status is None:
+        return None
+
+    root = Path(top.strip())
+    digest = hashlib.sha256()
+    # A repository without commits has no HEAD; its status still counts.
+    digest.update((_git(cwd, "rev-parse", "HEAD") or "").encode())
+    # Status only says a file is dirty, so a dirty file edited again would
+    # look the same; its size and mtime tell the edits apart.
+    entries = iter(status.split("\0"))
+    for entry in entries:
+        if not entry:
+            continue
+        digest.update(entry.encode("utf-8", errors="replace"))
+        kind = entry[0]
+        if kind == "2":
+            # Renames and copies are followed by the original path.
+            digest.update(next(entries, "").encode("utf-8", errors="replace"))
+        path = entry.split(" ", _PATH_FIELD.get(kind, 1))[-1]
+        try:
+            stat = (root / path).stat()
+        except OSError:
+            continue
+        digest.update(f":{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return "git:" + digest.hexdigest()
+
+
+def _walk_fingerprint(cwd: Path) -> str | None:
+    digest = hashlib.sha256()
+    files = 0
+    for root, dirs, names in os.walk(cwd):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(names):
+            path = Path(root) / name
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files += 1
+            if files > MAX_WALK_FILES:
+                return None
+            digest.update(
+                f"{path.relative_to(cwd)}:{stat.st_size}:{stat.st_mtime_ns}\0".encode(
+                    "utf-8", errors="replace"
+                )
+            )
+    return "walk:" + digest.hexdigest()
+
+
+def workspace_fingerprint(cwd: Path) -> str | None:
+    # HEAD plus every changed or untracked file in git (ignored files are not
+    # counted), otherwise size and mtime of every file; None if too costly.
+    return _git_fingerprint(cwd) or _walk_fingerprint(cwd)
+
+
+class SubagentResultCache:
+    # One JSON file per entry, keyed by definition, model, goal and workspace
+    # fingerprint, so any workspace change is a miss.
+    def __init__(self, root: Path, ttl_sec: float | None) -> None:
+        self.root = root
+        self.ttl_sec = ttl_sec
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def key(
+        self, config: Config, definition: SubagentDefinition, goal: str
+    ) -> str | None:
+        fingerprint = workspace_fingerprint(config.cwd)
+        if fingerprint is None:
+            return None
+
+        route = subagent_route(config, definition)
+        identity = {
+            "subagent": definition.name,
+            "goal_prompt": definition.goal_prompt,
+            "allowed_tools": definition.allowed_tools,
+            "max_turns": definition.max_turns,
+            "model": (route and route.name) or config.model.name,
+            "goal": normalize_goal(goal),
+            "cwd": str(config.cwd.resolve()),
+            "workspace": fingerprint,
+        }
+        return hashlib.sha256(
+            json.dumps(identity, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_sec is not None and time.time() - stored_at > self.ttl_sec
+
+    def load(self, key: str) -> SubagentRun | None:
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if self._expired(data["stored_at"]):
+                path.unlink(missing_ok=True)
+                return None
+            run = SubagentRun(**data["run"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable sub-agent cache entry {path}: {e}")
+            return None
+
+        run.cached = True
+        return run
+
+    def store(self, key: str, run: SubagentRun) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        data = {
+            "stored_at": time.time(),
+            "cached_at": datetime.now().isoformat(),
+            "run": asdict(run),
+        }
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write sub-agent cache entry {path}: {e}")
+
+    def prune(self) -> int:
+        if self.ttl_sec is None or not self.root.exists():
+            return 0
+
+        removed = 0
+        cutoff = time.time() - self.ttl_sec
+        for path in self.root.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+_cache: SubagentResultCache | None = None
+
+
+def get_subagent_cache(settings: SubagentConfig) -> SubagentResultCache:
+    global _cache
+    if _cache is None:
+        _cache = SubagentResultCache(
+            get_data_dir() / "subagent_cache", settings.cache_ttl_sec
+        )
+        removed = _cache.prune()
+        if removed:
+            logger.debug(f"Pruned {removed} expired sub-agent cache entries")
+    return _cache
@@ -0,0 +1,340 @@
+from __future__ import annotations
+import argparse
+import asyncio
+from dataclasses import asdict
+import json
+import logging
+import math
+import os
+from pathlib import Path
+import signal
+import struct
+import sys
+from typing import Any
+from config.config import Config, SubagentConfig, SubagentIsolation
+from tools.subagents import (
+    SubagentBudget,
+    SubagentDefinition,
+    SubagentRun,
+    run_subagent,
+)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Parent and worker exchange 4-byte length-prefixed JSON over the worker's
+# stdin/stdout: "run" goes in; "usage" updates and one "result" come back.
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+WORKER_DEADLINE_GRACE_SEC = 30
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def encode_message(message: dict[str, Any]) -> bytes:
+    data = json.dumps(message, default=str).encode("utf-8")
+    return _HEADER.pack(len(data)) + data
+
+
+async def read_message(reader: asyncio.StreamReader) -> dict[str, Any] | None:
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Worker message too large: {length} bytes")
+
+    return json.loads(await reader.readexactly(length))
+
+
+class SubagentWorker:
+    def __init__(self, process: asyncio.subprocess.Process) -> None:
+        self.process = process
+        self.tasks = 0
+        self.finished = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def send(self, message: dict[str, Any]) -> None:
+        self.process.stdin.write(encode_message(message))
+        await self.process.stdin.drain()
+
+    async def receive(self) -> dict[str, Any] | None:
+        return await read_message(self.process.stdout)
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+
+    async def close(self) -> None:
+        if self.alive:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.kill()
+        await self.process.wait()
+
+
+class SubagentWorkerPool:
+    # Idle workers are reused, so imports are paid once per worker. Workers that
+    # crashed or were cancelled mid-run are discarded; after shutdown() busy ones
+    # are closed when they finish.
+    def __init__(self, settings: SubagentConfig) -> None:
+        self.settings = settings.model_copy()
+        self._idle: list[SubagentWorker] = []
+        self._workers: set[SubagentWorker] = set()
+        self._spawning = 0
+        self._available = asyncio.Condition()
+        self._closed = False
+
+    async def _spawn(self) -> SubagentWorker:
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (str(PROJECT_ROOT), env.get("PYTHONPATH")) if p
+        )
+        limits: list[str] = []
+        if self.settings.worker_memory_mb:
+            limits += ["--memory-mb", str(self.settings.worker_memory_mb)]
+        if self.settings.worker_cpu_seconds:
+            limits += ["--cpu-seconds", str(self.settings.worker_cpu_seconds)]
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "tools.subagent_worker",
+            *limits,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        logger.debug(f"Started sub-agent worker {process.pid}")
+        return SubagentWorker(process)
+
+    async def _acquire(self) -> SubagentWorker:
+        async with self._available:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    self._workers.discard(worker)
+
+                if len(self._workers) + self._spawning < self.settings.worker_pool_size:
+                    break
+                await self._available.wait()
+
+            # Reserve the slot before spawning so waiters see it taken.
+            self._spawning += 1
+
+        try:
+            worker = await self._spawn()
+            self._workers.add(worker)
+        finally:
+            self._spawning -= 1
+        return worker
+
+    async def _release(self, worker: SubagentWorker, reusable: bool) -> None:
+        max_tasks = self.settings.worker_max_tasks
+        if (
+            reusable
+            and worker.alive
+            and not self._closed
+            and not (max_tasks and worker.tasks >= max_tasks)
+        ):
+            self._idle.append(worker)
+        else:
+            self._workers.discard(worker)
+            worker.kill()
+            await worker.process.wait()
+
+        async with self._available:
+            self._available.notify()
+
+    async def run(
+        self,
+        config: Config,
+        definition: SubagentDefinition,
+        goal: str,
+        budget: SubagentBudget | None = None,
+    ) -> SubagentRun:
+        # The worker runs the child inline; it must not start workers itself.
+        child_config = config.to_dict()
+        child_config["subagents"]["isolation"] = SubagentIsolation.INLINE.value
+
+        worker = await self._acquire()
+        worker.tasks += 1
+        worker.finished = False
+        try:
+            await worker.send(
+                {
+                    "type": "run",
+                    "config": child_config,
+                    "definition": asdict(definition),
+                    "goal": goal,
+                    "allowance": budget.remaining() if budget else None,
+                }
+            )
+            # The child enforces its own deadline; this only catches a worker
+            # that stopped responding.
+            async with asyncio.timeout(
+                definition.timeout_seconds + WORKER_DEADLINE_GRACE_SEC
+            ):
+                return await self._collect(worker, goal, budget)
+        except TimeoutError:
+            return SubagentRun(
+                goal=goal,
+                termination="timeout",
+                response=f"Sub-agent worker did not finish within "
+                f"{definition.timeout_seconds}s and was killed",
+            )
+        except asyncio.CancelledError:
+            # The child cannot be stopped mid-run; the worker goes with it.
+            worker.kill()
+            raise
+        except (OSError, ValueError) as e:
+            return SubagentRun(
+                goal=goal,
+                termination="error",
+                error=str(e),
+                response=f"Sub-agent worker failed: {e}",
+            )
+        finally:
+            await self._release(worker, worker.finished)
+
+    async def _collect(
+        self,
+        worker: SubagentWorker,
+        goal: str,
+        budget: SubagentBudget | None,
+    ) -> SubagentRun:
+        while True:
+            message = await worker.receive()
+            if message is None:
+                code = await worker.process.wait()
+                if code == -getattr(signal, "SIGXCPU", 0):
+                    error = "Sub-agent worker exceeded its CPU time limit"
+                else:
+                    error = f"Sub-agent worker exited with code {code}"
+                return SubagentRun(
+                    goal=goal, termination="error", error=error, response=error
+                )
+            if message["type"] == "usage":
+                if budget is not None:
+                    budget.charge(message["tokens"])
+            elif message["type"] == "result":
+                worker.finished = True
+                return SubagentRun(**message["run"])
+
+    async def shutdown(self) -> None:
+        self._closed = True
+        workers, self._idle = self._idle, []
+        for worker in workers:
+            self._workers.discard(worker)
+        await asyncio.gather(
+            *(worker.close() for worker in workers), return_exceptions=True
+        )
+
+
+_pool: SubagentWorkerPool | None = None
+
+
+def _pool_settings(settings: SubagentConfig) -> tuple:
+    return (
+        settings.worker_pool_size,
+        settings.worker_memory_mb,
+        settings.worker_cpu_seconds,
+        settings.worker_max_tasks,
+    )
+
+
+async def get_worker_pool(settings: SubagentConfig) -> SubagentWorkerPool:
+    # Workers carry their limits from startup, so a caller with different
+    # worker settings gets a new pool and the old one is retired.
+    global _pool
+    if _pool is not None and _pool_settings(_pool.settings) != _pool_settings(settings):
+        pool, _pool = _pool, None
+        await pool.shutdown()
+    if _pool is None:
+        _pool = SubagentWorkerPool(settings)
+    return _pool
+
+
+async def shutdown_worker_pool() -> None:
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.shutdown()
+
+
+def _limit_memory(memory_mb: int | None) -> None:
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _limit_cpu(cpu_seconds: int | None) -> None:
+    # RLIMIT_CPU counts the worker's whole lifetime, so the soft limit is
+    # moved before each run to allow ``cpu_seconds`` more than used so far.
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = math.ceil(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+async def _serve(memory_mb: int | None = None, cpu_seconds: int | None = None) -> None:
+    _limit_memory(memory_mb)
+
+    # Keep the protocol stream for ourselves; anything the child prints goes
+    # to stderr instead.
+    out = os.dup(sys.stdout.fileno())
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def send(message: dict[str, Any]) -> None:
+        data = encode_message(message)
+        while data:
+            data = data[os.write(out, data) :]
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_MESSAGE_BYTES)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+
+    while True:
+        message = await read_message(reader)
+        if message is None:
+            return
+
+        budget = SubagentBudget(
+            limit=message["allowance"],
+            on_charge=lambda tokens: send({"type": "usage", "tokens": tokens}),
+        )
+        _limit_cpu(cpu_seconds)
+        run = await run_subagent(
+            Config(**message["config"]),
+            SubagentDefinition(**message["definition"]),
+            message["goal"],
+            budget,
+        )
+        send({"type": "result", "run": asdict(run)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memory-mb", type=int)
+    parser.add_argument("--cpu-seconds", type=int)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.memory_mb, args.cpu_seconds))
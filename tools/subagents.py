@@ -1,8 +1,10 @@
 import asyncio
-from typing import Any
-from config.config import Config
+import contextlib
+from typing import Any, Callable
+from config.config import Config, ModelRoute, SubagentIsolation
+from context.manager import SUMMARY_ACK, is_summary_message
 from tools.base import Tool, ToolInvocation, ToolResult
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pydantic import BaseModel, Field
 
 
@@ -20,6 +22,250 @@ class SubagentDefinition:
     allowed_tools: list[str] | None = None
     max_turns: int = 20
     timeout_seconds: float = 600
+    # Never changes the workspace, so a result can be reused while the
+    # workspace stays the same.
+    read_only: bool = False
+
+
+@dataclass
+class SubagentBudget:
+    limit: int | None = None
+    used: int = 0
+    on_charge: Callable[[int], None] | None = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.limit is not None and self.used >= self.limit
+
+    def remaining(self) -> int | None:
+        return None if self.limit is None else max(0, self.limit - self.used)
+
+    def charge(self, tokens: int) -> None:
+        self.used += tokens
+        if self.on_charge and tokens:
+            self.on_charge(tokens)
+
+
+@dataclass
+class SubagentRun:
+    goal: str
+    termination: str = "goal"
+    response: str | None = None
+    error: str | None = None
+    tool_calls: list[str] = field(default_factory=list)
+    tokens: int = 0
+    transcript: str | None = None
+    cached: bool = False
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def to_text(self) -> str:
+        text = f"""Termination: {self.termination}{' (cached)' if self.cached else ''}
+        Tools called: {', '.join(self.tool_calls) if self.tool_calls else 'None'}
+
+        Result:
+        {self.response or 'No response'}
+        """
+        if self.transcript:
+            text += f"\nPartial transcript:\n{self.transcript}\n"
+        return text
+
+
+def partial_transcript(
+    messages: list[dict[str, Any]],
+    in_progress: str = "",
+    max_chars: int = 6000,
+) -> str:
+    # What a child got done before it was stopped, newest last. The system
+    # prompt, any compaction summary and the task prompt are left out.
+    start = 0
+    while start < len(messages) and messages[start]["role"] == "system":
+        start += 1
+    if start < len(messages) and is_summary_message(messages[start]):
+        start += 1
+        if start < len(messages) and messages[start].get("content") == SUMMARY_ACK:
+            start += 1
+    if start < len(messages) and messages[start]["role"] == "user":
+        start += 1
+
+    lines = []
+    for message in messages[start:]:
+        content = (message.get("content") or "").strip()
+        if message["role"] == "assistant":
+            if content:
+                lines.append(f"assistant: {content[:1000]}")
+            for call in message.get("tool_calls", []):
+                function = call.get("function", {})
+                arguments = str(function.get("arguments", ""))
+                lines.append(f"tool call: {function.get('name')} {arguments[:200]}")
+        elif message["role"] == "tool":
+            lines.append(f"tool result: {content[:500]}")
+
+    if in_progress:
+        lines.append(f"assistant (interrupted): {in_progress[:1000]}")
+
+    transcript = "\n".join(lines)
+    if len(transcript) > max_chars:
+        transcript = "...\n" + transcript[-max_chars:]
+    return transcript
+
+
+def subagent_route(config: Config, definition: SubagentDefinition) -> ModelRoute | None:
+    return config.models.subagents.get(definition.name) or config.models.subagent
+
+
+def _subagent_config(config: Config, definition: SubagentDefinition) -> Config:
+    config_dict = config.to_dict()
+    config_dict["max_turns"] = definition.max_turns
+    if definition.allowed_tools:
+        config_dict["allowed_tools"] = definition.allowed_tools
+    # Children are not resumable sessions: no journal, catalog row or autosave.
+    config_dict["persistence"]["journal"] = False
+    config_dict["persistence"]["autosave"] = False
+
+    route = subagent_route(config, definition)
+    if route is not None:
+        # The child's main model is the routed one; the parent's is its
+        # fallback.
+        models = config_dict["models"]
+        models["fallback"] = models["main"]
+        models["main"] = route.model_dump(mode="json")
+
+    return Config(**config_dict)
+
+
+def _subagent_prompt(definition: SubagentDefinition, goal: str) -> str:
+    return f"""You are a specialized sub-agent with a specific task to complete.
+
+        {definition.goal_prompt}
+
+        YOUR TASK:
+        {goal}
+
+        IMPORTANT:
+        - Focus only on completing the specified task
+        - Do not engage in unrelated actions
+        - Once you have completed the task or have the answer, provide your final response
+        - Be concise and direct in your output
+        """
+
+
+async def run_subagent(
+    config: Config,
+    definition: SubagentDefinition,
+    goal: str,
+    budget: SubagentBudget | None = None,
+) -> SubagentRun:
+    from agent.agent import Agent
+    from agent.events import AgentEventType
+
+    run = SubagentRun(goal=goal)
+
+    def charge(total_tokens: int) -> None:
+        # The budget is shared with siblings running at the same time, so it
+        # is charged as this child's turns complete, not only at the end.
+        if budget is not None:
+            budget.charge(total_tokens - run.tokens)
+        run.tokens = total_tokens
+
+    agent = Agent(_subagent_config(config, definition), subagent=True)
+    context = None
+    streamed: list[str] = []
+
+    try:
+        # A hard deadline: whatever the child is awaiting (LLM stream, tool,
+        # MCP call) is cancelled when it expires.
+        async with asyncio.timeout(definition.timeout_seconds):
+            async with agent:
+                context = agent.session.context_manager
+                events = agent.run(_subagent_prompt(definition, goal))
+                async with contextlib.aclosing(events):
+                    async for event in events:
+                        charge(context.total_usage.total_tokens)
+                        if (
+                            budget is not None
+                            and budget.exhausted
+                            and event.type != AgentEventType.AGENT_END
+                        ):
+                            run.termination = "budget"
+                            run.response = (
+                                run.response or "Sub-agent ran out of token budget"
+                            )
+                            break
+
+                        if event.type == AgentEventType.TOOL_CALL_START:
+                            run.tool_calls.append(event.data.get("name"))
+                        elif event.type == AgentEventType.TEXT_DELTA:
+                            streamed.append(event.data.get("content", ""))
+                        elif event.type == AgentEventType.TEXT_COMPLETE:
+                            run.response = event.data.get("content")
+                            streamed.clear()
+                        elif event.type == AgentEventType.AGENT_END:
+                            if run.response is None:
+                                run.response = event.data.get("response")
+                        elif event.type == AgentEventType.AGENT_ERROR:
+                            run.termination = "error"
+                            run.error = event.data.get("error", "Unknown")
+                            run.response = f"Sub-agent error: {run.error}"
+                            break
+
+                charge(context.total_usage.total_tokens)
+    except TimeoutError:
+        run.termination = "timeout"
+        run.response = f"Sub-agent timed out after {definition.timeout_seconds}s"
+        if context is not None:
+            charge(context.total_usage.total_tokens)
+            run.transcript = partial_transcript(
+                await context.get_messages_async(), "".join(streamed)
+            )
+    except Exception as e:
+        run.termination = "error"
+        run.error = str(e) or type(e).__name__
+        run.response = f"Sub-agent failed: {run.error}"
+
+    return run
+
+
+async def run_subagent_isolated(
+    config: Config,
+    definition: SubagentDefinition,
+    goal: str,
+    budget: SubagentBudget | None = None,
+) -> SubagentRun:
+    if config.subagents.isolation == SubagentIsolation.PROCESS:
+        from tools.subagent_worker import get_worker_pool
+
+        pool = await get_worker_pool(config.subagents)
+        return await pool.run(config, definition, goal, budget)
+
+    return await run_subagent(config, definition, goal, budget)
+
+
+async def run_subagent_cached(
+    config: Config,
+    definition: SubagentDefinition,
+    goal: str,
+    budget: SubagentBudget | None = None,
+) -> SubagentRun:
+    if not (definition.read_only and config.subagents.cache_enabled):
+        return await run_subagent_isolated(config, definition, goal, budget)
+
+    from tools.subagent_cache import get_subagent_cache
+
+    cache = get_subagent_cache(config.subagents)
+    key = await asyncio.to_thread(cache.key, config, definition, goal)
+    if key is not None:
+        cached = await asyncio.to_thread(cache.load, key)
+        if cached is not None:
+            cached.goal = goal
+            return cached
+
+    run = await run_subagent_isolated(config, definition, goal, budget)
+    if key is not None and run.termination == "goal" and not run.failed:
+        await asyncio.to_thread(cache.store, key, run)
+    return run
 
 
 class SubagentTool(Tool):
@@ -41,80 +287,135 @@ class SubagentTool(Tool):
         return True
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
-        from agent.agent import Agent
-        from agent.events import AgentEventType
-
         params = SubagentParams(**invocation.params)
         if not params.goal:
             return ToolResult.error_result("No goal specified for sub-agent")
 
-        config_dict = self.config.to_dict()
-        config_dict["max_turns"] = self.definition.max_turns
-        if self.definition.allowed_tools:
-            config_dict["allowed_tools"] = self.definition.allowed_tools
+        run = await run_subagent_cached(self.config, self.definition, params.goal)
 
-        subagent_config = Config(**config_dict)
+        result = f"""Sub-agent '{self.definition.name}' completed. 
+        {run.to_text()}"""
 
-        prompt = f"""You are a specialized sub-agent with a specific task to complete.
+        if run.failed:
+            return ToolResult.error_result(result)
 
-        {self.definition.goal_prompt}
+        return ToolResult.success_result(result)
 
-        YOUR TASK:
-        {params.goal}
 
-        IMPORTANT:
-        - Focus only on completing the specified task
-        - Do not engage in unrelated actions
-        - Once you have completed the task or have the answer, provide your final response
-        - Be concise and direct in your output
-        """
+class SubagentBatchParams(BaseModel):
+    goals: list[str] = Field(
+        ...,
+        min_length=1,
+        description="Independent goals, one sub-agent each, run in parallel",
+    )
+    subagent: str = Field(
+        default="codebase_investigator",
+        description="Name of the sub-agent to run for every goal",
+    )
+    fail_fast: bool = Field(
+        default=False,
+        description="Cancel the remaining goals as soon as one fails",
+    )
+
+
+class SubagentBatchTool(Tool):
+    name = "subagent_batch"
+    schema = SubagentBatchParams
+
+    def __init__(self, config: Config, definitions: list[SubagentDefinition]):
+        super().__init__(config)
+        self.definitions = {d.name: d for d in definitions}
 
-        tool_calls = []
-        final_response = None
-        error = None
-        terminate_response = "goal"
+    @property
+    def description(self) -> str:
+        return (
+            "Runs several independent goals in parallel, one sub-agent each, "
+            "and returns the combined results. Sub-agents: "
+            + ", ".join(self.definitions)
+        )
+
+    def is_mutating(self, params: dict[str, Any]) -> bool:
+        return True
 
-        try:
-            async with Agent(subagent_config) as agent:
-                deadline = (
-                    asyncio.get_event_loop().time() + self.definition.timeout_seconds
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = SubagentBatchParams(**invocation.params)
+        settings = self.config.subagents
+
+        definition = self.definitions.get(params.subagent)
+        if definition is None:
+            return ToolResult.error_result(
+                f"Unknown sub-agent: {params.subagent}. "
+                f"Available: {', '.join(self.definitions)}"
+            )
+        if len(params.goals) > settings.max_batch_goals:
+            return ToolResult.error_result(
+                f"Too many goals ({len(params.goals)}), "
+                f"the limit is {settings.max_batch_goals}"
+            )
+
+        budget = SubagentBudget(limit=settings.batch_token_budget)
+        semaphore = asyncio.Semaphore(settings.max_parallel)
+        runs: list[SubagentRun | None] = [None] * len(params.goals)
+        tasks: list[asyncio.Task] = []
+        finished = 0
+
+        async def run_goal(index: int, goal: str) -> None:
+            nonlocal finished
+            async with semaphore:
+                if budget.exhausted:
+                    run = SubagentRun(
+                        goal=goal,
+                        termination="skipped",
+                        response="Not started, the token budget is exhausted",
+                        error="Token budget exhausted",
+                    )
+                else:
+                    run = await run_subagent_cached(
+                        self.config, definition, goal, budget
+                    )
+
+            runs[index] = run
+            finished += 1
+            if invocation.progress:
+                invocation.progress(
+                    finished, len(runs), f"{run.termination}: {goal[:60]}"
                 )
 
-                async for event in agent.run(prompt):
-                    if asyncio.get_event_loop().time() > deadline:
-                        terminate_response = "timeout"
-                        final_response = "Sub-agent timed out"
-                        break
-
-                    if event.type == AgentEventType.TOOL_CALL_START:
-                        tool_calls.append(event.data.get("name"))
-                    elif event.type == AgentEventType.TEXT_COMPLETE:
-                        final_response = event.data.get("content")
-                    elif event.type == AgentEventType.AGENT_END:
-                        if final_response is None:
-                            final_response = event.data.get("response")
-                    elif event.type == AgentEventType.AGENT_ERROR:
-                        terminate_response = "error"
-                        error = event.data.get("error", "Unknown")
-                        final_response = f"Sub-agent error: {error}"
-                        break
-        except Exception as e:
-            terminate_response = "error"
-            error = str(e)
-            final_response = f"Sub-agent failed: {e}"
+            if run.failed and params.fail_fast:
+                for task in tasks:
+                    if task is not asyncio.current_task():
+                        task.cancel()
 
-        result = f"""Sub-agent '{self.definition.name}' completed. 
-        Termination: {terminate_response}
-        Tools called: {', '.join(tool_calls) if tool_calls else 'None'}
+        tasks.extend(
+            asyncio.create_task(run_goal(i, goal))
+            for i, goal in enumerate(params.goals)
+        )
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-        Result:
-        {final_response or 'No response'}
-        """
+        for index, goal in enumerate(params.goals):
+            if runs[index] is None:
+                runs[index] = SubagentRun(
+                    goal=goal,
+                    termination="cancelled",
+                    response="Cancelled after another goal failed",
+                    error="Cancelled",
+                )
 
-        if error:
-            return ToolResult.error_result(result)
+        failed = sum(1 for run in runs if run.failed)
+        sections = [
+            f"Sub-agent batch '{definition.name}': {len(runs) - failed} of "
+            f"{len(runs)} goals completed"
+            + (f", token budget {budget.used}/{budget.limit}" if budget.limit else "")
+        ]
+        for index, run in enumerate(runs, start=1):
+            sections.append(f"## {index}. {run.goal}\n        {run.to_text()}")
 
-        return ToolResult.success_result(result)
+        result = "\n\n".join(sections)
+        metadata = {"goals": len(runs), "failed": failed, "tokens": budget.used}
+        if failed == len(runs) or (failed and params.fail_fast):
+            return ToolResult.error_result(result, metadata=metadata)
+
+        return ToolResult.success_result(result, metadata=metadata)
 
 
 CODEBASE_INVESTIGATOR = SubagentDefinition(
@@ -125,6 +426,7 @@ Your job is to explore and understand code to answer questions.
 Use read_file, grep, glob, and list_dir to investigate.
 Do NOT modify any files.""",
     allowed_tools=["read_file", "grep", "glob", "list_dir"],
+    read_only=True,
 )
 
 CODE_REVIEWER = SubagentDefinition(
@@ -138,6 +440,7 @@ Do NOT modify any files.""",
     allowed_tools=["read_file", "grep", "list_dir"],
     max_turns=10,
     timeout_seconds=300,
+    read_only=True,
 )
 
 
@@ -0,0 +1,80 @@
+import asyncio
+from collections import deque
+import logging
+from typing import Any
+
+from telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: float = 0.5,
+        warn_threshold_ms: float = 100,
+        max_samples: int = 1000,
+        export_metrics: bool = False,
+    ) -> None:
+        self.interval = interval
+        self.export_metrics = export_metrics
+        self.warn_threshold_ms = warn_threshold_ms
+        self._samples: deque[float] = deque(maxlen=max_samples)
+        self._max_lag_ms = 0.0
+        self._slow_count = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+            self.record(lag_ms)
+
+    def record(self, lag_ms: float) -> None:
+        self._samples.append(lag_ms)
+        self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+        if self.export_metrics:
+            get_metrics().observe("event_loop_lag_seconds", lag_ms / 1000)
+
+        if lag_ms >= self.warn_threshold_ms:
+            self._slow_count += 1
+            logger.warning(f"Event loop blocked for {lag_ms:.1f}ms")
+
+    def get_stats(self) -> dict[str, Any]:
+        if not self._samples:
+            return {"samples": 0}
+
+        ordered = sorted(self._samples)
+        p99_index = min(len(ordered) - 1, int(len(ordered) * 0.99))
+
+        return {
+            "samples": len(ordered),
+            "mean_ms": round(sum(ordered) / len(ordered), 2),
+            "p99_ms": round(ordered[p99_index], 2),
+            "max_ms": round(self._max_lag_ms, 2),
+            "slow_samples": self._slow_count,
+        }